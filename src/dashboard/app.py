@@ -5,6 +5,12 @@ from pathlib import Path
 import plotly.graph_objects as go
 import seaborn as sns
 import matplotlib.pyplot as plt
+from evaluation.result import DIMENSIONS, SCORE_FIELDS
+from evaluation.report_reader import ReportReader
+from evaluation.report_aggregates import domain_of, join_reports, load_or_build_sidecar
+from evaluation.live_tail import LIVE_SUFFIX, LiveRun
+from evaluation.score_matrix import weight_vector
+from evaluation.downsample import MAX_BARS, MAX_OPTIONS, box_stats, downsample_series, histogram
 
 # 📁 Load available LLM reports
 report_dir = Path("src/evaluation/data")
@@ -17,19 +23,78 @@ scoring_mode = st.sidebar.radio("Scoring Engine", ["Traditional", "Groq LLM"])
 selected_report = st.sidebar.selectbox("LLM Report File", llm_reports, index=llm_reports.index(default_report) if default_report in llm_reports else 0)
 heatmap_mode = st.sidebar.radio("Heatmap Mode", ["LLM", "Traditional", "Compare", "Delta"])
 
+# 📡 Live mode: tail an in-progress batch_runner run instead of a finished report
+live_mode = st.sidebar.checkbox("Live run", value=False)
+if live_mode:
+    live_files = sorted(report_dir.glob(f"*{LIVE_SUFFIX}"), key=lambda p: p.stat().st_mtime, reverse=True)
+    if not live_files:
+        st.info(f"No `*{LIVE_SUFFIX}` files in `{report_dir}` yet. Start `batch_runner.py` to create one.")
+        st.stop()
+    live_file = st.sidebar.selectbox("Run", live_files)
+    refresh_s = st.sidebar.slider("Refresh every (s)", 1, 30, 5)
+    live_top_k = st.sidebar.slider("Leaderboard size", 5, 50, 10)
+
+    # Only the offset and running aggregates persist between refreshes
+    live_key = f"live::{live_file}::{live_top_k}"
+    if live_key not in st.session_state:
+        st.session_state[live_key] = LiveRun(live_file, top_k=live_top_k)
+
+    @st.fragment(run_every=f"{refresh_s}s")
+    def live_view():
+        run = st.session_state[live_key]
+        added = run.poll()
+        rate = run.throughput()
+
+        st.title("📡 Live Run")
+        st.caption(f"`{live_file.name}` – refreshing every {refresh_s}s")
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Items scored", run.count, delta=added or None)
+        c2.metric("Items/s (recent)", f"{rate['recent']:.2f}")
+        c3.metric("Items/s (overall)", f"{rate['overall']:.2f}")
+        if not run.caught_up:
+            st.caption(f"Catching up on earlier records ({run.max_lines} per refresh)…")
+
+        means = run.means()
+        if means:
+            st.subheader("📊 Running Mean per Dimension")
+            st.bar_chart(pd.Series(means, name="mean"))
+
+        st.subheader(f"🏆 Top {run.top_k}" + (f" by `{run.rank_dim}`" if run.rank_dim else ""))
+        st.dataframe(pd.DataFrame(run.leaderboard(), columns=["Agent", "Score"]), use_container_width=True)
+        if run.bad_lines:
+            st.warning(f"⚠️ Skipped {run.bad_lines} unreadable lines.")
+
+    live_view()
+    st.stop()
+
 # 📦 Load Reports
 report_path_traditional = report_dir / "real_report.json"
 
+def report_mtime(path):
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+@st.cache_resource(max_entries=4)
+def _load_reader(path_str, mtime_ns):
+    return ReportReader(path_str)
+
 def load_data(path):
+    # Memory-mapped and indexed; records are decoded only when displayed
+    if not path.exists():
+        return None
     try:
-        with path.open("r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return []
+        return _load_reader(str(path), report_mtime(path))
+    except Exception as e:  # failures are not cached, so a fixed report loads on the next rerun
+        st.error(f"❌ Could not read report `{path}`: {e}")
+        return None
+
+reader = load_data(report_path_traditional if scoring_mode == "Traditional" else selected_report)
 
-data_traditional = load_data(report_path_traditional)
-data_llm = load_data(selected_report)
-data = data_traditional if scoring_mode == "Traditional" else data_llm
+def record_for(agent_id):
+    # Lazy view of the agent's first record, or None
+    return reader.view(agent_id) if reader is not None else None
 
 # 📊 Define scoring dimensions
 score_columns = [
@@ -45,37 +110,67 @@ score_columns = [
 def to_dataframe(data):
     rows = []
     for r in data:
-        s = r["scores"]
-        if "coherence_&_accuracy" in s:
-            s["coherence_accuracy"] = s["coherence_&_accuracy"]
         rows.append({
-            "Agent": r["agent_id"],
-            "Instruction-Following": s.get("instruction_following", 0.0),
-            "Coherence & Accuracy": s.get("coherence_accuracy", 0.0),
-            "Hallucination Detection": s.get("hallucination_detection", 0.0),
-            "Style Matching": s.get("style_matching", 0.0),
-            "Length Penalty": s.get("length_penalty", 0.0),
-            "Assumption Control": s.get("assumption_control", 0.0),
-            "Final Score": s.get("final", 0.0),
-            "Domain": r.get("domain", "Unknown")
+            "Agent": r.agent_id,
+            "Instruction-Following": r.score("instruction_following"),
+            "Coherence & Accuracy": r.score("coherence_accuracy"),
+            "Hallucination Detection": r.score("hallucination_detection"),
+            "Style Matching": r.score("style_matching"),
+            "Length Penalty": r.score("length_penalty"),
+            "Assumption Control": r.score("assumption_control"),
+            "Final Score": r.score("final"),
+            "Domain": domain_of(r)
         })
     return pd.DataFrame(rows)
 
-df_traditional = to_dataframe(data_traditional)
-df_traditional_scaled = df_traditional.copy()
-for col in score_columns:
-    if col != "Domain":
-        df_traditional_scaled[col] = df_traditional_scaled[col] * 10
-
-df_llm = to_dataframe(data_llm)
+@st.cache_data(max_entries=4)
+def report_frame(path_str, mtime_ns, scale=1.0):
+    reader = load_data(Path(path_str))
+    frame = to_dataframe(reader.iter_scores("domain") if reader is not None else [])
+    if scale != 1.0 and not frame.empty:
+        frame[score_columns] = frame[score_columns] * scale
+    return frame
+
+@st.cache_data(max_entries=4)
+def compare_frame(llm_path_str, llm_mtime_ns, traditional_path_str, traditional_mtime_ns):
+    """
+    LLM vs scaled traditional scores joined on agent_id via the report sidecars.
+    Columns are the display labels, suffixed _llm / _traditional.
+    """
+    llm = load_or_build_sidecar(Path(llm_path_str))
+    traditional = load_or_build_sidecar(Path(traditional_path_str))
+    if not llm or not traditional:
+        return pd.DataFrame()
+    joined = join_reports(llm, traditional, right_scale=10).fillna(0.0)
+    labels = dict(zip(SCORE_FIELDS, score_columns))
+    return joined.rename(columns=lambda c: labels[c.rsplit("_", 1)[0]] + ("_llm" if c.endswith("_left") else "_traditional"))
+
+df_traditional_scaled = report_frame(str(report_path_traditional), report_mtime(report_path_traditional), scale=10)
+df_llm = report_frame(str(selected_report), report_mtime(selected_report))
 df = df_traditional_scaled if scoring_mode == "Traditional" else df_llm
 
 # 🎛️ Domain Filter
-domains = sorted(set(r.get("domain", "Unknown") for r in data))
+domains = sorted(set(df["Domain"])) if not df.empty else []
 selected_domain = st.sidebar.selectbox("Domain", ["All"] + domains)
 if selected_domain != "All":
     df = df[df["Domain"] == selected_domain]
 
+# ⚖️ What-if weights: recompute Final Score as one matrix-vector product
+weights_path = Path("config/weights.json")
+try:
+    default_weights = json.loads(weights_path.read_text(encoding="utf-8"))
+except Exception:
+    default_weights = {}
+with st.sidebar.expander("⚖️ What-if Weights"):
+    reweight = st.checkbox("Re-weight Final Score", value=False)
+    custom_weights = {
+        dim: st.slider(label, 0.0, 2.0, float(default_weights.get(dim, 0.0)), 0.05, key=f"weight_{dim}")
+        for dim, label in zip(DIMENSIONS, score_columns)
+    }
+if reweight and not df.empty:
+    df = df.copy()
+    df["Final Score"] = (df[score_columns[:-1]].to_numpy() @ weight_vector(custom_weights)).round(2)
+
 # 🎛️ Leaderboard controls
 st.sidebar.title("Leaderboard Filters")
 sort_by = st.sidebar.selectbox("Sort by", score_columns)
@@ -86,10 +181,14 @@ st.title("Agentic Evaluation Framework")
 st.markdown(f"**Scoring Mode**: `{scoring_mode}` | **Domain**: `{selected_domain}`")
 st.markdown("Explore agent performance across multiple scoring dimensions.")
 
+# Agent pickers list at most MAX_OPTIONS agents: the top ones by the current sort
+agent_options = df["Agent"] if len(df) <= MAX_OPTIONS else \
+    df.nlargest(MAX_OPTIONS, sort_by)["Agent"]
+
 # 🔍 Agent Explanation Block
 st.subheader("🔍 Agent Explanations")
-selected_agent = st.selectbox("Select an agent", df["Agent"])
-agent_data = next((r for r in data if r["agent_id"] == selected_agent), None)
+selected_agent = st.selectbox("Select an agent", agent_options)
+agent_data = record_for(selected_agent)
 
 if agent_data:
     if st.checkbox("Show Prompt & Response"):
@@ -98,26 +197,14 @@ if agent_data:
         st.markdown("### 💬 Response")
         st.code(agent_data.get("response", "No response available."), language="markdown")
 
-    explanation = agent_data.get("explanations", {})
-    scores = agent_data.get("scores", {})
-    if "coherence_&_accuracy" in scores:
-        scores["coherence_accuracy"] = scores["coherence_&_accuracy"]
-        explanation["coherence_accuracy"] = explanation.get("coherence_&_accuracy", "")
-
-    for dim, text in explanation.items():
-        st.markdown(f"**{dim.replace('_', ' ').title()}**: {text}")
-
-    core_dims = [
-        "instruction_following",
-        "coherence_accuracy",
-        "hallucination_detection",
-        "style_matching",
-        "length_penalty",
-        "assumption_control"
-    ]
-    weakest_dim = min(core_dims, key=lambda d: scores.get(d, 10.0))
-    weak_score = scores.get(weakest_dim, 0.0)
-    weak_expl = explanation.get(weakest_dim, "No explanation available.")
+    explanation = agent_data.explanations
+    if isinstance(explanation, dict):
+        for dim, text in explanation.items():
+            st.markdown(f"**{dim.replace('_', ' ').title()}**: {text}")
+
+    weakest_dim = min(DIMENSIONS, key=lambda d: agent_data.score(d, 10.0))
+    weak_score = agent_data.score(weakest_dim)
+    weak_expl = agent_data.explanation(weakest_dim, "No explanation available.")
 
     st.markdown("---")
     st.markdown(f"**Weakest Dimension**: `{weakest_dim.replace('_', ' ').title()}` – {weak_score}/10")
@@ -129,7 +216,12 @@ st.dataframe(df_sorted.drop(columns=["Domain"]), use_container_width=True)
 
 # 📊 Score Distribution Chart
 st.subheader("📊 Score Distribution")
-st.bar_chart(df.set_index("Agent")[score_columns[:-1]])
+if len(df) <= MAX_BARS:
+    st.bar_chart(df.set_index("Agent")[score_columns[:-1]])
+else:
+    # Too many agents for one bar each: agents per score bin instead
+    st.caption(f"{len(df)} agents – showing how many fall in each score range")
+    st.bar_chart(histogram(df, score_columns[:-1]))
 
 # Heatmap Section
 st.subheader("Agent vs Dimension Heatmap")
@@ -139,6 +231,15 @@ start_idx = st.sidebar.slider("Start index", 0, len(df) - chunk_size, 0)
 df_chunk_llm = df_llm.iloc[start_idx:start_idx + chunk_size]
 df_chunk_traditional_scaled = df_traditional_scaled.iloc[start_idx:start_idx + chunk_size]
 
+if heatmap_mode in ("Compare", "Delta"):
+    # Align the two reports by agent_id, not by row position
+    df_joined = compare_frame(str(selected_report), report_mtime(selected_report),
+                              str(report_path_traditional), report_mtime(report_path_traditional))
+    df_chunk_joined = df_joined.iloc[start_idx:start_idx + chunk_size]
+    df_chunk_llm_aligned = df_chunk_joined[[f"{c}_llm" for c in score_columns[:-1]]].rename(columns=lambda c: c[:-4])
+    df_chunk_traditional_aligned = df_chunk_joined[[f"{c}_traditional" for c in score_columns[:-1]]].rename(columns=lambda c: c[:-12])
+    st.caption(f"{len(df_joined)} agents present in both reports")
+
 if heatmap_mode == "LLM":
     fig, ax = plt.subplots(figsize=(10, 6))
     sns.heatmap(df_chunk_llm.set_index("Agent")[score_columns[:-1]], annot=True, fmt=".1f", cmap="coolwarm", ax=ax)
@@ -149,58 +250,53 @@ elif heatmap_mode == "Traditional":
     sns.heatmap(df_chunk_traditional_scaled.set_index("Agent")[score_columns[:-1]], annot=True, fmt=".1f", cmap="coolwarm", ax=ax)
     st.pyplot(fig)
 
-elif heatmap_mode == "Compare":
+elif heatmap_mode == "Compare" and not df_chunk_joined.empty:
     col1, col2 = st.columns(2)
     with col1:
         st.markdown("### LLM Judge")
         fig1, ax1 = plt.subplots(figsize=(6, 6))
-        sns.heatmap(df_chunk_llm.set_index("Agent")[score_columns[:-1]], annot=False, cmap="coolwarm", ax=ax1)
+        sns.heatmap(df_chunk_llm_aligned, annot=False, cmap="coolwarm", ax=ax1)
         st.pyplot(fig1)
     with col2:
         st.markdown("### 🧮 Traditional Heuristics")
         fig2, ax2 = plt.subplots(figsize=(6, 6))
-        sns.heatmap(df_chunk_traditional_scaled.set_index("Agent")[score_columns[:-1]], annot=False, cmap="coolwarm", ax=ax2)
+        sns.heatmap(df_chunk_traditional_aligned, annot=False, cmap="coolwarm", ax=ax2)
         st.pyplot(fig2)
 
-elif heatmap_mode == "Delta":
+elif heatmap_mode == "Delta" and not df_chunk_joined.empty:
     st.markdown("### Score Delta (LLM - Traditional)")
-    df_delta = df_chunk_llm.set_index("Agent")[score_columns[:-1]] - df_chunk_traditional_scaled.set_index("Agent")[score_columns[:-1]]
+    df_delta = df_chunk_llm_aligned - df_chunk_traditional_aligned
     fig, ax = plt.subplots(figsize=(10, 6))
     sns.heatmap(df_delta, cmap="bwr", center=0, annot=True, fmt=".1f", ax=ax)
     st.pyplot(fig)
 
 # 📈 Final Score Trend
 st.subheader("📈 Final Score Trend")
-st.line_chart(df["Final Score"])
+trend = downsample_series(df["Final Score"])
+if len(trend) < len(df):
+    st.caption(f"{len(trend)} of {len(df)} points (LTTB downsampled)")
+st.line_chart(trend)
 
-# 📦 Boxplot
+# 📦 Boxplot (quartiles computed here; the browser only gets five numbers per box)
 st.subheader("📦 Score Distribution by Dimension")
 fig_box = go.Figure()
-for col in score_columns[:-1]:
-    fig_box.add_trace(go.Box(y=df[col], name=col))
+for col, b in box_stats(df, score_columns[:-1]).items():
+    fig_box.add_trace(go.Box(
+        x=[col], q1=[b["q1"]], median=[b["median"]], q3=[b["q3"]],
+        lowerfence=[b["lowerfence"]], upperfence=[b["upperfence"]], mean=[b["mean"]],
+        name=col, boxpoints=False
+    ))
 st.plotly_chart(fig_box, use_container_width=True)
 
 # 🕸️ Radar Chart
 st.subheader("🕸️ Agent Score Profile")
-selected_agent_radar = st.selectbox("Select an agent for radar view", df["Agent"], key="radar_agent_select")
-agent_data_radar = next((r for r in data if r["agent_id"] == selected_agent_radar), None)
+selected_agent_radar = st.selectbox("Select an agent for radar view", agent_options, key="radar_agent_select")
+agent_data_radar = record_for(selected_agent_radar)
 
 if agent_data_radar:
-    scores = agent_data_radar.get("scores", {})
-    if "coherence_&_accuracy" in scores:
-        scores["coherence_accuracy"] = scores["coherence_&_accuracy"]
-
-    dimensions = [
-        "instruction_following",
-        "coherence_accuracy",
-        "hallucination_detection",
-        "style_matching",
-        "length_penalty",
-        "assumption_control"
-    ]
-    values = [scores.get(dim, 0.0) for dim in dimensions]
+    values = agent_data_radar.score_vector(DIMENSIONS)
     values.append(values[0])  # Close the radar loop
-    labels = [dim.replace("_", " ").title() for dim in dimensions]
+    labels = [dim.replace("_", " ").title() for dim in DIMENSIONS]
     labels.append(labels[0])
 
     fig_radar = go.Figure()
@@ -0,0 +1,266 @@
+import heapq
+import math
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from evaluation.result import FINAL, SCORE_FIELDS, EvalResult
+
+
+class RunningStats:
+    """
+    Count, mean, variance, min and max in O(1) memory (Welford's update,
+    Chan et al.'s formula to merge two partials).
+    """
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def merge(self, other: "RunningStats") -> None:
+        if not other.count:
+            return
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.count = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_list(self) -> list:
+        return [self.count, self.mean, self.m2, self.min, self.max]
+
+    @classmethod
+    def from_list(cls, values: Sequence[float]) -> "RunningStats":
+        stats = cls()
+        stats.count, stats.mean, stats.m2, stats.min, stats.max = values
+        return stats
+
+
+class TDigest:
+    """
+    Merging t-digest: approximate quantiles from at most ~`compression`
+    weighted centroids, accurate at the tails and mergeable across workers.
+    """
+
+    __slots__ = ("compression", "means", "weights", "_buffer", "min", "max")
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = compression
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self._buffer: List[Tuple[float, float]] = []
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float, weight: float = 1.0) -> None:
+        self._buffer.append((x, weight))
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> None:
+        other._compress()
+        self._buffer.extend(zip(other.means, other.weights))
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q_limit(self, q: float) -> float:
+        k = self._k(q) + 1
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        points = sorted(list(zip(self.means, self.weights)) + self._buffer)
+        self._buffer = []
+        total = sum(w for _, w in points)
+
+        means, weights = [], []
+        mean, weight = points[0]
+        q0 = 0.0
+        limit = self._q_limit(q0)
+        for m, w in points[1:]:
+            if q0 + (weight + w) / total <= limit:
+                weight += w
+                mean += (m - mean) * w / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                q0 += weight / total
+                limit = self._q_limit(q0)
+                mean, weight = m, w
+        means.append(mean)
+        weights.append(weight)
+        self.means, self.weights = means, weights
+
+    @property
+    def count(self) -> float:
+        return sum(self.weights) + sum(w for _, w in self._buffer)
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._compress()
+        if not self.means:
+            return None
+        total = sum(self.weights)
+        # Interpolate between centroid centres, anchored at the exact min and max
+        centres = [c - w / 2 for c, w in zip(accumulate(self.weights), self.weights)]
+        positions = [0.0] + centres + [total]
+        values = [self.min] + self.means + [self.max]
+        target = q * total
+        i = min(max(bisect_left(positions, target), 1), len(positions) - 1)
+        left, right = positions[i - 1], positions[i]
+        if right <= left:
+            return values[i]
+        return values[i - 1] + (values[i] - values[i - 1]) * (target - left) / (right - left)
+
+    def to_list(self) -> list:
+        self._compress()
+        return [self.min, self.max, [[m, w] for m, w in zip(self.means, self.weights)]]
+
+    @classmethod
+    def from_list(cls, values: Sequence, compression: float = 100.0) -> "TDigest":
+        digest = cls(compression)
+        digest.min, digest.max, centroids = values
+        digest.means = [m for m, _ in centroids]
+        digest.weights = [w for _, w in centroids]
+        return digest
+
+
+class LeaderboardAggregator:
+    """
+    Streaming per-agent, per-dimension statistics (count, mean, std,
+    p50/p90). Memory grows with the number of agents, not of scored
+    items; partials from parallel workers combine with `merge`.
+    """
+
+    def __init__(self, dims: Sequence[str] = SCORE_FIELDS, compression: float = 100.0):
+        self.dims = tuple(dims)
+        self.compression = compression
+        self.agents: Dict[str, Dict[str, Tuple[RunningStats, TDigest]]] = {}
+        self.items = 0
+
+    def _slot(self, agent_id: str, dim: str) -> Tuple[RunningStats, TDigest]:
+        per_agent = self.agents.setdefault(agent_id, {})
+        slot = per_agent.get(dim)
+        if slot is None:
+            slot = per_agent[dim] = (RunningStats(), TDigest(self.compression))
+        return slot
+
+    def add(self, result: EvalResult) -> None:
+        self.items += 1
+        for dim in self.dims:
+            if result.has_score(dim):
+                value = float(result.score(dim))
+                stats, digest = self._slot(result.agent_id, dim)
+                stats.add(value)
+                digest.add(value)
+
+    def add_all(self, results: Iterable[EvalResult]) -> "LeaderboardAggregator":
+        for result in results:
+            self.add(result)
+        return self
+
+    def merge(self, other: "LeaderboardAggregator") -> None:
+        self.items += other.items
+        for agent_id, per_agent in other.agents.items():
+            for dim, (stats, digest) in per_agent.items():
+                mine = self._slot(agent_id, dim)
+                mine[0].merge(stats)
+                mine[1].merge(digest)
+
+    def __len__(self) -> int:
+        return len(self.agents)
+
+    def summary(self, agent_id: str, dim: str) -> Optional[Dict]:
+        slot = self.agents.get(agent_id, {}).get(dim)
+        if slot is None:
+            return None
+        stats, digest = slot
+        return {
+            "count": stats.count,
+            "mean": stats.mean,
+            "std": stats.std,
+            "min": stats.min,
+            "max": stats.max,
+            "p50": digest.quantile(0.5),
+            "p90": digest.quantile(0.9)
+        }
+
+    def default_dim(self) -> str:
+        return FINAL if any(FINAL in per_agent for per_agent in self.agents.values()) else self.dims[0]
+
+    def top_k(self, k: int, dim: str = None, stat: str = "mean") -> List[Tuple[str, Dict]]:
+        """
+        The k agents with the highest `stat` ("mean", "p50", "p90", ...) on
+        `dim`, via a bounded heap instead of a full sort.
+        """
+        dim = dim or self.default_dim()
+        if stat in ("mean", "count", "min", "max"):
+            key = lambda agent_id: getattr(self.agents[agent_id][dim][0], stat)
+        else:
+            q = float(stat.lstrip("p")) / 100
+            key = lambda agent_id: self.agents[agent_id][dim][1].quantile(q)
+        ranked = heapq.nlargest(k, (a for a, per_agent in self.agents.items() if dim in per_agent), key=key)
+        return [(agent_id, self.summary(agent_id, dim)) for agent_id in ranked]
+
+    def to_dict(self) -> Dict:
+        return {
+            "compression": self.compression,
+            "dims": list(self.dims),
+            "items": self.items,
+            "agents": {
+                agent_id: {dim: [stats.to_list(), digest.to_list()] for dim, (stats, digest) in per_agent.items()}
+                for agent_id, per_agent in self.agents.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LeaderboardAggregator":
+        agg = cls(data.get("dims", SCORE_FIELDS), data.get("compression", 100.0))
+        agg.items = data.get("items", 0)
+        for agent_id, per_agent in data.get("agents", {}).items():
+            agg.agents[agent_id] = {
+                dim: (RunningStats.from_list(stats), TDigest.from_list(digest, agg.compression))
+                for dim, (stats, digest) in per_agent.items()
+            }
+        return agg
+
+
+def print_agent_leaderboard(agg: LeaderboardAggregator, dim: str = None, top_k: int = 20) -> None:
+    dim = dim or agg.default_dim()
+    print(f"\nAgent leaderboard – mean '{dim}' over {agg.items} items, top {min(top_k, len(agg))} of {len(agg)} agents")
+    for idx, (agent_id, s) in enumerate(agg.top_k(top_k, dim), start=1):
+        print(
+            f"{idx}. {agent_id} – n={s['count']}; "
+            f"mean {s['mean']:.2f} ± {s['std']:.2f}; p50 {s['p50']:.2f}; p90 {s['p90']:.2f}"
+        )
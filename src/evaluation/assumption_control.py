@@ -1,11 +1,16 @@
 import re
-from typing import Dict
+from typing import Dict, Sequence
+
+import numpy as np
+
+from evaluation.columnar import BatchScores, TextColumn, as_column, compile_cues
 
 # Speculative language cues
 SPECULATIVE_CUES = [
     r"\bprobably\b", r"\bmight\b", r"\bcould be\b", r"\bperhaps\b",
     r"\bseems like\b", r"\bmay have\b", r"\bpossibly\b"
 ]
+_CUES = compile_cues(SPECULATIVE_CUES)
 
 def score_assumption_control(response: str) -> Dict:
     """
@@ -18,3 +23,11 @@ def score_assumption_control(response: str) -> Dict:
     score = round(10.0 - deduction, 2)
     explanation = f"{hits} speculative cue{'s' if hits != 1 else ''} found"
     return {"score": score, "explanation": explanation}
+
+def score_assumption_control_batch(responses: Sequence[str], column: TextColumn = None) -> BatchScores:
+    """
+    score_assumption_control over a whole column of responses.
+    """
+    hits = as_column(responses, column).cue_hits(_CUES)
+    scores = 10.0 - np.minimum(hits * 2, 10)
+    return BatchScores(scores, lambda i: f"{hits[i]} speculative cue{'s' if hits[i] != 1 else ''} found")
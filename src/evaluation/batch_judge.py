@@ -0,0 +1,257 @@
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import requests
+
+from evaluation.aggregation import LeaderboardAggregator, print_agent_leaderboard
+from evaluation.batch_runner import save_outputs
+from evaluation.cache import cache_key
+from evaluation.evaluate_with_llm import (JUDGE_RESPONSE_FORMAT, JUDGE_TEMPERATURE, JudgeParseError,
+                                         build_judge_messages, parse_judge_output)
+from evaluation.result import EvalResult, apply_weights
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+CHAT_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+# Recovers the item of an output line that is not valid JSON
+_CUSTOM_ID = re.compile(r'"custom_id"\s*:\s*"([^"]*)"')
+
+
+def write_batch_requests(items: Sequence[dict], path: Path, model: str,
+                         temperature: float = JUDGE_TEMPERATURE) -> int:
+    """
+    One judge request per item, as OpenAI-compatible batch JSONL. The
+    custom_id is the item's position, so duplicate agent_ids stay distinct.
+    """
+    with Path(path).open("w", encoding="utf-8") as f:
+        for i, item in enumerate(items):
+            f.write(json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": CHAT_ENDPOINT,
+                "body": {
+                    "model": model,
+                    "messages": build_judge_messages(item.get("prompt", ""), item.get("response", "")),
+                    "temperature": temperature,
+                    "response_format": JUDGE_RESPONSE_FORMAT
+                }
+            }) + "\n")
+    return len(items)
+
+
+class BatchClient:
+    """
+    Minimal client for the OpenAI-compatible Files and Batches endpoints
+    (Groq, OpenAI, or any stand-in serving the same routes under `base_url`).
+    """
+
+    def __init__(self, base_url: str = GROQ_BASE_URL, api_key: str = None, timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        api_key = api_key or os.getenv("GROQ_API_KEY")
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def _json(self, method: str, path: str, **kwargs) -> Dict:
+        res = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        res.raise_for_status()
+        return res.json()
+
+    def upload(self, path: Path) -> str:
+        with Path(path).open("rb") as f:
+            return self._json("POST", "/files", data={"purpose": "batch"},
+                              files={"file": (Path(path).name, f, "application/jsonl")})["id"]
+
+    def create_batch(self, input_file_id: str, completion_window: str = "24h") -> Dict:
+        return self._json("POST", "/batches", json={
+            "input_file_id": input_file_id,
+            "endpoint": CHAT_ENDPOINT,
+            "completion_window": completion_window
+        })
+
+    def get_batch(self, batch_id: str) -> Dict:
+        return self._json("GET", f"/batches/{batch_id}")
+
+    def wait(self, batch_id: str, poll_s: float = 60.0, timeout: float = None) -> Dict:
+        start = time.monotonic()
+        while True:
+            batch = self.get_batch(batch_id)
+            counts = batch.get("request_counts") or {}
+            logging.info(f"⏳ Batch {batch_id}: {batch.get('status')} "
+                         f"({counts.get('completed', 0)}/{counts.get('total', '?')} done, {counts.get('failed', 0)} failed)")
+            if batch.get("status") in TERMINAL_STATES:
+                return batch
+            if timeout is not None and time.monotonic() - start > timeout:
+                raise TimeoutError(f"Batch {batch_id} still {batch.get('status')} after {timeout:.0f}s")
+            time.sleep(poll_s)
+
+    def download(self, file_id: str, dest: Path) -> Path:
+        with self.session.get(f"{self.base_url}/files/{file_id}/content", stream=True, timeout=self.timeout) as res:
+            res.raise_for_status()
+            with Path(dest).open("wb") as f:
+                for chunk in res.iter_content(chunk_size=1 << 20):
+                    f.write(chunk)
+        return Path(dest)
+
+
+def parse_batch_output(path: Path) -> Iterator[Tuple[str, Dict, str]]:
+    """
+    Streams a batch output (or error) file and yields
+    (custom_id, parsed judge output or None, error or None) per line.
+    """
+    with Path(path).open("r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("not a JSON object")
+            except ValueError as e:
+                # One broken line fails its own item, not the whole batch
+                match = _CUSTOM_ID.search(line)
+                if not match:
+                    logging.warning(f"⚠️ Skipping unreadable line in '{path}': {e}")
+                    continue
+                yield match.group(1), None, f"malformed batch output line: {e}"
+                continue
+            custom_id = record.get("custom_id")
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                error = record.get("error") or (response.get("body") or {}).get("error")
+                yield custom_id, None, f"request failed: {error or response.get('status_code')}"
+                continue
+            try:
+                content = response["body"]["choices"][0]["message"]["content"]
+                yield custom_id, parse_judge_output(content), None
+            except (KeyError, IndexError, TypeError):
+                yield custom_id, None, "malformed batch response"
+            except JudgeParseError as e:
+                yield custom_id, None, f"invalid judge output: {e}"
+
+
+def join_results(items: Sequence[dict], outputs: Iterator[Tuple[str, Dict, str]],
+                 weights: dict = None) -> Tuple[List[EvalResult], List[dict]]:
+    """
+    Matches parsed outputs to items by custom_id; results keep input order
+    and items with no valid output become failures.
+    """
+    parsed, errors = {}, {}
+    for custom_id, output, error in outputs:
+        if output is not None:
+            parsed[custom_id] = output
+        else:
+            errors[custom_id] = error
+
+    results, failures = [], []
+    for i, item in enumerate(items):
+        agent_id = item.get("agent_id", "<unknown>")
+        output = parsed.get(str(i))
+        if output is None:
+            failures.append({"agent_id": agent_id, "error": errors.get(str(i), "no result in batch output")})
+            continue
+        result = EvalResult.from_scores(agent_id, output["scores"], output["explanations"],
+                                        prompt=item.get("prompt", ""), response=item.get("response", ""))
+        if weights:
+            apply_weights(result, weights)
+        results.append(result)
+    return results, failures
+
+
+def run_batch_judge(items: Sequence[dict], output_path: Path, client: BatchClient, model: str,
+                    weights: dict = None, poll_s: float = 60.0, timeout: float = None) -> Tuple[List[EvalResult], List[dict]]:
+    """
+    Submits every item as one batch job, waits for it and returns
+    (results, failures). The batch id is kept in <stem>.batch.json so a
+    restarted run resumes polling instead of submitting again.
+    """
+    state_path = output_path.with_name(output_path.stem + ".batch.json")
+    requests_path = output_path.with_name(output_path.stem + ".batch_requests.jsonl")
+    state = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else {}
+    fingerprint = cache_key(model, *(f"{i.get('prompt', '')}\x00{i.get('response', '')}" for i in items))
+
+    if state.get("fingerprint") == fingerprint:
+        logging.info(f"Resuming batch {state['batch_id']} from '{state_path}'")
+    else:
+        write_batch_requests(items, requests_path, model)
+        file_id = client.upload(requests_path)
+        batch = client.create_batch(file_id)
+        state = {"batch_id": batch["id"], "input_file_id": file_id, "fingerprint": fingerprint}
+        state_path.write_text(json.dumps(state), encoding="utf-8")
+        logging.info(f"📤 Submitted {len(items)} judge requests as batch {batch['id']}")
+
+    batch = client.wait(state["batch_id"], poll_s=poll_s, timeout=timeout)
+    outputs = []
+    for key, suffix in (("output_file_id", ".batch_output.jsonl"), ("error_file_id", ".batch_errors.jsonl")):
+        if batch.get(key):
+            outputs.append(client.download(batch[key], output_path.with_name(output_path.stem + suffix)))
+    if batch.get("status") != "completed":
+        logging.warning(f"⚠️ Batch {state['batch_id']} ended as '{batch.get('status')}'; keeping partial results")
+
+    results, failures = join_results(items, (row for path in outputs for row in parse_batch_output(path)), weights)
+    state_path.unlink(missing_ok=True)
+    return results, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Judge a batch through the provider's offline batch API (no per-request rate limits)."
+    )
+    parser.add_argument("--input", "-i", type=Path, required=True, help="Path to JSON file with agent responses.")
+    parser.add_argument("--output", "-o", type=Path, required=True, help="Path to write the evaluation report JSON.")
+    parser.add_argument("--weights", "-w", type=Path, default=None, help="Optional JSON file with weights per dimension.")
+    parser.add_argument("--dim", "-d", type=str, default=None, help="Dimension to sort leaderboard by.")
+    parser.add_argument("--top", "-k", type=int, default=20, help="Agents to show on the leaderboard.")
+    parser.add_argument("--model", "-m", type=str, default="llama-3.3-70b-versatile", help="Judge model.")
+    parser.add_argument("--base_url", type=str, default=os.getenv("BATCH_API_BASE_URL", GROQ_BASE_URL),
+                        help="OpenAI-compatible API root serving /files and /batches.")
+    parser.add_argument("--batch_id", type=int, default=None, help="Batch ID selecting the Groq API key.")
+    parser.add_argument("--key_map", type=Path, default=Path("config/groq_keys.json"),
+                        help="Path to JSON file mapping batch_id to Groq API key.")
+    parser.add_argument("--poll", type=float, default=60.0, help="Seconds between status checks.")
+    parser.add_argument("--timeout", type=float, default=None, help="Give up waiting after this many seconds.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S")
+
+    try:
+        with args.input.open("r", encoding="utf-8") as f:
+            items = json.load(f)
+        weights = {}
+        if args.weights:
+            with args.weights.open("r", encoding="utf-8") as wf:
+                weights = json.load(wf)
+        api_key = None
+        if args.batch_id is not None:
+            with args.key_map.open("r", encoding="utf-8") as kf:
+                api_key = json.load(kf).get(str(args.batch_id))
+            if not api_key:
+                raise ValueError(f"No API key found for batch {args.batch_id}")
+    except (OSError, json.JSONDecodeError, ValueError) as e:
+        logging.error(f"Failed to prepare batch run: {e}")
+        return
+
+    client = BatchClient(args.base_url, api_key)
+    try:
+        results, failures = run_batch_judge(items, args.output, client, args.model, weights,
+                                            poll_s=args.poll, timeout=args.timeout)
+    except (requests.RequestException, TimeoutError) as e:
+        logging.error(f"❌ Batch judging failed: {e}")
+        return
+
+    save_outputs(results, failures, args.output)
+    if results:
+        print_agent_leaderboard(LeaderboardAggregator().add_all(results), args.dim, args.top)
+    else:
+        logging.warning("No results to display on leaderboard.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,25 @@
 import json
 import argparse
 import logging
+import math
 import time
 import os
+import shutil
+import tempfile
+from array import array
 from pathlib import Path
-from evaluation.evaluate_with_llm import evaluate_with_llm
+from typing import Iterable
+import numpy as np
+from evaluation.evaluate_with_llm import evaluate_with_llm, judge_stats
+from evaluation.result import DIMENSIONS, SCORE_FIELDS, EvalResult, apply_weights
+from evaluation.report_aggregates import aggregate_columns, domain_of, save_sidecar
+from evaluation.report_reader import ReportReader
+from evaluation.score_matrix import save_score_matrix
+from evaluation.hedging import FALLBACK_MODELS, Hedger
+from evaluation.live_tail import open_live_file
+from evaluation.aggregation import LeaderboardAggregator, print_agent_leaderboard
+from evaluation.cache import DiskCache
+from evaluation.utils.add_references import iter_records
 
 def evaluate_traditional(prompt: str, response: str) -> dict:
     scores = {
@@ -18,95 +33,334 @@ def evaluate_traditional(prompt: str, response: str) -> dict:
     explanations = {dim: f"Score based on heuristic for {dim}" for dim in scores}
     return {"scores": scores, "explanations": explanations}
 
+def score_item(item: dict, weights: dict, use_llm: bool = False,
+               model: str = "llama-3.3-70b-versatile", hedger: Hedger = None,
+               hedge_model: str = None, hedge_key: str = None,
+               heuristics: bool = False, previous: EvalResult = None, cache=None) -> EvalResult:
+    agent_id = item.get("agent_id", "<unknown>")
+    prompt = item.get("prompt", "")
+    response = item.get("response", "")
+
+    if heuristics and not use_llm:
+        from evaluation.evaluator import evaluate_agent_response
+        logging.info(f"🧮 Scoring with heuristic evaluator: {agent_id}")
+        result = evaluate_agent_response(agent_id, prompt, response, previous=previous)
+        result.prompt, result.response = prompt, response
+        if weights:
+            apply_weights(result, weights)
+        return result
+
+    if use_llm:
+        logging.info(f"🔍 Scoring with Groq ({model}): {agent_id}")
+        if hedger:
+            eval_result = hedger.call(
+                lambda: evaluate_with_llm(prompt, response, model=model, cache=cache),
+                lambda: evaluate_with_llm(prompt, response, model=hedge_model or model, api_key=hedge_key, cache=cache)
+            )
+        else:
+            eval_result = evaluate_with_llm(prompt, response, model=model, cache=cache)
+    else:
+        logging.info(f"🧮 Scoring with traditional evaluator: {agent_id}")
+        eval_result = evaluate_traditional(prompt, response)
+
+    result = EvalResult.from_scores(
+        agent_id,
+        eval_result["scores"],
+        eval_result["explanations"],
+        prompt=prompt,
+        response=response
+    )
+
+    if weights:
+        apply_weights(result, weights)
+
+    return result
+
+# Rows buffered before spilling per-item columns to disk, and read back at a time
+SPILL_ROWS = 1 << 16
+
+
+class ReportWriter:
+    """
+    Streams results into a report as they arrive (same bytes as
+    json.dump(..., indent=2)). Each result's scores, domain and agent are
+    spilled to raw column files next to the report, so memory grows with
+    the number of agents and domains only; on close the sidecar and score
+    matrix are built from those columns. The report is written aside and
+    renamed into place, so readers that memory-map the old report never
+    see it truncated.
+    """
+
+    def __init__(self, output_path: Path):
+        self.output_path = Path(output_path)
+        self.count = 0
+        self._tmp_path = self.output_path.with_name(self.output_path.name + ".tmp")
+        self._spill_dir = Path(tempfile.mkdtemp(prefix=f".{self.output_path.name}.", dir=self.output_path.parent))
+        self._file = self._tmp_path.open("w", encoding="utf-8")
+        self._file.write("[")
+        self._columns = {name: (open(self._spill_dir / name, "wb"), array(code))
+                         for name, code in (("scores", "d"), ("domains", "q"), ("agents", "q"))}
+        self._domains, self._agents, self._first_rows = {}, {}, {}
+
+    def add(self, result: EvalResult) -> None:
+        self._file.write(("," if self.count else "") + "\n  " + json.dumps(result.to_dict(), indent=2).replace("\n", "\n  "))
+        agent_id = str(result.agent_id)
+        self._first_rows.setdefault(agent_id, self.count)
+        self._spill("scores", result.score_vector(SCORE_FIELDS, math.nan))
+        self._spill("domains", [self._domains.setdefault(domain_of(result), len(self._domains))])
+        self._spill("agents", [self._agents.setdefault(agent_id, len(self._agents))])
+        self.count += 1
+
+    def _spill(self, name: str, values: list, flush: bool = False) -> None:
+        f, buffer = self._columns[name]
+        buffer.extend(values)
+        if flush or len(buffer) >= SPILL_ROWS:
+            buffer.tofile(f)
+            del buffer[:]
+
+    def _column(self, name: str, dtype, width: int = None) -> np.ndarray:
+        shape = (self.count, width) if width else (self.count,)
+        if not self.count:
+            return np.zeros(shape, dtype=dtype)  # a 0-byte file cannot be memory-mapped
+        return np.memmap(self._spill_dir / name, dtype=dtype, mode="r", shape=shape)
+
+    def close(self, aggregates: bool = True) -> None:
+        try:
+            self._file.write("\n]" if self.count else "]")
+            self._file.close()
+            for name, (f, _) in self._columns.items():
+                self._spill(name, [], flush=True)
+                f.close()
+            os.replace(self._tmp_path, self.output_path)
+            if aggregates:
+                self._write_aggregates()
+        finally:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+    def _write_aggregates(self) -> None:
+        scores = self._column("scores", np.float64, len(SCORE_FIELDS))
+        save_sidecar(self.output_path, aggregate_columns(scores, self._column("domains", np.int64),
+                                                         list(self._domains), self._first_rows))
+
+        # Missing scores count as 0.0 in the score matrix, as in the weighted `final`;
+        # both of its arrays are filled a block at a time and streamed into the .npz
+        agents = self._column("agents", np.int64)
+        names = np.array(list(self._agents))
+        matrix = np.lib.format.open_memmap(self._spill_dir / "matrix.npy", mode="w+", dtype=np.float64,
+                                           shape=(self.count, len(DIMENSIONS)))
+        agent_ids = np.lib.format.open_memmap(self._spill_dir / "agent_ids.npy", mode="w+", dtype=names.dtype,
+                                              shape=(self.count,))
+        for start in range(0, self.count, SPILL_ROWS):
+            block = slice(start, start + SPILL_ROWS)
+            matrix[block] = np.nan_to_num(scores[block, :len(DIMENSIONS)], nan=0.0)
+            agent_ids[block] = names[agents[block]]
+        save_score_matrix(self.output_path, matrix, agent_ids)
+
+    def abort(self) -> None:
+        self._file.close()
+        for f, _ in self._columns.values():
+            f.close()
+        self._tmp_path.unlink(missing_ok=True)
+        shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+
+def write_report(results: Iterable[EvalResult], output_path: Path) -> None:
+    writer = ReportWriter(output_path)
+    for r in results:
+        writer.add(r)
+    writer.close(aggregates=False)
+
+def write_failures(failures: list[dict], output_path: Path) -> None:
+    """
+    <stem>.failed.json listing items that could not be scored (removed when there are none).
+    """
+    failed_path = output_path.with_name(output_path.stem + ".failed.json")
+    if failures:
+        with failed_path.open("w", encoding="utf-8") as f:
+            json.dump(failures, f, indent=2)
+        logging.warning(f"⚠️ {len(failures)} items could not be scored; listed in '{failed_path}'.")
+    else:
+        failed_path.unlink(missing_ok=True)  # left over from an earlier run of this output
+
+def save_outputs(results: Iterable[EvalResult], failures: list[dict], output_path: Path) -> int:
+    """
+    Streams the report with its sidecar and score matrix, then writes
+    <stem>.failed.json. `failures` is read after `results` is exhausted,
+    so a generator may still append to it. Returns the number of results.
+    """
+    writer = None
+    try:
+        writer = ReportWriter(output_path)
+        for r in results:
+            writer.add(r)
+        writer.close()
+        logging.info(f"Saved evaluation report to '{output_path}'.")
+    except Exception as e:
+        if writer is not None:
+            writer.abort()
+        logging.error(f"Failed to write report to '{output_path}': {e}")
+    write_failures(failures, output_path)
+    return writer.count if writer is not None else 0
+
 def run_batch_evaluation(
     input_path: Path,
     output_path: Path,
     leaderboard_dim: str,
     weights: dict,
     use_llm: bool = False,
-    model: str = "llama-3.3-70b-versatile"
-) -> list[dict]:
+    model: str = "llama-3.3-70b-versatile",
+    live: bool = True,
+    hedger: Hedger = None,
+    hedge_model: str = None,
+    hedge_key: str = None,
+    heuristics: bool = False,
+    reuse_path: Path = None,
+    top_k: int = 20,
+    cache=None
+) -> LeaderboardAggregator:
+    """
+    Scores input items as they are read, streaming results to the report
+    (and the live file), and prints the agent leaderboard. Per-item
+    columns for the sidecar and score matrix are spilled to disk, so
+    memory grows with the number of agents, not of items; returns the
+    aggregator.
+    """
+    agg = LeaderboardAggregator()
+    if not input_path.exists():
+        logging.error(f"Failed to load input file '{input_path}': file not found")
+        return agg
+
+    # Stored results whose up-to-date dimensions can be reused
+    previous = {}
+    if heuristics and reuse_path and reuse_path.exists():
+        reader = None
+        try:
+            # Indexed and memory-mapped; each agent's record is decoded only when its item comes up
+            reader = ReportReader(reuse_path)
+            from evaluation.scorer_versions import scorer_versions, stale_dimensions
+            versions = scorer_versions()
+            stale = set().union(*(stale_dimensions(v, versions) for v in reader.field("versions")))
+            logging.info(
+                f"Reusing {len(reader)} results from '{reuse_path}'; "
+                f"re-scoring {', '.join(sorted(stale)) or 'no dimensions'} where stored versions differ."
+            )
+            previous = reader
+        except (ValueError, OSError) as e:
+            if reader is not None:
+                reader.close()
+            logging.warning(f"Could not read '{reuse_path}' for reuse, scoring from scratch: {e}")
 
     try:
-        with input_path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logging.error(f"Failed to load input file '{input_path}': {e}")
-        return []
+        report = ReportWriter(output_path)
+    except OSError as e:
+        if isinstance(previous, ReportReader):
+            previous.close()
+        logging.error(f"Failed to write report to '{output_path}': {e}")
+        return agg
+    # Incremental JSONL output, tailed by the dashboard's live mode
+    live_file = open_live_file(output_path) if live else None
 
-    results = []
-    for item in data:
-        agent_id = item.get("agent_id", "<unknown>")
-        prompt = item.get("prompt", "")
-        response = item.get("response", "")
+    failures = []
+    items = iter_records(input_path)
+    try:
+        while True:
+            try:
+                item = next(items)
+            except StopIteration:
+                break
+            except (OSError, json.JSONDecodeError) as e:
+                # Unreadable input: keep the previous report
+                report.abort()
+                if hedger:
+                    hedger.shutdown()
+                logging.error(f"Failed to load input file '{input_path}': {e}")
+                return LeaderboardAggregator()
+            try:
+                result = score_item(item, weights, use_llm=use_llm, model=model,
+                                    hedger=hedger, hedge_model=hedge_model, hedge_key=hedge_key,
+                                    heuristics=heuristics, previous=previous.get(item.get("agent_id")), cache=cache)
+            except Exception as e:
+                logging.warning(f"⚠️ Error evaluating '{item.get('agent_id', '<unknown>')}': {e}")
+                failures.append({"agent_id": item.get("agent_id", "<unknown>"), "error": str(e)})
+                continue
 
-        try:
-            if use_llm:
-                logging.info(f"🔍 Scoring with Groq ({model}): {agent_id}")
-                eval_result = evaluate_with_llm(prompt, response, model=model)
-            else:
-                logging.info(f"🧮 Scoring with traditional evaluator: {agent_id}")
-                eval_result = evaluate_traditional(prompt, response)
-
-            eval_result["agent_id"] = agent_id
-
-            if weights:
-                total = 0.0
-                for dim, w in weights.items():
-                    score = eval_result["scores"].get(dim, 0.0)
-                    total += score * w
-                eval_result["scores"]["final"] = round(total, 2)
-
-            results.append({
-                "agent_id": agent_id,
-                "prompt": prompt,
-                "response": response,
-                "scores": eval_result["scores"],
-                "explanations": eval_result["explanations"]
-            })
+            report.add(result)
+            agg.add(result)
+            if live_file:
+                live_file.write(json.dumps({**result.to_dict(), "scored_at": time.time()}) + "\n")
+                live_file.flush()
 
-        except Exception as e:
-            logging.warning(f"⚠️ Error evaluating '{agent_id}': {e}")
-            continue
+            time.sleep(0.5)
+    except BaseException:
+        report.abort()
+        raise
+    finally:
+        if live_file:
+            live_file.close()
+        if isinstance(previous, ReportReader):
+            previous.close()
 
-        time.sleep(0.5)
+    if hedger:
+        h = hedger.report()
+        fmt = lambda v: f"{v:.2f}s" if v is not None else "n/a"
+        logging.info(
+            f"Hedged {h['hedges']}/{h['calls']} calls ({h['hedge_rate']:.1%}), backup won {h['backup_wins']}; "
+            f"p50 {fmt(h['p50_observed'])} vs {fmt(h['p50_primary'])} unhedged, "
+            f"p99 {fmt(h['p99_observed'])} vs {fmt(h['p99_primary'])} unhedged"
+            + (f" ({h['primary_unfinished']} primaries still running, counted at their latency so far)"
+               if h["primary_unfinished"] else "")
+        )
+        hedger.shutdown()
 
+    if use_llm:
+        stats = judge_stats()
+        logging.info(
+            f"Judge calls: {stats.get('calls', 0)}, parse failures: {stats.get('parse_failures', 0)}, "
+            f"repaired: {stats.get('repaired', 0)}, dropped: {stats.get('dropped', 0)}"
+        )
     try:
-        with output_path.open("w", encoding="utf-8") as f:
-            json.dump(results, f, indent=2)
+        report.close()
         logging.info(f"Saved evaluation report to '{output_path}'.")
     except Exception as e:
         logging.error(f"Failed to write report to '{output_path}': {e}")
+    write_failures(failures, output_path)
 
-    if not results:
+    if not len(agg):
         logging.warning("No results to display on leaderboard.")
-        return results
-
-    default_dim = "final" if "final" in results[0]["scores"] else "instruction_following"
-    rank_dim = leaderboard_dim or default_dim
-    sorted_results = sorted(
-        results,
-        key=lambda r: r["scores"].get(rank_dim, 0.0),
-        reverse=True
-    )
+        return agg
 
-    print(f"\nLeaderboard – sorted by '{rank_dim}'")
-    for idx, r in enumerate(sorted_results, start=1):
-        s = r["scores"]
-        line = (
-            f"{idx}. {r['agent_id']} – "
-            f"IF: {s.get('instruction_following', 0.0)} pts; "
-            f"CA: {s.get('coherence_accuracy', s.get('coherence_&_accuracy', 0.0))} pts; "
-            f"HD: {s.get('hallucination_detection', 0.0)} pts; "
-            f"Style: {s.get('style_matching', 0.0)} pts; "
-            f"Length: {s.get('length_penalty', 0.0)} pts; "
-            f"Assumption: {s.get('assumption_control', 0.0)} pts"
-        )
-        if "final" in s:
-            line += f"; Final: {s['final']} pts"
-        print(line)
+    print_agent_leaderboard(agg, leaderboard_dim, top_k)
+    return agg
+
+def run_plan(args) -> None:
+    from evaluation.planner import build_workload, plan, print_plan
+
+    try:
+        with args.input.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logging.error(f"Failed to load input file '{args.input}': {e}")
+        return
 
-    return results
+    if args.plan_keys:
+        key_counts = [int(k) for k in args.plan_keys.split(",")]
+    else:
+        try:
+            with args.key_map.open("r", encoding="utf-8") as kf:
+                key_counts = sorted({1, len(json.load(kf))})
+        except Exception as e:
+            logging.warning(f"Could not read key map '{args.key_map}' ({e}); planning for one key.")
+            key_counts = [1]
+
+    cache = None
+    if args.cache:
+        # A cache file the run would create still dedups identical requests; a dry run does not create it
+        cache = DiskCache(args.cache) if args.cache.exists() else {}
+    workload = build_workload(data, args.model, cache)
+    limits = {k: v for k, v in (("rpm", args.plan_rpm), ("tpm", args.plan_tpm)) if v}
+    rows = plan(workload, args.model, key_counts, [int(c) for c in args.plan_concurrency.split(",")],
+                repair_rate=args.plan_repair_rate, limits=limits)
+    print_plan(workload, rows, args.model)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -120,14 +374,46 @@ def main():
                         help="Dimension to sort leaderboard by.")
     parser.add_argument("--weights", "-w", type=Path, default=None,
                         help="Optional JSON file with weights per dimension.")
+    parser.add_argument("--top", "-k", type=int, default=20,
+                        help="Agents to show on the leaderboard.")
     parser.add_argument("--use_llm", action="store_true",
                         help="Use Groq-based LLM scoring.")
+    parser.add_argument("--heuristics", action="store_true",
+                        help="Use the full heuristic evaluator (embeddings, LanguageTool, cue lists).")
+    parser.add_argument("--reuse", type=Path, default=None,
+                        help="Report to reuse up-to-date heuristic dimensions from (default: --output if it exists).")
+    parser.add_argument("--full_rescore", action="store_true",
+                        help="Recompute every heuristic dimension, ignoring stored versions.")
     parser.add_argument("--model", "-m", type=str, default="llama-3.3-70b-versatile",
                         help="Groq model to use (e.g., llama-3.3-70b-versatile, llama-3.1-8b-instant)")
     parser.add_argument("--batch_id", type=int, default=None,
                         help="Batch ID (1–10) to select corresponding Groq API key.")
     parser.add_argument("--key_map", type=Path, default=Path("config/groq_keys.json"),
                         help="Path to JSON file mapping batch_id to Groq API key.")
+    parser.add_argument("--cache", type=Path, default=None,
+                        help="SQLite judge cache; identical prompt/response pairs are judged once.")
+    parser.add_argument("--plan", action="store_true",
+                        help="Don't score: estimate requests, tokens and wall time of an LLM run.")
+    parser.add_argument("--plan_keys", type=str, default=None,
+                        help="Comma-separated key counts to plan for (default: 1 and all keys in --key_map).")
+    parser.add_argument("--plan_concurrency", type=str, default="1,2,4",
+                        help="Comma-separated concurrent requests per key to plan for.")
+    parser.add_argument("--plan_rpm", type=int, default=None, help="Override requests/minute per key.")
+    parser.add_argument("--plan_tpm", type=int, default=None, help="Override tokens/minute per key.")
+    parser.add_argument("--plan_repair_rate", type=float, default=0.02,
+                        help="Expected fraction of judge replies needing a repair call.")
+    parser.add_argument("--no_live", action="store_true",
+                        help="Don't write the incremental <output>.live.jsonl file.")
+    parser.add_argument("--hedge", action="store_true",
+                        help="Send a backup judge request when a call exceeds the recent latency percentile.")
+    parser.add_argument("--hedge_model", type=str, default=None,
+                        help="Model for backup requests (default: the other of the 70b/8b pair).")
+    parser.add_argument("--hedge_batch_id", type=int, default=None,
+                        help="Key map entry to use for backup requests (default: same key).")
+    parser.add_argument("--hedge_percentile", type=float, default=0.9,
+                        help="Latency percentile after which a backup request is sent.")
+    parser.add_argument("--hedge_budget", type=float, default=0.1,
+                        help="Maximum fraction of calls that may be hedged.")
 
     args = parser.parse_args()
 
@@ -137,6 +423,10 @@ def main():
         datefmt="%H:%M:%S"
     )
 
+    if args.plan:
+        run_plan(args)
+        return
+
     if args.use_llm and args.batch_id:
         try:
             with args.key_map.open("r", encoding="utf-8") as kf:
@@ -150,6 +440,21 @@ def main():
             logging.error(f"Failed to set Groq API key: {e}")
             return
 
+    hedger, hedge_model, hedge_key = None, None, None
+    if args.use_llm and args.hedge:
+        hedge_model = args.hedge_model or FALLBACK_MODELS.get(args.model, args.model)
+        if args.hedge_batch_id is not None:
+            try:
+                with args.key_map.open("r", encoding="utf-8") as kf:
+                    hedge_key = json.load(kf).get(str(args.hedge_batch_id))
+                if not hedge_key:
+                    raise ValueError(f"No API key found for batch {args.hedge_batch_id}")
+            except Exception as e:
+                logging.error(f"Failed to load hedge API key: {e}")
+                return
+        hedger = Hedger(percentile=args.hedge_percentile, budget=args.hedge_budget)
+        logging.info(f"Hedging judge calls to {hedge_model} (budget {args.hedge_budget:.0%})")
+
     weights = {}
     if args.weights:
         try:
@@ -161,16 +466,24 @@ def main():
             return
 
     start_time = time.time()
-    results = run_batch_evaluation(
+    agg = run_batch_evaluation(
         input_path=args.input,
         output_path=args.output,
         leaderboard_dim=args.dim,
         weights=weights,
         use_llm=args.use_llm,
-        model=args.model
+        model=args.model,
+        live=not args.no_live,
+        hedger=hedger,
+        hedge_model=hedge_model,
+        hedge_key=hedge_key,
+        heuristics=args.heuristics,
+        reuse_path=None if args.full_rescore else (args.reuse or args.output),
+        top_k=args.top,
+        cache=DiskCache(args.cache) if args.cache and args.use_llm else None
     )
     elapsed = time.time() - start_time
-    logging.info(f"⏱️ Processed {len(results)} items in {elapsed:.2f}s")
+    logging.info(f"⏱️ Processed {agg.items} items in {elapsed:.2f}s")
 
 if __name__ == "__main__":
     main()
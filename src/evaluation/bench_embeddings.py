@@ -0,0 +1,41 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+from evaluation.embeddings import get_encoder
+
+
+def bench(backend: str, texts: list, repeats: int = 3) -> float:
+    """
+    Best-of-`repeats` throughput in texts per second (after one warm-up run).
+    """
+    encoder = get_encoder(backend)
+    encoder.encode(texts[:8])
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        encoder.encode(texts)
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding throughput of the torch and ONNX backends.")
+    parser.add_argument("--input", "-i", type=Path, default=Path("src/evaluation/data/real_responses.json"),
+                        help="JSON file with prompt/response pairs to encode.")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with args.input.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    texts = [item["prompt"] for item in data] + [item["response"] for item in data]
+
+    rates = {backend: bench(backend, texts, args.repeats) for backend in ("torch", "onnx")}
+    for backend, rate in rates.items():
+        print(f"{backend:>5}: {rate:8.1f} texts/s")
+    print(f"Speedup (onnx vs torch): {rates['onnx'] / rates['torch']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,156 @@
-import language_tool_python
-from typing import Dict
+import importlib.metadata
+import os
+import re
+import threading
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence
 
-# Initialize the LanguageTool client (English)
-tool = language_tool_python.LanguageTool('en-US')
+import numpy as np
 
-def score_coherence_accuracy(response: str) -> Dict:
+from evaluation.cache import DiskCache, cache_key
+from evaluation.columnar import BatchScores, TextColumn, as_column
+
+LANGUAGE = "en-US"
+# Per-sentence error counts survive across runs; EVAL_GRAMMAR_CACHE="" disables the cache
+CACHE_PATH = os.getenv("EVAL_GRAMMAR_CACHE", "src/evaluation/data/.grammar_cache.sqlite")
+# Unchecked sentences are sent in chunks of about this many characters, several at a time
+CHUNK_CHARS = 4000
+WORKERS = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Rules that look beyond one sentence (repeated openings, paragraph layout). Sentences of
+# unrelated responses share a chunk, so these are off and a sentence counts as if checked alone
+CONTEXT_RULES = frozenset({
+    "ENGLISH_WORD_REPEAT_BEGINNING_RULE",
+    "PARAGRAPH_REPEAT_BEGINNING_RULE",
+    "STYLE_REPEATED_WORD_RULE",
+    "EMPTY_LINE",
+    "WHITESPACE_PARAGRAPH",
+    "PUNCTUATION_PARAGRAPH_END",
+    "SENTENCE_WHITESPACE",
+    "TOO_LONG_PARAGRAPH",
+})
+
+# LanguageTool client (English), started on first use
+tool = None
+_tool_lock = threading.Lock()
+_cache = None
+
+def get_tool():
+    global tool
+    if tool is None:
+        with _tool_lock:  # each instance starts its own LanguageTool server
+            if tool is None:
+                import language_tool_python
+                checker = language_tool_python.LanguageTool(LANGUAGE)
+                checker.disabled_rules.update(CONTEXT_RULES)
+                tool = checker
+    return tool
+
+def checker_version() -> str:
     """
-    Checks grammar and spelling errors in the response.
-    Returns a score 0–10 (higher is better) and an explanation.
+    LanguageTool client release (which pins the server it downloads) and
+    rule settings; part of every cached count, so changing either re-checks.
     """
-    matches = tool.check(response)
-    error_count = len(matches)
-    word_count = max(len(response.split()), 1)
+    try:
+        version = importlib.metadata.version("language_tool_python")
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    return f"{version};disabled={','.join(sorted(CONTEXT_RULES))}"
+
+def get_cache():
+    global _cache
+    if _cache is None and CACHE_PATH:
+        _cache = DiskCache(CACHE_PATH)
+    return _cache
+
+def split_sentences(text: str) -> List[str]:
+    return [s for s in (part.strip() for part in _SENTENCE_END.split(text)) if s]
+
+def _check_chunk(sentences: List[str]) -> List[int]:
+    # One LanguageTool call for many sentences; matches are attributed by offset
+    starts, offset = [], 0
+    for s in sentences:
+        starts.append(offset)
+        offset += len(s) + 2
+    counts = [0] * len(sentences)
+    for match in get_tool().check("\n\n".join(sentences)):
+        i = bisect_right(starts, match.offset) - 1
+        # Context rules, and matches running into the next sentence, would not fire on the sentence alone
+        if match.ruleId in CONTEXT_RULES or match.offset + match.errorLength > starts[i] + len(sentences[i]):
+            continue
+        counts[i] += 1
+    return counts
+
+def _chunks(sentences: List[str]) -> List[List[str]]:
+    chunks, current, size = [], [], 0
+    for s in sentences:
+        if current and size + len(s) > CHUNK_CHARS:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(s)
+        size += len(s) + 2
+    if current:
+        chunks.append(current)
+    return chunks
 
+def sentence_error_counts(sentences: Sequence[str]) -> Dict[str, int]:
+    """
+    Grammar/spelling issue count for each distinct sentence. Cached
+    sentences are not re-checked; the rest go to LanguageTool in
+    parallel chunks and are added to the cache.
+    """
+    unique = list(dict.fromkeys(sentences))
+    cache = get_cache()
+    version = checker_version()
+    keys = {s: cache_key("languagetool", version, LANGUAGE, s) for s in unique}
+    found = cache.get_many(keys.values()) if cache is not None else {}
+    counts = {s: found[keys[s]] for s in unique if keys[s] in found}
+
+    misses = [s for s in unique if s not in counts]
+    if misses:
+        chunks = _chunks(misses)
+        get_tool()  # started once here, not by each worker
+        with ThreadPoolExecutor(max_workers=min(WORKERS, len(chunks))) as pool:
+            for chunk, chunk_counts in zip(chunks, pool.map(_check_chunk, chunks)):
+                counts.update(zip(chunk, chunk_counts))
+        if cache is not None:
+            cache.set_many((keys[s], counts[s]) for s in misses)
+    return counts
+
+def _score(error_count: int, word_count: int) -> float:
     # Scale errors to a 0–10 score: fewer errors → higher score
     deduction = (error_count / word_count) * 10
     raw_score = max(0.0, 10.0 - deduction)
-    score = round(raw_score, 2)
+    return round(raw_score, 2)
 
-    explanation = (
+def _explanation(error_count: int, word_count: int) -> str:
+    return (
         f"{error_count} issue{'s' if error_count!=1 else ''} "
         f"detected in {word_count} words"
     )
-    return {"score": score, "explanation": explanation}
+
+def score_coherence_accuracy(response: str) -> Dict:
+    """
+    Checks grammar and spelling errors in the response, sentence by sentence.
+    Returns a score 0–10 (higher is better) and an explanation.
+    """
+    sentences = split_sentences(response)
+    counts = sentence_error_counts(sentences)
+    error_count = sum(counts[s] for s in sentences)
+    word_count = max(len(response.split()), 1)
+    return {"score": _score(error_count, word_count), "explanation": _explanation(error_count, word_count)}
+
+def score_coherence_accuracy_batch(responses: Sequence[str], column: TextColumn = None) -> BatchScores:
+    """
+    score_coherence_accuracy over a whole column of responses; sentences
+    shared between responses are checked once.
+    """
+    split = [split_sentences(r) for r in responses]
+    counts = sentence_error_counts([s for sentences in split for s in sentences])
+    errors = np.array([sum(counts[s] for s in sentences) for sentences in split], dtype=np.int64)
+    words = np.maximum(as_column(responses, column).word_counts, 1)
+    scores = np.array([_score(e, w) for e, w in zip(errors.tolist(), words.tolist())])
+    return BatchScores(scores, lambda i: _explanation(errors[i], words[i]))
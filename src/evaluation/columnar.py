@@ -0,0 +1,148 @@
+import re
+from functools import cached_property
+from typing import Callable, Dict, Iterator, Pattern, Sequence
+
+import numpy as np
+
+# Row separator in the joined text; a non-word, non-space character, so
+# `\b` and multi-word cues behave at row edges exactly as at string edges
+SEP = "\x00"
+
+# Lookup table of every code point str.split() treats as whitespace (chr(c).isspace());
+# the row separator counts as a word boundary too
+_SPACE_TABLE = np.zeros(0x3002, dtype=bool)
+_SPACE_TABLE[[0, *range(0x09, 0x0e), *range(0x1c, 0x21), 0x85, 0xa0, 0x1680, *range(0x2000, 0x200b),
+              0x2028, 0x2029, 0x202f, 0x205f, 0x3000]] = True
+
+# r"\bsome words\b" with no other regex syntax inside
+_WORD_CUE = re.compile(r"\\b([\w ]+)\\b")
+
+
+def _codes(text: str) -> np.ndarray:
+    # One uint32 per code point, so array offsets equal str offsets
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+
+class TextColumn:
+    """
+    A column of texts joined into one string, so word counts and cue
+    scans run once over the whole batch instead of once per text.
+    Regex matches are mapped back to rows with a binary search over the
+    row start offsets.
+    """
+
+    def __init__(self, texts: Sequence[str]):
+        self.size = len(texts)
+        joined = SEP.join(texts)
+        if joined.count(SEP) != max(self.size - 1, 0):
+            # A stray NUL would shift rows; \x01 behaves the same for words and cues
+            joined = SEP.join(t.replace(SEP, "\x01") for t in texts)
+        self.text = joined
+
+    @staticmethod
+    def _row_starts(text: str) -> np.ndarray:
+        return np.concatenate(([0], np.flatnonzero(_codes(text) == 0) + 1))
+
+    @cached_property
+    def lowered(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def _lowered_starts(self) -> np.ndarray:
+        # Lowercasing can change string length, so rows are located in the lowered text itself
+        return self._row_starts(self.lowered)
+
+    @cached_property
+    def word_counts(self) -> np.ndarray:
+        """
+        len(text.split()) for every row.
+        """
+        if not self.size:
+            return np.zeros(0, dtype=np.int64)
+        codes = _codes(self.text)
+        space = _SPACE_TABLE[np.minimum(codes, len(_SPACE_TABLE) - 1)]
+        word_start = ~space
+        word_start[1:] &= space[:-1]
+        seen = np.concatenate(([0], np.cumsum(word_start)))
+        starts = np.concatenate(([0], np.flatnonzero(codes == 0) + 1))
+        ends = np.append(starts[1:] - 1, len(codes))
+        return seen[ends] - seen[starts]
+
+    def rows_of(self, offsets: Sequence[int]) -> np.ndarray:
+        return np.searchsorted(self._lowered_starts, offsets, side="right") - 1
+
+    def row_text(self, row: int) -> str:
+        """
+        The lowercased text of one row.
+        """
+        starts = self._lowered_starts
+        end = starts[row + 1] - 1 if row + 1 < len(starts) else len(self.lowered)
+        return self.lowered[starts[row]:end]
+
+    def cue_hits(self, patterns: Sequence[Pattern]) -> np.ndarray:
+        """
+        Per row, how many of `patterns` occur at least once in the
+        lowercased text (the same count as summing bool(re.search(...))).
+        A match that runs across the row separator (e.g. from `.` or a
+        negated class) credits no row; the rows it spans are searched
+        on their own instead.
+        """
+        present = np.zeros((len(patterns), self.size), dtype=bool)
+        for i, pattern in enumerate(patterns):
+            offsets, spanning = [], []
+            for m in pattern.finditer(self.lowered):
+                if SEP in m.group():
+                    spanning.append((m.start(), m.end()))
+                else:
+                    offsets.append(m.start())
+            if offsets:
+                present[i, self.rows_of(offsets)] = True
+            for start, end in spanning:
+                first, last = self.rows_of([start, end]).tolist()
+                for row in range(first, last + 1):
+                    if not present[i, row]:
+                        present[i, row] = pattern.search(self.row_text(row)) is not None
+        return present.sum(axis=0)
+
+
+def compile_cues(patterns: Sequence[str]) -> list:
+    """
+    Compiles cue regexes for scanning a long joined text. A leading \\b stops
+    the regex engine from using its fast literal search, so r"\\bword\\b" is
+    rewritten to the equivalent r"word(?<=\\bword)\\b".
+    """
+    compiled = []
+    for p in patterns:
+        m = _WORD_CUE.fullmatch(p)
+        compiled.append(re.compile(rf"{m.group(1)}(?<=\b{m.group(1)})\b" if m else p))
+    return compiled
+
+
+class BatchScores:
+    """
+    Scores for a batch as a NumPy array. Explanations are only formatted
+    when asked for; indexing yields the same dict the single-item scorer
+    returns.
+    """
+
+    __slots__ = ("scores", "_explain")
+
+    def __init__(self, scores: np.ndarray, explain: Callable[[int], str]):
+        self.scores = scores
+        self._explain = explain
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def explanation(self, i: int) -> str:
+        return self._explain(i)
+
+    def __getitem__(self, i: int) -> Dict:
+        return {"score": float(self.scores[i]), "explanation": self._explain(i)}
+
+    def __iter__(self) -> Iterator[Dict]:
+        return (self[i] for i in range(len(self)))
+
+
+def as_column(responses: Sequence[str], column: TextColumn = None) -> TextColumn:
+    return column if column is not None else TextColumn(responses)
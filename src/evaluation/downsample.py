@@ -0,0 +1,88 @@
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Largest payloads the dashboard sends to the browser per chart
+MAX_LINE_POINTS = 1000
+MAX_BARS = 200
+MAX_OPTIONS = 1000
+HISTOGRAM_BINS = 40
+
+
+def lttb(y: np.ndarray, threshold: int = MAX_LINE_POINTS, x: np.ndarray = None) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that keep
+    the visual shape of the series (peaks and dips survive, unlike striding).
+    Returns all indices when the series is already short enough.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    # Bucket edges for the n - 2 interior points; first and last are always kept
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        nlo, nhi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_series(series: pd.Series, threshold: int = MAX_LINE_POINTS) -> pd.Series:
+    """
+    At most `threshold` points of `series` (NaNs dropped), chosen by LTTB.
+    """
+    series = series.dropna()
+    if len(series) <= threshold:
+        return series
+    return series.iloc[lttb(series.to_numpy(dtype=float), threshold)]
+
+
+def histogram(frame: pd.DataFrame, columns: Sequence[str], bins: int = HISTOGRAM_BINS,
+              value_range=(0.0, 10.0)) -> pd.DataFrame:
+    """
+    Counts per score bin (rows) and column, ready for st.bar_chart.
+    """
+    edges = np.linspace(value_range[0], value_range[1], bins + 1)
+    counts = {}
+    for col in columns:
+        values = frame[col].to_numpy(dtype=float)
+        counts[col] = np.histogram(values[~np.isnan(values)], bins=edges)[0]
+    index = pd.Index([f"{lo:.2f}–{hi:.2f}" for lo, hi in zip(edges[:-1], edges[1:])], name="Score")
+    return pd.DataFrame(counts, index=index)
+
+
+def box_stats(frame: pd.DataFrame, columns: Sequence[str]) -> Dict[str, Dict[str, float]]:
+    """
+    Quartiles and Tukey whiskers (furthest data within 1.5 × IQR) per
+    column, so a box plot can be drawn without sending the raw values.
+    """
+    stats = {}
+    for col in columns:
+        values = frame[col].to_numpy(dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            continue
+        q1, median, q3 = np.percentile(values, [25, 50, 75])
+        iqr = q3 - q1
+        inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+        stats[col] = {
+            "q1": float(q1),
+            "median": float(median),
+            "q3": float(q3),
+            "lowerfence": float(inside.min()),
+            "upperfence": float(inside.max()),
+            "mean": float(values.mean()),
+            "count": int(len(values))
+        }
+    return stats
@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Sequence
+
+import numpy as np
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+MAX_SEQ_LENGTH = 256  # same truncation sentence-transformers applies to MiniLM
+
+CONFIG_PATH = Path(os.getenv("EVAL_EMBEDDING_CONFIG", "config/embedding.json"))
+DEFAULT_CONFIG = {
+    "backend": "torch",  # "torch" or "onnx"
+    "onnx_path": "models/all-MiniLM-L6-v2-int8.onnx",
+    "threads": 0,        # 0 → one intra-op thread per CPU core
+    "batch_size": 64
+}
+
+
+def load_config(path: Path = CONFIG_PATH) -> Dict:
+    """
+    Reads the embedding backend config, falling back to defaults.
+    EVAL_EMBEDDING_BACKEND overrides the configured backend.
+    """
+    config = dict(DEFAULT_CONFIG)
+    try:
+        with Path(path).open("r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    except FileNotFoundError:
+        pass
+    config["backend"] = os.getenv("EVAL_EMBEDDING_BACKEND", config["backend"])
+    return config
+
+
+class TorchEncoder:
+    """
+    Reference backend: the sentence-transformers model on PyTorch.
+    """
+
+    def __init__(self, batch_size: int = 64, threads: int = 0):
+        from sentence_transformers import SentenceTransformer
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(MODEL_NAME, device="cpu")
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return self.model.encode(
+            list(texts), batch_size=self.batch_size,
+            normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+
+
+class OnnxEncoder:
+    """
+    int8-quantized ONNX export of the same model (see export_onnx.py),
+    run with onnxruntime on CPU. Mean pooling + L2 norm match the
+    sentence-transformers pipeline.
+    """
+
+    def __init__(self, onnx_path: str, batch_size: int = 64, threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        onnx_path = Path(onnx_path)
+        if not onnx_path.exists():
+            raise FileNotFoundError(
+                f"ONNX model '{onnx_path}' not found; run `python -m evaluation.export_onnx` first."
+            )
+
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = threads or os.cpu_count() or 1
+        opts.inter_op_num_threads = 1
+        opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(onnx_path), opts, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(onnx_path.parent / "tokenizer.json"))
+        self.tokenizer.enable_truncation(MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+        self.batch_size = batch_size
+        self._dim = None
+
+    def _encode_batch(self, texts: Sequence[str]) -> np.ndarray:
+        encoded = self.tokenizer.encode_batch(list(texts))
+        ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        feed = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feed["token_type_ids"] = np.zeros_like(ids)
+
+        hidden = self.session.run(None, feed)[0]
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        # Batch texts of similar length together to keep padding small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out = None
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            vecs = self._encode_batch([texts[i] for i in idx])
+            if out is None:
+                out = np.empty((len(texts), vecs.shape[1]), dtype=np.float32)
+            out[idx] = vecs
+        return out
+
+    @property
+    def dim(self) -> int:
+        # Hidden size from the graph's output shape, or from one encoded text if it is symbolic
+        if self._dim is None:
+            size = self.session.get_outputs()[0].shape[-1]
+            self._dim = size if isinstance(size, int) else self._encode_batch([""]).shape[1]
+        return self._dim
+
+
+_encoders = {}
+
+
+def get_encoder(backend: str = None):
+    """
+    Returns a cached encoder for the configured (or given) backend.
+    """
+    config = load_config()
+    backend = backend or config["backend"]
+    if backend not in _encoders:
+        if backend == "onnx":
+            _encoders[backend] = OnnxEncoder(config["onnx_path"], config["batch_size"], config["threads"])
+        elif backend == "torch":
+            _encoders[backend] = TorchEncoder(config["batch_size"], config["threads"])
+        else:
+            raise ValueError(f"Unknown embedding backend '{backend}'")
+        logging.info(f"Loaded {backend} embedding backend for {MODEL_NAME}")
+    return _encoders[backend]
+
+
+def encode(texts: Sequence[str]) -> np.ndarray:
+    """
+    L2-normalized embeddings, one row per text.
+    """
+    return get_encoder().encode(texts)
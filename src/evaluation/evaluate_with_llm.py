@@ -3,92 +3,254 @@ import os
 import json
 import logging
 import re
+import threading
 import time
+from collections import Counter
+from typing import Callable
 
-def evaluate_with_llm(prompt: str, response: str, model: str = "llama-3.1-8b-instant") -> dict:
-    scoring_prompt = """
-You are an evaluation engine. Score the following response across these dimensions (0–10 scale):
+from evaluation.cache import cache_key
+from evaluation.result import DIMENSIONS
 
-1. instruction_following
-2. coherence_accuracy
-3. hallucination_detection
-4. style_matching
-5. length_penalty
-6. assumption_control
+GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
 
-Also provide a brief explanation for each dimension.
-"""
+# Pooled connections, shared by every thread that talks to the judge
+_session = requests.Session()
 
-    scoring_prompt += f"\nPrompt: {prompt}\nResponse: {response}\nReturn a JSON object with 'scores' and 'explanations'."
 
-    groq_api_key = os.getenv("GROQ_API_KEY")
-    if not groq_api_key:
-        logging.error("❌ GROQ_API_KEY not set in environment.")
-        return {
-            "scores": {},
-            "explanations": {}
-        }
+def _retry_after(res: requests.Response) -> float:
+    try:
+        msg = res.json().get("error", {}).get("message", "")
+        return float(re.search(r"try again in ([\d.]+)s", msg).group(1))
+    except Exception:
+        return float(res.headers.get("retry-after", 1.0))
+
+
+def chat_completion(messages: list, model: str, temperature: float = 0.3,
+                    api_key: str = None, cache=None, max_retries: int = 3,
+                    timeout: float = 60.0, response_format: dict = None,
+                    max_tokens: int = None) -> str:
+    """
+    Sends one chat completion to Groq and returns the reply text.
+    Waits out 429 responses up to `max_retries` times; other HTTP errors raise.
+    When a `DiskCache` is given, identical requests are answered from it.
+    """
+    key = None
+    if cache is not None:
+        key = cache_key(model, str(temperature), json.dumps(messages, sort_keys=True),
+                        json.dumps(response_format, sort_keys=True), str(max_tokens))
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+
+    api_key = api_key or os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise RuntimeError("GROQ_API_KEY not set in environment.")
 
     headers = {
-        "Authorization": f"Bearer {groq_api_key}",
+        "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
     }
-
     payload = {
         "model": model,
-        "messages": [
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": scoring_prompt}
-        ],
-        "temperature": 0.3
+        "messages": messages,
+        "temperature": temperature
     }
-
+    if response_format:
+        payload["response_format"] = response_format
+    if max_tokens:
+        payload["max_tokens"] = max_tokens
     logging.debug(f"🔧 Payload:\n{json.dumps(payload, indent=2)}")
 
-    def parse_response_content(content: str) -> dict:
-        content = re.sub(r"^```json|```$", "", content).strip()
-        try:
-            first_json = re.search(r"\{.*\}", content, re.DOTALL).group()
-            parsed = json.loads(first_json)
-            return {
-                "scores": parsed.get("scores", {}),
-                "explanations": parsed.get("explanations", {})
-            }
-        except Exception as e:
-            logging.error(f"❌ Failed to parse JSON from Groq response: {e}")
-            logging.debug(f"📩 Raw output:\n{content}")
-            return {
-                "scores": {},
-                "explanations": {}
-            }
+    for attempt in range(max_retries + 1):
+        res = _session.post(GROQ_CHAT_URL, headers=headers, json=payload, timeout=timeout)
+        if res.status_code == 429 and attempt < max_retries:
+            wait_time = _retry_after(res)
+            logging.warning(f"⏳ Rate limit hit. Waiting {wait_time:.2f}s before retry...")
+            time.sleep(wait_time + 0.5)
+            continue
+        res.raise_for_status()
+        break
+
+    content = res.json()["choices"][0]["message"]["content"].strip()
+    if cache is not None:
+        cache.set(key, content)
+    return content
+
+
+# ── Judge output contract ─────────────────────────────────────
+JUDGE_RESPONSE_FORMAT = {"type": "json_object"}
+
+JUDGE_OUTPUT_EXAMPLE = json.dumps({
+    "scores": {dim: "<number 0-10>" for dim in DIMENSIONS},
+    "explanations": {dim: "<one sentence>" for dim in DIMENSIONS}
+}, indent=2)
+
+JUDGE_SYSTEM_PROMPT = f"""
+You are an evaluation engine. Score the response on a 0–10 scale (higher is better) for each dimension:
+{chr(10).join(f"{i}. {dim}" for i, dim in enumerate(DIMENSIONS, start=1))}
+
+Reply with only a JSON object of exactly this shape, using numbers for scores:
+{JUDGE_OUTPUT_EXAMPLE}
+""".strip()
+
+JUDGE_TEMPERATURE = 0.3
+REPAIR_MAX_TOKENS = 800
+
+
+class JudgeParseError(ValueError):
+    """
+    The judge's reply does not match the expected JSON shape.
+    """
+
+
+_stats_lock = threading.Lock()
+_stats = Counter()
+
+
+def _count(event: str) -> None:
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def judge_stats(reset: bool = False) -> dict:
+    """
+    Counts of judge outcomes: calls, parsed, parse_failures, repaired, dropped, cache_hits.
+    """
+    with _stats_lock:
+        snapshot = dict(_stats)
+        if reset:
+            _stats.clear()
+    return snapshot
 
+
+def parse_judge_output(content: str) -> dict:
+    """
+    Strictly validates a judge reply: one JSON object with a numeric 0–10
+    score and a string explanation for every dimension. Extra keys are
+    ignored. Raises JudgeParseError with the first problem found.
+    """
+    text = content.strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text)
     try:
-        res = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=payload)
-        res.raise_for_status()
-        output = res.json()["choices"][0]["message"]["content"].strip()
-        return parse_response_content(output)
+        parsed = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise JudgeParseError(f"not valid JSON ({e})") from None
+    if not isinstance(parsed, dict):
+        raise JudgeParseError("top level must be a JSON object")
 
-    except requests.exceptions.HTTPError as e:
-        if e.response is not None and e.response.status_code == 429:
+    raw_scores, raw_expl = parsed.get("scores"), parsed.get("explanations")
+    if not isinstance(raw_scores, dict) or not isinstance(raw_expl, dict):
+        raise JudgeParseError("'scores' and 'explanations' must both be objects")
+
+    scores, explanations = {}, {}
+    for dim in DIMENSIONS:
+        value = raw_scores.get(dim)
+        if isinstance(value, str):
             try:
-                error_data = e.response.json()
-                msg = error_data.get("error", {}).get("message", "")
-                wait_time = float(re.search(r"try again in ([\d.]+)s", msg).group(1))
-                logging.warning(f"⏳ Rate limit hit. Waiting {wait_time:.2f}s before retry...")
-                time.sleep(wait_time + 0.5)
-                return evaluate_with_llm(prompt, response, model=model)  # retry once
-            except Exception as parse_err:
-                logging.error(f"❌ Failed to parse wait time: {parse_err}")
+                value = float(value)
+            except ValueError:
+                pass
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or not 0 <= value <= 10:
+            raise JudgeParseError(f"scores.{dim} must be a number between 0 and 10, got {value!r}")
+        note = raw_expl.get(dim)
+        if not isinstance(note, str):
+            raise JudgeParseError(f"explanations.{dim} must be a string")
+        scores[dim] = value
+        explanations[dim] = note
+
+    return {"scores": scores, "explanations": explanations}
+
+
+def build_judge_messages(prompt: str, response: str) -> list:
+    return [
+        {"role": "system", "content": JUDGE_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Prompt: {prompt}\nResponse: {response}"}
+    ]
+
+
+def judge_cache_key(model: str, messages: list, temperature: float = JUDGE_TEMPERATURE,
+                    response_format: dict = JUDGE_RESPONSE_FORMAT) -> str:
+    """
+    Key under which the parsed result of a judge request is cached
+    (shared with the planner, so planned cache hits match real ones).
+    """
+    return cache_key("judge", model, str(temperature), json.dumps(messages, sort_keys=True),
+                     json.dumps(response_format, sort_keys=True))
+
+
+def judge_with_repair(send: Callable[..., str], prompt: str, response: str) -> dict:
+    """
+    Runs one judge call through `send(messages, repair=False)` and parses it.
+    On a parse failure, re-asks once with the validation error and the
+    invalid reply (send(..., repair=True) should use a small token budget).
+    Raises JudgeParseError if the repaired reply is still invalid.
+    """
+    messages = build_judge_messages(prompt, response)
+    _count("calls")
+    content = send(messages, repair=False)
+    try:
+        result = parse_judge_output(content)
+        _count("parsed")
+        return result
+    except JudgeParseError as e:
+        _count("parse_failures")
+        logging.warning(f"⚠️ Judge output invalid ({e}); asking for a repair")
+        error = e
+
+    repair_messages = messages + [
+        {"role": "assistant", "content": content},
+        {"role": "user", "content": f"That reply was invalid: {error}. "
+                                    "Reply with only the corrected JSON object."}
+    ]
+    _count("repair_calls")
+    content = send(repair_messages, repair=True)
+    try:
+        result = parse_judge_output(content)
+        _count("repaired")
+        return result
+    except JudgeParseError as e:
+        _count("dropped")
+        logging.debug(f"📩 Raw output:\n{content}")
+        raise JudgeParseError(f"judge output still invalid after repair: {e}") from None
+
+
+def evaluate_with_llm(prompt: str, response: str, model: str = "llama-3.1-8b-instant",
+                      api_key: str = None, cache=None) -> dict:
+    """
+    Scores one response with the Groq judge in JSON mode.
+    Raises (instead of returning empty scores) when no valid scores can be
+    obtained, so callers can record the failure. With a `DiskCache`,
+    identical prompt/response pairs are judged once: only results that
+    parsed (directly or after a repair) are cached.
+    """
+    key = None
+    if cache is not None:
+        key = judge_cache_key(model, build_judge_messages(prompt, response))
+        hit = cache.get(key)
+        if hit is not None:
+            _count("cache_hits")
+            return hit
+
+    if not (api_key or os.getenv("GROQ_API_KEY")):
+        raise RuntimeError("GROQ_API_KEY not set in environment.")
+
+    def send(messages: list, repair: bool = False) -> str:
+        return chat_completion(
+            messages, model=model,
+            temperature=0.0 if repair else JUDGE_TEMPERATURE,
+            api_key=api_key,
+            response_format=JUDGE_RESPONSE_FORMAT,
+            max_tokens=REPAIR_MAX_TOKENS if repair else None
+        )
+
+    try:
+        result = judge_with_repair(send, prompt, response)
+        if key is not None:
+            cache.set(key, result)
+        return result
+    except requests.exceptions.HTTPError as e:
         logging.error(f"❌ Groq scoring failed: {e}")
-        logging.error(f"📩 Response content: {e.response.text}")
-        return {
-            "scores": {},
-            "explanations": {}
-        }
-
-    except Exception as e:
-        logging.error(f"❌ Unexpected error: {e}")
-        return {
-            "scores": {},
-            "explanations": {}
-        }
+        if e.response is not None:
+            logging.error(f"📩 Response content: {e.response.text}")
+        raise
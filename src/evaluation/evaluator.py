@@ -1,36 +1,122 @@
-from evaluation.instruction_following import score_instruction_following
-from evaluation.coherence_accuracy import score_coherence_accuracy
-from evaluation.hallucination_detection import score_hallucination
-from evaluation.style_matching import score_style_matching
-from evaluation.length_penalty import score_length_penalty
-from evaluation.assumption_control import score_assumption_control
-
-
-
-def evaluate_agent_response(agent_id: str, prompt: str, response: str, reference: str = "", mode: str = "semantic") -> dict:
-    instr   = score_instruction_following(prompt, response)
-    coh     = score_coherence_accuracy(response)
-    halluc  = score_hallucination(response)
-    style   = score_style_matching(response)
-    length  = score_length_penalty(response)
-    assume  = score_assumption_control(response)
-
-    return {
-        "agent_id": agent_id,
-        "scores": {
-            "instruction_following": instr["score"],
-            "coherence_accuracy": coh["score"],
-            "hallucination_detection": halluc["score"],
-            "style_matching": style["score"],
-            "length_penalty": length["score"],
-            "assumption_control": assume["score"]
-        },
-        "explanations": {
-            "instruction_following": instr["explanation"],
-            "coherence_accuracy": coh["explanation"],
-            "hallucination_detection": halluc["explanation"],
-            "style_matching": style["explanation"],
-            "length_penalty": length["explanation"],
-            "assumption_control": assume["explanation"]
-        }
-    }
+from typing import Dict, List, Optional, Sequence
+
+from evaluation.instruction_following import score_instruction_following, score_instruction_following_batch
+from evaluation.coherence_accuracy import score_coherence_accuracy, score_coherence_accuracy_batch
+from evaluation.hallucination_detection import score_hallucination, score_hallucination_batch
+from evaluation.style_matching import score_style_matching, score_style_matching_batch
+from evaluation.length_penalty import score_length_penalty, score_length_penalty_batch
+from evaluation.assumption_control import score_assumption_control, score_assumption_control_batch
+from evaluation.columnar import TextColumn
+from evaluation.result import DIMENSIONS, EvalResult
+from evaluation.scorer_versions import scorer_versions, stale_dimensions
+
+# Response-only scorers; instruction_following also needs the prompt
+RESPONSE_SCORERS = {
+    "coherence_accuracy": score_coherence_accuracy,
+    "hallucination_detection": score_hallucination,
+    "style_matching": score_style_matching,
+    "length_penalty": score_length_penalty,
+    "assumption_control": score_assumption_control
+}
+
+# Columnar counterparts: word and cue counts for a whole batch in one scan
+BATCH_SCORERS = {
+    "hallucination_detection": score_hallucination_batch,
+    "style_matching": score_style_matching_batch,
+    "length_penalty": score_length_penalty_batch,
+    "assumption_control": score_assumption_control_batch
+}
+
+
+def _reusable(previous: Optional[EvalResult], prompt: str, response: str) -> Optional[EvalResult]:
+    """
+    A stored result may be reused only for the same prompt and response;
+    one stored without its response cannot be checked, so it is not reused.
+    """
+    if previous is None or previous.score_keys is None or previous.response is None:
+        return None
+    if previous.response != response or previous.prompt != prompt:
+        return None
+    return previous
+
+
+def _stale(previous: Optional[EvalResult], versions: Dict[str, str]) -> list:
+    if previous is None:
+        return list(DIMENSIONS)
+    outdated = stale_dimensions(previous.get("versions"), versions)
+    return [dim for dim in DIMENSIONS if dim in outdated or not previous.has_score(dim)]
+
+
+def _build_result(agent_id: str, computed: Dict[str, dict], previous: Optional[EvalResult], versions: Dict[str, str]) -> EvalResult:
+    scores, explanations = {}, {}
+    for dim in DIMENSIONS:
+        if dim in computed:
+            scores[dim] = computed[dim]["score"]
+            explanations[dim] = computed[dim]["explanation"]
+        else:
+            scores[dim] = previous.score(dim)
+            explanations[dim] = previous.explanation(dim)
+    return EvalResult.from_scores(agent_id, scores, explanations, extra={"versions": versions})
+
+
+def evaluate_agent_response(agent_id: str, prompt: str, response: str, reference: str = "",
+                            mode: str = "semantic", previous: EvalResult = None) -> EvalResult:
+    """
+    Scores every dimension, or with `previous` (a stored result for the same
+    item) only the dimensions whose scorer version changed since.
+    """
+    versions = scorer_versions()
+    previous = _reusable(previous, prompt, response)
+    stale = _stale(previous, versions)
+
+    computed = {}
+    for dim in stale:
+        if dim == "instruction_following":
+            computed[dim] = score_instruction_following(prompt, response)
+        else:
+            computed[dim] = RESPONSE_SCORERS[dim](response)
+    return _build_result(agent_id, computed, previous, versions)
+
+
+def evaluate_batch(items: Sequence[dict], previous: Dict[str, EvalResult] = None) -> List[EvalResult]:
+    """
+    Scores many {agent_id, prompt, response} items at once; the embedding
+    model sees the whole batch in a single encode call and word/cue counts
+    come from one scan over all responses. `previous` maps agent_id to
+    stored results whose up-to-date dimensions are reused.
+    """
+    if not items:
+        return []
+    previous = previous or {}
+    versions = scorer_versions()
+    prompts = [item.get("prompt", "") for item in items]
+    responses = [item.get("response", "") for item in items]
+    prior = [_reusable(previous.get(item.get("agent_id")), p, r) for item, p, r in zip(items, prompts, responses)]
+    stale = [_stale(prev, versions) for prev in prior]
+
+    computed = [{} for _ in items]
+    need_instr = [i for i, dims in enumerate(stale) if "instruction_following" in dims]
+    if need_instr:
+        instrs = score_instruction_following_batch([prompts[i] for i in need_instr], [responses[i] for i in need_instr])
+        for i, instr in zip(need_instr, instrs):
+            computed[i]["instruction_following"] = instr
+    rows = [i for i, dims in enumerate(stale) if any(dim in BATCH_SCORERS for dim in dims)]
+    if rows:
+        texts = [responses[i] for i in rows]
+        column = TextColumn(texts)
+        for dim, scorer in BATCH_SCORERS.items():
+            batch = scorer(texts, column)
+            for j, i in enumerate(rows):
+                if dim in stale[i]:
+                    computed[i][dim] = batch[j]
+    # Grammar checks are the slow part: only for rows that need them, unique sentences once
+    rows = [i for i, dims in enumerate(stale) if "coherence_accuracy" in dims]
+    if rows:
+        grammar = score_coherence_accuracy_batch([responses[i] for i in rows])
+        for j, i in enumerate(rows):
+            computed[i]["coherence_accuracy"] = grammar[j]
+
+    return [
+        _build_result(item.get("agent_id", "<unknown>"), c, prev, versions)
+        for item, c, prev in zip(items, computed, prior)
+    ]
@@ -0,0 +1,59 @@
+import argparse
+import logging
+from pathlib import Path
+
+from evaluation.embeddings import MODEL_NAME, load_config
+
+
+def export_onnx(output_path: Path, opset: int = 14) -> Path:
+    """
+    Exports all-MiniLM-L6-v2 to ONNX, quantizes its weights to int8 and
+    saves the fast tokenizer next to it. Returns the quantized model path.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fp32_path = output_path.with_name(output_path.stem + "-fp32.onnx")
+
+    st_model = SentenceTransformer(MODEL_NAME, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    dummy = tokenizer(["an example sentence"], return_tensors="pt")
+    inputs = ("input_ids", "attention_mask", "token_type_ids")
+    dynamic = {"batch": 0, "sequence": 1}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[name] for name in inputs),
+            str(fp32_path),
+            input_names=list(inputs),
+            output_names=["last_hidden_state"],
+            dynamic_axes={**{name: dynamic for name in inputs}, "last_hidden_state": dynamic},
+            opset_version=opset,
+        )
+    logging.info(f"Exported fp32 model to '{fp32_path}'")
+
+    quantize_dynamic(str(fp32_path), str(output_path), weight_type=QuantType.QInt8)
+    tokenizer.backend_tokenizer.save(str(output_path.parent / "tokenizer.json"))
+    logging.info(f"Saved int8 model to '{output_path}'")
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the MiniLM embedding model to quantized ONNX.")
+    parser.add_argument("--output", "-o", type=Path, default=Path(load_config()["onnx_path"]),
+                        help="Where to write the int8 ONNX model.")
+    parser.add_argument("--opset", type=int, default=14, help="ONNX opset version.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S")
+    export_onnx(args.output, args.opset)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
 import re
-from typing import Dict
+from typing import Dict, Sequence
+
+import numpy as np
+
+from evaluation.columnar import BatchScores, TextColumn, as_column, compile_cues
 
 # List of speculative or vague phrases
 HALLUCINATION_CUES = [
@@ -7,6 +11,7 @@ HALLUCINATION_CUES = [
     r"\bas is well known\b", r"\bit is evident\b", r"\bwithout a doubt\b",
     r"\bscientists agree\b", r"\bno one disputes\b", r"\bthe fact is\b"
 ]
+_CUES = compile_cues(HALLUCINATION_CUES)
 
 def score_hallucination(response: str) -> Dict:
     """
@@ -24,3 +29,16 @@ def score_hallucination(response: str) -> Dict:
     explanation = f"{hits} speculative cue{'s' if hits != 1 else ''} found in {word_count} words"
 
     return {"score": score, "explanation": explanation}
+
+def score_hallucination_batch(responses: Sequence[str], column: TextColumn = None) -> BatchScores:
+    """
+    score_hallucination over a whole column of responses.
+    """
+    column = as_column(responses, column)
+    hits = column.cue_hits(_CUES)
+    words = np.maximum(column.word_counts, 1)
+    scores = 10.0 - np.minimum(hits * 2, 10)
+    return BatchScores(
+        scores,
+        lambda i: f"{hits[i]} speculative cue{'s' if hits[i] != 1 else ''} found in {words[i]} words"
+    )
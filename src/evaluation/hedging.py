@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+# Judge model to hedge to when the primary one straggles
+FALLBACK_MODELS = {
+    "llama-3.3-70b-versatile": "llama-3.1-8b-instant",
+    "llama-3.1-8b-instant": "llama-3.3-70b-versatile"
+}
+
+
+def _percentile(values, p: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(p * len(ordered)), len(ordered) - 1)]
+
+
+class Hedger:
+    """
+    Runs a call and, if it has not finished within the recent `percentile`
+    latency, fires a backup call and returns whichever valid result comes
+    first. A call that raises is not valid; the other one is awaited.
+
+    Backups are capped at `budget` × calls, so hedging adds at most that
+    fraction of extra load. Until `warmup` latencies are observed the
+    delay is `initial_delay`. The losing call cannot be interrupted
+    mid-request; it is abandoned (or cancelled if it has not started) and
+    its latency is still recorded to estimate the unhedged tail. Backups
+    run on their own pool, so abandoned primaries cannot delay them.
+    """
+
+    def __init__(self, percentile: float = 0.9, budget: float = 0.1, initial_delay: float = 10.0,
+                 min_delay: float = 0.5, window: int = 200, warmup: int = 20, max_workers: int = 8,
+                 backup_workers: int = 4):
+        self.percentile = percentile
+        self.budget = budget
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.warmup = warmup
+        self.calls = 0
+        self.hedges = 0
+        self.backup_wins = 0
+        self._recent = deque(maxlen=window)
+        self._primary = []   # latency of the primary call alone
+        self._observed = []  # latency the caller saw
+        self._running = {}   # primary future → start, until it finishes
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._backup_pool = ThreadPoolExecutor(max_workers=backup_workers, thread_name_prefix="hedge-backup")
+
+    def delay(self) -> float:
+        with self._lock:
+            if len(self._recent) < self.warmup:
+                return self.initial_delay
+            return max(self.min_delay, _percentile(self._recent, self.percentile))
+
+    def _may_hedge(self) -> bool:
+        return self.hedges < self.budget * self.calls
+
+    def _record_primary(self, start: float) -> Callable:
+        def done(future):
+            with self._lock:
+                self._running.pop(future, None)
+                if future.cancelled():
+                    return
+                latency = time.perf_counter() - start
+                self._primary.append(latency)
+                self._recent.append(latency)
+        return done
+
+    def call(self, primary: Callable[[], T], backup: Callable[[], T]) -> T:
+        start = time.perf_counter()
+        with self._lock:
+            self.calls += 1
+        first = self._pool.submit(primary)
+        with self._lock:
+            self._running[first] = start
+        first.add_done_callback(self._record_primary(start))
+        pending = {first}
+
+        wait(pending, timeout=self.delay())
+        if not (first.done() and first.exception() is None):
+            with self._lock:
+                hedge = self._may_hedge()
+                if hedge:
+                    self.hedges += 1
+            if hedge:
+                logging.info("🪃 Hedging slow judge call")
+                pending.add(self._backup_pool.submit(backup))
+
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                for other in pending:
+                    other.cancel()
+                with self._lock:
+                    self._observed.append(time.perf_counter() - start)
+                    if future is not first:
+                        self.backup_wins += 1
+                return future.result()
+        raise error
+
+    def report(self) -> Dict:
+        """
+        Hedge rate plus p50/p99 latency as observed vs. primary-only.
+        Primaries still running count with their latency so far, so
+        abandoned stragglers do not make the unhedged tail look shorter.
+        """
+        with self._lock:
+            now = time.perf_counter()
+            primary = self._primary + [now - start for start in self._running.values()]
+            return {
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "hedge_rate": round(self.hedges / self.calls, 3) if self.calls else 0.0,
+                "backup_wins": self.backup_wins,
+                "p50_observed": _percentile(self._observed, 0.50),
+                "p99_observed": _percentile(self._observed, 0.99),
+                "primary_unfinished": len(self._running),
+                "p50_primary": _percentile(primary, 0.50),
+                "p99_primary": _percentile(primary, 0.99)
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._backup_pool.shutdown(wait=False, cancel_futures=True)
@@ -1,10 +1,11 @@
-from typing import Dict
-from sentence_transformers import SentenceTransformer, util
+from typing import Dict, Sequence
 
-model = SentenceTransformer("all-MiniLM-L6-v2")  # Fast, lightweight
+import numpy as np
 
-def score_instruction_following(prompt: str, response: str) -> Dict:
-    similarity = util.cos_sim(model.encode(prompt), model.encode(response)).item()
+from evaluation.columnar import BatchScores
+from evaluation.embeddings import encode  # all-MiniLM-L6-v2, backend set in config/embedding.json
+
+def _result(similarity: float) -> Dict:
     score = round(similarity * 10, 2)  # Scale to 0–10
 
     explanation = "High semantic match" if score > 7 else "Partial or weak alignment"
@@ -12,3 +13,19 @@ def score_instruction_following(prompt: str, response: str) -> Dict:
         "score": score,
         "explanation": explanation
     }
+
+def score_instruction_following(prompt: str, response: str) -> Dict:
+    embeddings = encode([prompt, response])
+    return _result(float(embeddings[0] @ embeddings[1]))
+
+def score_instruction_following_batch(prompts: Sequence[str], responses: Sequence[str]) -> BatchScores:
+    """
+    Same scores as score_instruction_following, with one encode call for the whole batch.
+    """
+    n = len(prompts)
+    if not n:
+        return BatchScores(np.zeros(0), str)
+    embeddings = encode(list(prompts) + list(responses))
+    similarities = (embeddings[:n] * embeddings[n:]).sum(axis=1)
+    scores = np.array([round(float(s) * 10, 2) for s in similarities])
+    return BatchScores(scores, lambda i: "High semantic match" if scores[i] > 7 else "Partial or weak alignment")
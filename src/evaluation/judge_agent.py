@@ -1,37 +1,39 @@
+import logging
 import os
 from groq import Groq
-import re
+
+from evaluation.evaluate_with_llm import (
+    JUDGE_RESPONSE_FORMAT,
+    REPAIR_MAX_TOKENS,
+    JudgeParseError,
+    judge_with_repair,
+    parse_judge_output,
+)
 
 client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
 def evaluate_with_llm(prompt: str, response: str, model: str = "llama-3.3-70b-versatile") -> dict:
-    system_prompt = (
-        "You are an expert evaluator. Score the response on a scale of 0–10 across these dimensions:\n"
-        "- Instruction Following\n"
-        "- Coherence & Accuracy\n"
-        "- Hallucination Detection\n"
-        "- Style Matching\n"
-        "- Length Penalty\n"
-        "- Assumption Control\n"
-        "Also provide a brief explanation for each score."
-    )
-
-    user_input = f"Prompt: {prompt}\nResponse: {response}"
-
-    try:
+    def send(messages: list, repair: bool = False) -> str:
+        options = {"max_tokens": REPAIR_MAX_TOKENS} if repair else {}
         chat_completion = client.chat.completions.create(
             model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_input}
-            ],
-            temperature=0.3
+            messages=messages,
+            temperature=0.0 if repair else 0.3,
+            response_format=JUDGE_RESPONSE_FORMAT,
+            **options
         )
-
         reply = chat_completion.choices[0].message.content
-        print("Raw LLM reply:\n", reply)
-        return parse_llm_output(reply)
+        logging.debug(f"Raw LLM reply:\n{reply}")
+        return reply
+
+    try:
+        return judge_with_repair(send, prompt, response)
 
+    except JudgeParseError as e:
+        return {
+            "scores": {},
+            "explanations": {"error": f"Groq judge output invalid: {e}"}
+        }
     except Exception as e:
         return {
             "scores": {},
@@ -40,25 +42,7 @@ def evaluate_with_llm(prompt: str, response: str, model: str = "llama-3.3-70b-ve
 
 
 def parse_llm_output(text: str) -> dict:
-    scores = {}
-    explanations = {}
-
-    # Match lines like: * **Instruction Following: 8**
-    pattern = r"\*\s+\*\*(.+?):\s*(\d+)\*\*\s*\n(.*?)(?=\n\*|\Z)"
-
-    matches = re.findall(pattern, text, re.DOTALL)
-
-    for dim, score_str, explanation in matches:
-        key = dim.strip().lower().replace(" ", "_")
-        try:
-            score = float(score_str.strip())
-            scores[key] = score
-            explanations[key] = explanation.strip()
-        except ValueError:
-            continue
-
-    return {
-        "scores": scores,
-        "explanations": explanations
-    }
-
+    """
+    Strict JSON parse of a judge reply (see evaluate_with_llm.parse_judge_output).
+    """
+    return parse_judge_output(text)
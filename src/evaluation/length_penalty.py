@@ -1,4 +1,10 @@
-from typing import Dict
+from typing import Dict, Sequence
+
+import numpy as np
+
+from evaluation.columnar import BatchScores, TextColumn, as_column
+
+_VERDICTS = ("Too short", "Too long", "Optimal length")
 
 def score_length_penalty(response: str) -> Dict:
     """
@@ -16,3 +22,12 @@ def score_length_penalty(response: str) -> Dict:
         score = 10.0
         explanation = "Optimal length"
     return {"score": score, "explanation": f"{word_count} words – {explanation}"}
+
+def score_length_penalty_batch(responses: Sequence[str], column: TextColumn = None) -> BatchScores:
+    """
+    score_length_penalty over a whole column of responses.
+    """
+    words = as_column(responses, column).word_counts
+    verdict = np.where(words < 5, 0, np.where(words > 50, 1, 2))
+    scores = np.array([3.0, 5.0, 10.0])[verdict]
+    return BatchScores(scores, lambda i: f"{words[i]} words – {_VERDICTS[verdict[i]]}")
@@ -0,0 +1,164 @@
+import heapq
+import json
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Dict, List
+
+from evaluation.result import DIMENSIONS, FINAL, SCORE_FIELDS
+
+LIVE_SUFFIX = ".live.jsonl"
+
+
+def live_path(output_path: Path) -> Path:
+    """
+    eval_report.json → eval_report.live.jsonl
+    """
+    output_path = Path(output_path)
+    return output_path.with_name(output_path.stem + LIVE_SUFFIX)
+
+
+def open_live_file(output_path: Path):
+    """
+    Starts <stem>.live.jsonl with a header line naming this run, so a
+    tailer can tell a restarted run from one that kept appending.
+    """
+    f = live_path(output_path).open("w", encoding="utf-8")
+    f.write(json.dumps({"run_id": uuid.uuid4().hex, "started_at": time.time()}) + "\n")
+    f.flush()
+    return f
+
+
+def _is_header(record: Dict) -> bool:
+    return "run_id" in record and "scores" not in record
+
+
+class LiveRun:
+    """
+    Tails the JSONL written by an in-progress batch run. Only the read
+    offset and running aggregates are kept: per-dimension sums/counts, a
+    top-K heap for the leaderboard and recent timestamps for throughput.
+
+    Without `rank_dim`, the leaderboard ranks by `final` if the first
+    record has one (runs without --weights do not), else by the first
+    dimension, as the report leaderboard does.
+    """
+
+    def __init__(self, path: Path, rank_dim: str = None, top_k: int = 10, window: int = 200,
+                 max_lines: int = 5000):
+        self.path = Path(path)
+        self._rank_dim = rank_dim
+        self.rank_dim = rank_dim
+        self.top_k = top_k
+        self.max_lines = max_lines
+        self.caught_up = True
+        self.offset = 0
+        self.inode = None
+        self.run_id = None
+        self.count = 0
+        self.bad_lines = 0
+        self.sums = dict.fromkeys(SCORE_FIELDS, 0.0)
+        self.counts = dict.fromkeys(SCORE_FIELDS, 0)
+        self.first_ts = None
+        self.last_ts = None
+        self._top: List[tuple] = []  # min-heap of (score, seq, agent_id)
+        self._recent = deque(maxlen=window)
+
+    def reset(self) -> None:
+        self.__init__(self.path, self._rank_dim, self.top_k, self._recent.maxlen, self.max_lines)
+
+    def poll(self) -> int:
+        """
+        Parses records appended since the last call, at most `max_lines` at
+        a time (`caught_up` is False while more are waiting), and returns
+        how many were added. A trailing line without a newline is left for
+        the next poll.
+        """
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return 0
+        size = stat.st_size
+        if self.offset and (stat.st_ino != self.inode or size < self.offset or self._file_run_id() != self.run_id):
+            self.reset()  # file was replaced or the run restarted
+        self.inode = stat.st_ino
+        self.caught_up = True
+        if size == self.offset:
+            return 0
+
+        added = 0
+        with self.path.open("rb") as f:
+            f.seek(self.offset)
+            for _ in range(self.max_lines):
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break
+                self.offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    if _is_header(record):
+                        self.run_id = record["run_id"]
+                        continue
+                    self._update(record)
+                    added += 1
+                except (json.JSONDecodeError, AttributeError, TypeError):
+                    self.bad_lines += 1
+            else:
+                self.caught_up = False  # the rest is read on later polls
+        return added
+
+    def _file_run_id(self):
+        # run_id in the file's header line now (None for files written without one)
+        try:
+            with self.path.open("rb") as f:
+                record = json.loads(f.readline(4096))
+            return record["run_id"] if _is_header(record) else None
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _update(self, record: Dict) -> None:
+        scores = record.get("scores") or {}
+        for dim in SCORE_FIELDS:
+            value = scores.get(dim, scores.get("coherence_&_accuracy") if dim == "coherence_accuracy" else None)
+            if isinstance(value, (int, float)):
+                self.sums[dim] += value
+                self.counts[dim] += 1
+
+        ts = record.get("scored_at", time.time())
+        self.first_ts = ts if self.first_ts is None else min(self.first_ts, ts)
+        self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+        self._recent.append(ts)
+
+        if self.rank_dim is None:
+            self.rank_dim = FINAL if FINAL in scores else DIMENSIONS[0]
+        score = scores.get(self.rank_dim)
+        if isinstance(score, (int, float)):
+            entry = (score, self.count, record.get("agent_id"))
+            if len(self._top) < self.top_k:
+                heapq.heappush(self._top, entry)
+            elif entry > self._top[0]:
+                heapq.heapreplace(self._top, entry)
+        self.count += 1
+
+    def means(self) -> Dict[str, float]:
+        return {dim: self.sums[dim] / self.counts[dim] for dim in SCORE_FIELDS if self.counts[dim]}
+
+    def leaderboard(self) -> List[tuple]:
+        """
+        [(agent_id, score), ...] best first.
+        """
+        return [(agent_id, score) for score, _, agent_id in sorted(self._top, reverse=True)]
+
+    def throughput(self) -> Dict[str, float]:
+        """
+        Items per second overall and over the recent window.
+        """
+        overall = recent = 0.0
+        if self.count > 1 and self.last_ts > self.first_ts:
+            overall = (self.count - 1) / (self.last_ts - self.first_ts)
+        if len(self._recent) > 1 and self._recent[-1] > self._recent[0]:
+            recent = (len(self._recent) - 1) / (self._recent[-1] - self._recent[0])
+        return {"overall": overall, "recent": recent}
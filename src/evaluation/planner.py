@@ -0,0 +1,173 @@
+import heapq
+import math
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from evaluation.evaluate_with_llm import (
+    JUDGE_OUTPUT_EXAMPLE, REPAIR_MAX_TOKENS, build_judge_messages, judge_cache_key
+)
+
+# Per-key limits (Groq free tier) and rough serving speed, used when not overridden
+MODEL_LIMITS = {
+    "llama-3.3-70b-versatile": {"rpm": 30, "tpm": 12000, "rpd": 1000, "tpd": 100000,
+                                "base_latency": 0.5, "tokens_per_s": 250},
+    "llama-3.1-8b-instant": {"rpm": 30, "tpm": 6000, "rpd": 14400, "tpd": 500000,
+                             "base_latency": 0.25, "tokens_per_s": 750}
+}
+DEFAULT_LIMITS = MODEL_LIMITS["llama-3.3-70b-versatile"]
+
+# Chat-format overhead per message and per request
+MESSAGE_OVERHEAD = 4
+REQUEST_OVERHEAD = 3
+# batch_runner's pause after every scored item
+PAUSE_S = 0.5
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local BPE-ish token estimate: one token per word or symbol, but no fewer
+    than one per 4 characters (long words split into several tokens).
+    """
+    return max(len(_PIECES.findall(text)), math.ceil(len(text) / 4))
+
+
+def message_tokens(messages: list) -> int:
+    return REQUEST_OVERHEAD + sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD for m in messages)
+
+
+# A typical judge reply: the output example with a one-sentence explanation per dimension
+JUDGE_OUTPUT_TOKENS = estimate_tokens(
+    JUDGE_OUTPUT_EXAMPLE.replace("<number 0-10>", "7.5").replace(
+        "<one sentence>", "The response addresses the request clearly with minor gaps in detail."
+    )
+)
+
+
+@dataclass
+class Workload:
+    items: int
+    unique: int
+    cache_hits: int
+    input_tokens: List[int]  # per request that will actually be sent
+
+    @property
+    def requests(self) -> int:
+        return len(self.input_tokens)
+
+
+def build_workload(items: Sequence[dict], model: str, cache=None) -> Workload:
+    """
+    Judge requests a run would send: identical prompt/response pairs are
+    sent once when a cache is used, and requests already in `cache` not at all.
+    """
+    seen = set()
+    sent, hits = [], 0
+    for item in items:
+        messages = build_judge_messages(item.get("prompt", ""), item.get("response", ""))
+        if cache is None:
+            sent.append(message_tokens(messages))
+            continue
+        key = judge_cache_key(model, messages)
+        if key in seen:
+            continue
+        seen.add(key)
+        if key in cache:
+            hits += 1
+        else:
+            sent.append(message_tokens(messages))
+    unique = len(seen) if cache is not None else len(items)
+    return Workload(len(items), unique, hits, sent)
+
+
+def simulate_key(request_tokens: Sequence[int], rpm: int, tpm: int, concurrency: int,
+                 base_latency: float, tokens_per_s: float, output_tokens: int,
+                 pause: float = PAUSE_S) -> float:
+    """
+    Wall time for one key: `concurrency` workers send requests in order
+    under a sliding 60s RPM/TPM window, each request taking
+    base_latency + output_tokens / tokens_per_s, followed by `pause`.
+    """
+    window = deque()  # (start time, tokens) of requests in the last minute
+    used = 0
+    free = [0.0] * concurrency
+    last_start = end = 0.0
+    latency = base_latency + output_tokens / tokens_per_s
+    for tokens in request_tokens:
+        tokens += output_tokens
+        t = max(heapq.heappop(free), last_start)
+        while True:
+            while window and window[0][0] + 60 <= t:
+                used -= window.popleft()[1]
+            if not window or (len(window) < rpm and used + tokens <= tpm):
+                break
+            t = window[0][0] + 60
+        window.append((t, tokens))
+        used += tokens
+        last_start = t
+        end = max(end, t + latency)
+        heapq.heappush(free, t + latency + pause)
+    return end
+
+
+def plan(workload: Workload, model: str, key_counts: Sequence[int], concurrency: Sequence[int],
+         repair_rate: float = 0.02, output_tokens: int = JUDGE_OUTPUT_TOKENS,
+         limits: Optional[Dict] = None) -> List[Dict]:
+    """
+    Expected requests, tokens and wall time for every (keys, concurrency)
+    combination. Requests are split evenly across keys, as one
+    batch_runner process per key does.
+    """
+    limits = {**MODEL_LIMITS.get(model, DEFAULT_LIMITS), **(limits or {})}
+    # A repair re-sends the conversation plus the bad reply, capped at REPAIR_MAX_TOKENS
+    repair_tokens = [t + output_tokens + 30 for t in workload.input_tokens[::max(1, round(1 / repair_rate))]] \
+        if repair_rate > 0 else []
+    requests = workload.input_tokens + repair_tokens
+    total_tokens = sum(requests) + len(workload.input_tokens) * output_tokens + \
+        len(repair_tokens) * min(output_tokens, REPAIR_MAX_TOKENS)
+
+    rows = []
+    for keys in key_counts:
+        shares = [requests[i::keys] for i in range(keys)]
+        for c in concurrency:
+            wall = max(
+                simulate_key(share, limits["rpm"], limits["tpm"], c,
+                             limits["base_latency"], limits["tokens_per_s"], output_tokens)
+                for share in shares
+            )
+            per_key_requests = max(len(share) for share in shares)
+            per_key_tokens = max(sum(share) + len(share) * output_tokens for share in shares)
+            days = max(per_key_requests / limits["rpd"], per_key_tokens / limits["tpd"])
+            rows.append({
+                "keys": keys,
+                "concurrency": c,
+                "requests": len(requests),
+                "tokens": total_tokens,
+                "wall_s": wall,
+                "requests_per_min": 60 * len(requests) / wall if wall else 0.0,
+                "days": math.ceil(days) if days > 1 else 1
+            })
+    return rows
+
+
+def print_plan(workload: Workload, rows: List[Dict], model: str) -> None:
+    print(f"\nPlan – {workload.items} items, model '{model}'")
+    print(f"Unique judge requests: {workload.unique}; cache hits: {workload.cache_hits}; to send: {workload.requests}")
+    if workload.requests:
+        print(f"Input tokens: {sum(workload.input_tokens)} "
+              f"(avg {sum(workload.input_tokens) / workload.requests:.0f}/request, "
+              f"rubric {message_tokens(build_judge_messages('', ''))}); "
+              f"output ≈ {JUDGE_OUTPUT_TOKENS}/request")
+    for row in rows:
+        minutes = row["wall_s"] / 60
+        line = (
+            f"{row['keys']} key{'s' if row['keys'] != 1 else ''} × {row['concurrency']} concurrent – "
+            f"{row['requests']} requests, {row['tokens']} tokens, "
+            f"{minutes:.1f} min ({row['requests_per_min']:.1f} req/min)"
+        )
+        if row["days"] > 1:
+            line += f"; exceeds daily limits, needs {row['days']} days"
+        print(line)
@@ -1,7 +1,7 @@
+import logging
 from difflib import SequenceMatcher
-from sentence_transformers import SentenceTransformer, util
-
-model = SentenceTransformer("all-MiniLM-L6-v2")
+from typing import List
+from evaluation.embeddings import MODEL_NAME, encode, load_config
 
 def score_reference_alignment(response: str, reference: str, mode: str = "semantic") -> dict:
     if not reference.strip():
@@ -19,10 +19,36 @@ def score_reference_alignment(response: str, reference: str, mode: str = "semant
         }
 
     # Default: semantic
-    embeddings = model.encode([response.strip(), reference.strip()], convert_to_tensor=True)
-    similarity = util.cos_sim(embeddings[0], embeddings[1]).item()
+    embeddings = encode([response.strip(), reference.strip()])
+    similarity = float(embeddings[0] @ embeddings[1])
     score = round(similarity * 10, 2)
     return {
         "score": score,
         "explanation": f"Semantic similarity: {score}/10"
     }
+
+
+def score_reference_alignment_batch(responses: List[str], index, k: int = 1) -> List[dict]:
+    """
+    Scores each response against its best match in a ReferenceIndex
+    (one encode call for the whole batch, then a blocked top-k search).
+    With no references to match, every response gets the full default score.
+    """
+    if not len(index) or k < 1:
+        return [{
+            "score": 10.0,
+            "explanation": "No reference to match in the index; full score by default.",
+            "matches": []
+        } for _ in responses]
+    if index.encoder and index.encoder != f"{MODEL_NAME}:{load_config()['backend']}":
+        logging.warning(f"Reference index was built with {index.encoder}; scores may drift slightly")
+    sims, rows = index.search(encode([r.strip() for r in responses]), k=k)
+    results = []
+    for sim, row in zip(sims, rows):
+        score = round(float(sim[0]) * 10, 2)
+        results.append({
+            "score": score,
+            "explanation": f"Semantic similarity to closest reference '{index.ids[row[0]]}': {score}/10",
+            "matches": [{"id": index.ids[r], "similarity": round(float(s), 4)} for s, r in zip(sim, row)]
+        })
+    return results
@@ -0,0 +1,174 @@
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from evaluation.embeddings import MODEL_NAME, encode, load_config
+from evaluation.reference_alignment import score_reference_alignment_batch
+from evaluation.utils.add_references import iter_records, write_records
+
+EMBEDDINGS_FILE = "embeddings.f32"
+IDS_FILE = "ids.json"
+META_FILE = "meta.json"
+
+
+def write_index(index_dir: Path, ids: Sequence[str], blocks: Iterable[np.ndarray], encoder: str = None) -> int:
+    """
+    Appends L2-normalized embedding blocks to a raw float32 matrix on disk,
+    so the corpus never has to fit in memory. Returns the row count.
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    rows, dim = 0, None
+    with (index_dir / EMBEDDINGS_FILE).open("wb") as f:
+        for block in blocks:
+            block = np.ascontiguousarray(block, dtype=np.float32)
+            if dim is not None and block.shape[1] != dim:
+                raise ValueError(f"Embedding width changed from {dim} to {block.shape[1]}")
+            dim = block.shape[1]
+            f.write(block.tobytes())
+            rows += len(block)
+    if rows != len(ids):
+        raise ValueError(f"{rows} embeddings for {len(ids)} references")
+    (index_dir / IDS_FILE).write_text(json.dumps(list(ids)), encoding="utf-8")
+    (index_dir / META_FILE).write_text(
+        json.dumps({"count": rows, "dim": dim or 0, "encoder": encoder}), encoding="utf-8"
+    )
+    return rows
+
+
+def build_index(corpus_path: Path, index_dir: Path, block_size: int = 10000) -> int:
+    """
+    Embeds every record with a non-empty "reference" in `corpus_path`
+    (JSON array or JSONL), `block_size` texts per encode call.
+    """
+    config = load_config()
+    ids = []
+
+    def blocks():
+        texts = []
+        for i, record in enumerate(iter_records(corpus_path)):
+            reference = (record.get("reference") or "").strip()
+            if not reference:
+                continue
+            ids.append(str(record.get("id", record.get("agent_id", i))))
+            texts.append(reference)
+            if len(texts) == block_size:
+                yield encode(texts)
+                logging.info(f"Embedded {len(ids)} references")
+                texts = []
+        if texts:
+            yield encode(texts)
+
+    encoder = f"{MODEL_NAME}:{config['backend']}"
+    return write_index(index_dir, ids, blocks(), encoder=encoder)
+
+
+class ReferenceIndex:
+    """
+    Memory-mapped reference embeddings with exact top-k cosine search.
+
+    The corpus is read once per `search` in blocks of `block_rows`, and each
+    block is scored against all queries with one matrix product per query
+    block; only the running top-k per query is kept, so memory stays at
+    O(queries × k + query_block × block_rows).
+    """
+
+    def __init__(self, index_dir: Path):
+        self.index_dir = Path(index_dir)
+        meta = json.loads((self.index_dir / META_FILE).read_text(encoding="utf-8"))
+        self.encoder = meta.get("encoder")
+        self.ids: List[str] = json.loads((self.index_dir / IDS_FILE).read_text(encoding="utf-8"))
+        if meta["count"]:
+            self.matrix = np.memmap(self.index_dir / EMBEDDINGS_FILE, dtype=np.float32, mode="r",
+                                    shape=(meta["count"], meta["dim"]))
+        else:
+            # An empty corpus leaves a 0-byte file, which cannot be memory-mapped
+            self.matrix = np.zeros((0, meta["dim"]), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, queries: np.ndarray, k: int = 1, block_rows: int = 16384,
+               query_block: int = 2048) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (similarities, row indices), each of shape (len(queries), k),
+        best match first.
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        n, k = len(queries), min(k, len(self))
+        best_sim = np.full((n, k), -np.inf, dtype=np.float32)
+        best_idx = np.zeros((n, k), dtype=np.int64)
+        if not n or not k:
+            return best_sim, best_idx
+
+        for start in range(0, len(self), block_rows):
+            block = np.asarray(self.matrix[start:start + block_rows])
+            for q0 in range(0, n, query_block):
+                q1 = min(q0 + query_block, n)
+                sims = queries[q0:q1] @ block.T
+                kb = min(k, sims.shape[1])
+                if kb == 1:
+                    cand = sims.argmax(axis=1)[:, None]
+                elif kb < sims.shape[1]:
+                    cand = np.argpartition(sims, -kb, axis=1)[:, -kb:]
+                else:
+                    cand = np.broadcast_to(np.arange(sims.shape[1]), sims.shape)
+                cand_sim = np.take_along_axis(sims, cand, axis=1)
+                # Merge this block's candidates into the running top-k
+                all_sim = np.concatenate([best_sim[q0:q1], cand_sim], axis=1)
+                all_idx = np.concatenate([best_idx[q0:q1], cand + start], axis=1)
+                keep = np.argpartition(all_sim, -k, axis=1)[:, -k:]
+                best_sim[q0:q1] = np.take_along_axis(all_sim, keep, axis=1)
+                best_idx[q0:q1] = np.take_along_axis(all_idx, keep, axis=1)
+
+        order = np.argsort(-best_sim, axis=1)
+        return np.take_along_axis(best_sim, order, axis=1), np.take_along_axis(best_idx, order, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build a reference-answer embedding index, or score responses against their nearest references."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Embed a corpus of reference answers.")
+    build.add_argument("--corpus", "-c", type=Path, required=True,
+                       help="JSON/JSONL records with a 'reference' field (and 'id' or 'agent_id').")
+    build.add_argument("--index", type=Path, required=True, help="Directory to write the index to.")
+    build.add_argument("--block_size", type=int, default=10000, help="References per encode call.")
+
+    score = sub.add_parser("score", help="Score responses by their best-matching reference.")
+    score.add_argument("--index", type=Path, required=True)
+    score.add_argument("--input", "-i", type=Path, required=True, help="Path to JSON file with agent responses.")
+    score.add_argument("--output", "-o", type=Path, required=True, help="JSON/JSONL file for alignment scores.")
+    score.add_argument("--top", "-k", type=int, default=1, help="Nearest references to report per response.")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S")
+
+    if args.command == "build":
+        start = time.perf_counter()
+        rows = build_index(args.corpus, args.index, args.block_size)
+        logging.info(f"Indexed {rows} references in '{args.index}' ({time.perf_counter() - start:.1f}s)")
+        return
+
+    index = ReferenceIndex(args.index)
+    items = list(iter_records(args.input))
+    start = time.perf_counter()
+    scored = score_reference_alignment_batch([item.get("response", "") for item in items], index, k=args.top)
+    logging.info(f"Matched {len(items)} responses against {len(index)} references "
+                 f"in {time.perf_counter() - start:.1f}s")
+    write_records(
+        ({"agent_id": item.get("agent_id"), "reference_alignment": s} for item, s in zip(items, scored)),
+        args.output
+    )
+    logging.info(f"Saved alignment scores to '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main()
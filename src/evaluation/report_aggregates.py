@@ -0,0 +1,184 @@
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from evaluation.report_reader import ReportReader
+from evaluation.result import SCORE_FIELDS, EvalResult
+
+SIDECAR_SUFFIX = ".agg.json"
+SIDECAR_VERSION = 1
+
+
+def sidecar_path(report_path: Path) -> Path:
+    """
+    report_batch_3.json → report_batch_3.agg.json
+    """
+    report_path = Path(report_path)
+    return report_path.with_name(report_path.stem + SIDECAR_SUFFIX)
+
+
+def _column(values: np.ndarray) -> list:
+    # JSON has no NaN; missing scores round-trip as null
+    return [None if np.isnan(v) else float(v) for v in values]
+
+
+def _summary(col: np.ndarray) -> Dict:
+    present = col[~np.isnan(col)]
+    if not len(present):
+        return {"count": 0}
+    p25, p50, p75 = np.percentile(present, [25, 50, 75])
+    return {
+        "count": int(len(present)),
+        "mean": float(present.mean()),
+        "std": float(present.std()),
+        "min": float(present.min()),
+        "p25": float(p25),
+        "median": float(p50),
+        "p75": float(p75),
+        "max": float(present.max())
+    }
+
+
+def domain_of(result: EvalResult) -> str:
+    # Reports may hold a missing, null or non-string domain; group them all as strings
+    return str(result.get("domain") or "Unknown")
+
+
+def build_aggregates(results: list[EvalResult]) -> Dict:
+    """
+    Per-dimension summaries, per-domain stats and an agent index sorted by
+    agent_id (first occurrence of duplicate ids wins). Missing scores are
+    NaN here and are excluded from every statistic.
+    """
+    nan = float("nan")
+    matrix = np.array([r.score_vector(SCORE_FIELDS, nan) for r in results], dtype=np.float64)
+    domains, domain_codes, first_rows = {}, [], {}
+    for row, r in enumerate(results):
+        domain_codes.append(domains.setdefault(domain_of(r), len(domains)))
+        first_rows.setdefault(str(r.agent_id), row)
+    return aggregate_columns(matrix.reshape(len(results), len(SCORE_FIELDS)),
+                             np.array(domain_codes, dtype=np.int64), list(domains), first_rows)
+
+
+def aggregate_columns(matrix: np.ndarray, domain_codes: np.ndarray, domain_names: Sequence[str],
+                      first_rows: Dict[str, int]) -> Dict:
+    """
+    build_aggregates from per-item columns: an (items × SCORE_FIELDS)
+    matrix with NaN for missing scores, each row's index into
+    `domain_names`, and the first row of every agent_id. The columns may
+    be memory-mapped; they are read one column or one domain at a time.
+    """
+    summary = {dim: _summary(np.asarray(matrix[:, j])) for j, dim in enumerate(SCORE_FIELDS)}
+
+    per_domain = {}
+    for code, domain in sorted(enumerate(domain_names), key=lambda pair: pair[1]):
+        rows = np.asarray(matrix[np.asarray(domain_codes) == code])
+        per_domain[domain] = {
+            "count": int(len(rows)),
+            "mean": {dim: (float(np.nanmean(rows[:, j])) if np.any(~np.isnan(rows[:, j])) else None)
+                     for j, dim in enumerate(SCORE_FIELDS)}
+        }
+
+    agent_ids = sorted(first_rows)
+    first = np.array([first_rows[a] for a in agent_ids], dtype=np.int64)
+    scores = np.asarray(matrix[first]).reshape(len(first), len(SCORE_FIELDS))
+    return {
+        "version": SIDECAR_VERSION,
+        "count": len(matrix),
+        "dimensions": list(SCORE_FIELDS),
+        "summary": summary,
+        "domains": per_domain,
+        "agents": {
+            "agent_id": agent_ids,
+            "row": first.tolist(),
+            "domain": [domain_names[c] for c in np.asarray(domain_codes)[first].tolist()],
+            "scores": {dim: _column(scores[:, j]) for j, dim in enumerate(SCORE_FIELDS)}
+        }
+    }
+
+
+def write_sidecar(report_path: Path, results: list[EvalResult]) -> Path:
+    return save_sidecar(report_path, build_aggregates(results))
+
+
+def save_sidecar(report_path: Path, aggregates: Dict) -> Path:
+    stat = Path(report_path).stat()
+    aggregates["report"] = {"name": Path(report_path).name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    path = sidecar_path(report_path)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(aggregates, f)
+    return path
+
+
+def load_sidecar(report_path: Path) -> Optional[Dict]:
+    """
+    Returns the sidecar for a report, or None when it is missing or was
+    written for a different version of the report file.
+    """
+    path = sidecar_path(report_path)
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            aggregates = json.load(f)
+        stat = Path(report_path).stat()
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    source = aggregates.get("report", {})
+    if (aggregates.get("version") != SIDECAR_VERSION
+            or source.get("size") != stat.st_size
+            or source.get("mtime_ns") != stat.st_mtime_ns):
+        return None
+    return aggregates
+
+
+def load_or_build_sidecar(report_path: Path) -> Optional[Dict]:
+    """
+    Loads a fresh sidecar, rebuilding (and saving) it from the report if needed.
+    """
+    aggregates = load_sidecar(report_path)
+    if aggregates is not None:
+        return aggregates
+    try:
+        # Only agent_id, scores and domain are needed; prompts and responses stay on disk
+        with ReportReader(report_path) as reader:
+            results = list(reader.iter_scores("domain"))
+    except (OSError, ValueError) as e:
+        logging.error(f"Failed to load report '{report_path}': {e}")
+        return None
+    try:
+        write_sidecar(report_path, results)
+        return load_sidecar(report_path)
+    except OSError as e:
+        logging.warning(f"Could not write sidecar for '{report_path}': {e}")
+        return build_aggregates(results)
+
+
+def agent_frame(aggregates: Dict) -> pd.DataFrame:
+    """
+    One row per agent_id (index, sorted) with a column per score field,
+    the agent's domain and its row position in the report.
+    """
+    agents = aggregates["agents"]
+    frame = pd.DataFrame(
+        {dim: np.array(agents["scores"][dim], dtype=np.float64) for dim in aggregates["dimensions"]},
+        index=pd.Index(agents["agent_id"], name="agent_id")
+    )
+    frame["domain"] = agents["domain"]
+    frame["row"] = agents["row"]
+    return frame
+
+
+def join_reports(left: Dict, right: Dict, right_scale: float = 1.0) -> pd.DataFrame:
+    """
+    Aligns two reports on agent_id. Columns are suffixed `_left`/`_right`;
+    only agents present in both reports are kept, in the left report's order.
+    """
+    dims = [d for d in left["dimensions"] if d in right["dimensions"]]
+    a = agent_frame(left)
+    order = a["row"]
+    b = agent_frame(right)[dims] * right_scale
+    joined = a[dims].join(b, how="inner", lsuffix="_left", rsuffix="_right")
+    return joined.iloc[np.argsort(order.loc[joined.index].to_numpy(), kind="stable")]
@@ -0,0 +1,277 @@
+import json
+import mmap
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from evaluation.result import SCORE_FIELDS, EvalResult
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+
+# JSON strings (unrolled so long responses match in one step), structure and commas;
+# a string followed by ':' is an object key
+_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"(\s*:)?|[\[\]{},]')
+
+
+def index_path(report_path: Path) -> Path:
+    """
+    report_batch_3.json → report_batch_3.idx
+    """
+    report_path = Path(report_path)
+    return report_path.with_name(report_path.stem + INDEX_SUFFIX)
+
+
+def build_index(buf) -> Dict:
+    """
+    Byte spans of every record in a top-level JSON array, and of each
+    record's top-level values, from one regex scan (nothing is decoded).
+    `values[row, k]` is the (start, end) span of `keys[k]`, or (-1, -1).
+    """
+    records, values, keys = [], [], {}
+    depth, start, key, value_start = 0, 0, None, 0
+    current = {}
+    for m in _TOKEN.finditer(buf):
+        token = buf[m.start()]
+        if token == 0x22:  # '"'
+            if depth == 2 and m.group(1):
+                key = json.loads(buf[m.start():m.start(1)])
+                value_start = m.end()
+        elif token in (0x7b, 0x5b):  # '{' '['
+            if depth == 0 and token != 0x5b:
+                raise ValueError("report is not a JSON array")
+            if depth == 1:
+                start, current = m.start(), {}
+            depth += 1
+        elif token in (0x7d, 0x5d):  # '}' ']'
+            if depth == 2 and key is not None:
+                current[key] = (value_start, m.start())
+                key = None
+            depth -= 1
+            if depth == 1:
+                records.append((start, m.end()))
+                values.append(current)
+                for k in current:
+                    keys.setdefault(k, len(keys))
+        elif depth == 2 and key is not None:  # ',' between record fields
+            current[key] = (value_start, m.start())
+            key = None
+    if depth != 0 or not records and not re.match(rb"\s*\[\s*\]\s*$", buf[:64]):
+        raise ValueError("report is not a complete JSON array")
+
+    spans = np.full((len(records), len(keys), 2), -1, dtype=np.int64)
+    for row, current in enumerate(values):
+        for k, span in current.items():
+            spans[row, keys[k]] = span
+    return {
+        "records": np.array(records, dtype=np.int64).reshape(len(records), 2),
+        "values": spans,
+        "keys": list(keys)
+    }
+
+
+class RecordView:
+    """
+    One report record, decoded field by field on access. Offers the read
+    side of EvalResult (score, explanation, get, ...) so it can stand in
+    for a loaded record; `to_result()` decodes the whole record.
+    """
+
+    __slots__ = ("_reader", "row", "_decoded")
+
+    def __init__(self, reader: "ReportReader", row: int):
+        self._reader = reader
+        self.row = row
+        self._decoded = {}
+
+    def __contains__(self, key: str) -> bool:
+        return self._reader.span(self.row, key) is not None
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._decoded:
+            span = self._reader.span(self.row, key)
+            if span is None:
+                raise KeyError(key)
+            self._decoded[key] = self._reader.decode(*span)
+        return self._decoded[key]
+
+    def keys(self) -> List[str]:
+        return [k for k in self._reader.keys if k in self]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self[key] if key in self else None
+        return default if value is None else value
+
+    @property
+    def agent_id(self) -> Any:
+        return self.get("agent_id")
+
+    @property
+    def scores(self) -> Any:
+        return self.get("scores", {})
+
+    @property
+    def explanations(self) -> Any:
+        return self.get("explanations", {})
+
+    def _scored(self) -> EvalResult:
+        if "_scored" not in self._decoded:
+            self._decoded["_scored"] = EvalResult.from_scores(self.agent_id, self.scores, self.explanations)
+        return self._decoded["_scored"]
+
+    def score(self, dim: str, default: float = 0.0) -> float:
+        return self._scored().score(dim, default)
+
+    def has_score(self, dim: str) -> bool:
+        return self._scored().has_score(dim)
+
+    def score_vector(self, dims=SCORE_FIELDS, default: float = 0.0) -> list:
+        return self._scored().score_vector(dims, default)
+
+    def explanation(self, dim: str, default: str = "") -> Any:
+        return self._scored().explanation(dim, default)
+
+    def to_result(self) -> EvalResult:
+        return self._reader.result_at(self.row)
+
+
+class ReportReader:
+    """
+    Memory-mapped report with a byte-offset index of its records, kept in
+    <stem>.idx and rebuilt when the report's size or mtime changes.
+    Records are only decoded when asked for, so a large report opens in
+    constant memory (apart from the index) and one agent's record is an
+    O(1) lookup.
+    """
+
+    def __init__(self, path: Path, persist: bool = True):
+        self.path = Path(path)
+        self._file = self.path.open("rb")
+        self._buf = b""
+        try:
+            stat = self.path.stat()
+            self._stamp = (stat.st_size, stat.st_mtime_ns)
+            if stat.st_size:
+                self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            index = self._load_index()
+            if index is None:
+                index = build_index(self._buf)
+                if persist:
+                    self._save_index(index)
+        except BaseException:
+            self.close()  # e.g. not a JSON array
+            raise
+        self.records: np.ndarray = index["records"]
+        self.values: np.ndarray = index["values"]
+        self.keys: List[str] = index["keys"]
+        self._key_pos = {k: i for i, k in enumerate(self.keys)}
+        self._rows = None
+
+    # ── index persistence ─────────────────────────────────────
+    def _load_index(self) -> Optional[Dict]:
+        try:
+            with np.load(index_path(self.path)) as saved:
+                if (int(saved["version"]) != INDEX_VERSION
+                        or tuple(saved["stamp"].tolist()) != self._stamp):
+                    return None
+                return {"records": saved["records"], "values": saved["values"],
+                        "keys": json.loads(str(saved["keys"]))}
+        except Exception:  # missing, stale format or corrupt (e.g. BadZipFile, EOFError): rebuild
+            return None
+
+    def _save_index(self, index: Dict) -> None:
+        # Written aside and renamed, so concurrent readers never load a partial index
+        path = index_path(self.path)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with tmp_path.open("wb") as f:
+                np.savez(f, version=INDEX_VERSION, stamp=np.array(self._stamp, dtype=np.int64),
+                         records=index["records"], values=index["values"], keys=json.dumps(index["keys"]))
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)  # read-only location; the index is simply rebuilt next time
+
+    # ── raw access ────────────────────────────────────────────
+    def decode(self, start: int, end: int) -> Any:
+        return json.loads(self._buf[start:end])
+
+    def span(self, row: int, key: str) -> Optional[tuple]:
+        k = self._key_pos.get(key)
+        if k is None:
+            return None
+        start, end = self.values[row, k].tolist()
+        return None if start < 0 else (start, end)
+
+    def field(self, key: str) -> Iterator[Any]:
+        """
+        The value of one top-level field for every record (None where missing).
+        """
+        k = self._key_pos.get(key)
+        for start, end in (self.values[:, k].tolist() if k is not None else [(-1, -1)] * len(self)):
+            yield None if start < 0 else self.decode(start, end)
+
+    # ── records ───────────────────────────────────────────────
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, row: int) -> RecordView:
+        if not -len(self) <= row < len(self):
+            raise IndexError(row)
+        return RecordView(self, row % len(self))
+
+    def __iter__(self) -> Iterator[RecordView]:
+        return (RecordView(self, row) for row in range(len(self)))
+
+    def result_at(self, row: int) -> EvalResult:
+        return EvalResult.from_dict(self.decode(*self.records[row].tolist()))
+
+    def results(self) -> Iterator[EvalResult]:
+        return (self.result_at(row) for row in range(len(self)))
+
+    def iter_scores(self, *extra: str) -> Iterator[EvalResult]:
+        """
+        Score-only EvalResults (agent_id, scores and the `extra` top-level
+        fields, e.g. "domain"); prompts, responses and explanations are never decoded.
+        """
+        columns = [self.field(k) for k in ("agent_id", "scores", *extra)]
+        for agent_id, scores, *rest in zip(*columns):
+            fields = {k: v for k, v in zip(extra, rest) if v is not None}
+            yield EvalResult.from_scores(agent_id, scores if scores is not None else {}, {}, extra=fields)
+
+    # ── lookup by agent_id (first occurrence wins) ────────────
+    def row_of(self, agent_id: Any) -> Optional[int]:
+        if self._rows is None:
+            rows = {}
+            for row, value in enumerate(self.field("agent_id")):
+                rows.setdefault(value, row)
+            self._rows = rows
+        return self._rows.get(agent_id)
+
+    def __contains__(self, agent_id: Any) -> bool:
+        return self.row_of(agent_id) is not None
+
+    def view(self, agent_id: Any) -> Optional[RecordView]:
+        row = self.row_of(agent_id)
+        return None if row is None else RecordView(self, row)
+
+    def get(self, agent_id: Any, default: Optional[EvalResult] = None) -> Optional[EvalResult]:
+        """
+        The fully decoded record for `agent_id`, like dict.get on a loaded report.
+        """
+        row = self.row_of(agent_id)
+        return default if row is None else self.result_at(row)
+
+    def close(self) -> None:
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+        self._file.close()
+
+    def __enter__(self) -> "ReportReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,48 @@
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+
+from evaluation.score_matrix import load_score_matrix, rerank
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-weight a finished report from its stored score matrix and print the new leaderboard."
+    )
+    parser.add_argument("--report", "-r", type=Path, required=True,
+                        help="Report JSON written by batch_runner (its .scores.npz must exist).")
+    parser.add_argument("--weights", "-w", type=Path, required=True,
+                        help="JSON file with weights per dimension.")
+    parser.add_argument("--top", "-k", type=int, default=20,
+                        help="Number of leaderboard entries to print.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S")
+
+    stored = load_score_matrix(args.report)
+    if stored is None:
+        logging.error(f"No score matrix found for '{args.report}'. Re-run batch_runner to create one.")
+        return
+    matrix, agent_ids, dimensions = stored
+
+    try:
+        with args.weights.open("r", encoding="utf-8") as wf:
+            weights = json.load(wf)
+    except Exception as e:
+        logging.error(f"Failed to load weights file '{args.weights}': {e}")
+        return
+
+    start = time.perf_counter()
+    final, order = rerank(matrix, weights, top_k=args.top, dimensions=dimensions)
+    elapsed = (time.perf_counter() - start) * 1000
+    logging.info(f"Re-ranked {len(final)} items in {elapsed:.2f} ms")
+
+    print(f"\nLeaderboard – re-weighted with '{args.weights}'")
+    for idx, row in enumerate(order, start=1):
+        print(f"{idx}. {agent_ids[row]} – Final: {final[row]:.2f} pts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+# Fixed column order for every scored item
+DIMENSIONS = (
+    "instruction_following",
+    "coherence_accuracy",
+    "hallucination_detection",
+    "style_matching",
+    "length_penalty",
+    "assumption_control"
+)
+FINAL = "final"
+SCORE_FIELDS = DIMENSIONS + (FINAL,)
+
+# Older LLM reports spell some dimensions differently
+ALIASES = {"coherence_accuracy": "coherence_&_accuracy"}
+
+# Longer strings (LLM explanations) are nearly always unique; interning them only grows the table
+_INTERN_MAX_LEN = 128
+
+_layouts: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _layout(keys) -> Tuple[str, ...]:
+    """
+    Returns the shared tuple for a key order, so records with the same keys
+    point at one object instead of carrying their own.
+    """
+    keys = tuple(keys)
+    layout = _layouts.get(keys)
+    if layout is None:
+        layout = _layouts[keys] = tuple(sys.intern(k) if isinstance(k, str) else k for k in keys)
+    return layout
+
+
+def _intern(value):
+    if isinstance(value, str) and len(value) <= _INTERN_MAX_LEN:
+        return sys.intern(value)
+    return value
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+@dataclass(slots=True, eq=False)
+class EvalResult:
+    """
+    Compact record for one scored item.
+
+    Scores live in a float array whose key order is a shared layout tuple
+    (normally SCORE_FIELDS); `int_mask` remembers which values were ints so
+    `to_dict` reproduces the original JSON exactly. Explanations are a tuple
+    aligned to their own shared layout, with short strings interned.
+    Malformed score/explanation payloads (non-dicts, non-numeric scores)
+    are kept verbatim with a `None` layout. Records read from JSON keep
+    their top-level key order in `field_order`.
+    """
+    agent_id: Any
+    prompt: Optional[str] = None
+    response: Optional[str] = None
+    score_keys: Optional[Tuple[str, ...]] = SCORE_FIELDS
+    score_values: Any = None
+    int_mask: int = 0
+    explanation_keys: Optional[Tuple[str, ...]] = DIMENSIONS
+    explanation_values: Any = ()
+    extra: Optional[Dict[str, Any]] = None
+    field_order: Optional[Tuple[str, ...]] = None
+
+    @classmethod
+    def from_scores(cls, agent_id, scores: Any, explanations: Any,
+                    prompt: Optional[str] = None, response: Optional[str] = None,
+                    extra: Optional[Dict[str, Any]] = None) -> "EvalResult":
+        result = cls(agent_id, prompt, response, extra=extra or None)
+        result._set_scores(scores)
+        result._set_explanations(explanations)
+        return result
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, Any]) -> "EvalResult":
+        extra = {k: v for k, v in record.items()
+                 if k not in ("agent_id", "prompt", "response", "scores", "explanations")}
+        result = cls.from_scores(
+            record.get("agent_id"),
+            record.get("scores", {}),
+            record.get("explanations", {}),
+            prompt=record.get("prompt"),
+            response=record.get("response"),
+            extra=extra
+        )
+        result.field_order = _layout(record)
+        return result
+
+    def _set_scores(self, scores: Any) -> None:
+        if isinstance(scores, dict) and all(_is_number(v) for v in scores.values()):
+            self.score_keys = _layout(scores)
+            self.score_values = array("d", scores.values())
+            self.int_mask = sum(1 << i for i, v in enumerate(scores.values()) if isinstance(v, int))
+        else:
+            self.score_keys, self.score_values, self.int_mask = None, scores, 0
+
+    def _set_explanations(self, explanations: Any) -> None:
+        if isinstance(explanations, dict):
+            self.explanation_keys = _layout(explanations)
+            self.explanation_values = tuple(_intern(v) for v in explanations.values())
+        else:
+            self.explanation_keys, self.explanation_values = None, explanations
+
+    # ── score access ──────────────────────────────────────────
+    def score(self, dim: str, default: float = 0.0) -> float:
+        keys = self.score_keys
+        if keys is None:
+            return default
+        if dim not in keys:
+            dim = ALIASES.get(dim, dim)
+            if dim not in keys:
+                return default
+        return self.score_values[keys.index(dim)]
+
+    def has_score(self, dim: str) -> bool:
+        keys = self.score_keys
+        return keys is not None and (dim in keys or ALIASES.get(dim) in keys)
+
+    def set_score(self, dim: str, value: float) -> None:
+        if self.score_keys is None:
+            # Malformed payload kept verbatim: update it in place like the plain dict it was
+            if not isinstance(self.score_values, dict):
+                raise TypeError(f"cannot set score '{dim}' on non-dict scores of agent {self.agent_id!r}")
+            self.score_values[dim] = value
+            return
+        if dim in self.score_keys:
+            i = self.score_keys.index(dim)
+        else:
+            i = len(self.score_keys)
+            self.score_keys = _layout(self.score_keys + (dim,))
+            self.score_values.append(0.0)
+            if self.field_order is not None and "scores" not in self.field_order:
+                self.field_order = _layout(self.field_order + ("scores",))
+        self.score_values[i] = value
+        if isinstance(value, int) and not isinstance(value, bool):
+            self.int_mask |= 1 << i
+        else:
+            self.int_mask &= ~(1 << i)
+
+    def score_vector(self, dims: Sequence[str] = SCORE_FIELDS, default: float = 0.0) -> list:
+        return [self.score(d, default) for d in dims]
+
+    def explanation(self, dim: str, default: str = "") -> Any:
+        keys = self.explanation_keys
+        if keys is None:
+            return default
+        if dim not in keys:
+            dim = ALIASES.get(dim, dim)
+            if dim not in keys:
+                return default
+        return self.explanation_values[keys.index(dim)]
+
+    @property
+    def scores(self) -> Any:
+        if self.score_keys is None:
+            return self.score_values
+        mask = self.int_mask
+        return {
+            k: int(v) if mask >> i & 1 else v
+            for i, (k, v) in enumerate(zip(self.score_keys, self.score_values))
+        }
+
+    @property
+    def explanations(self) -> Any:
+        if self.explanation_keys is None:
+            return self.explanation_values
+        return dict(zip(self.explanation_keys, self.explanation_values))
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """
+        dict-style access to top-level fields (domain, reference, ...).
+        """
+        if field in ("agent_id", "prompt", "response"):
+            value = getattr(self, field)
+            return default if value is None else value
+        if field in ("scores", "explanations"):
+            return getattr(self, field)
+        return (self.extra or {}).get(field, default)
+
+    # ── serialization ─────────────────────────────────────────
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        The report JSON shape: agent_id, prompt, response, scores, explanations, extras.
+        """
+        record = {
+            "agent_id": self.agent_id,
+            "prompt": self.prompt,
+            "response": self.response,
+            "scores": self.scores,
+            "explanations": self.explanations
+        }
+        extra = self.extra or {}
+        record.update(extra)
+        if self.field_order is None:
+            return {k: v for k, v in record.items() if v is not None or k not in ("prompt", "response")}
+        ordered = {k: record[k] for k in self.field_order}
+        ordered.update((k, v) for k, v in extra.items() if k not in ordered)
+        return ordered
+
+
+def apply_weights(result: EvalResult, weights: Dict[str, float]) -> None:
+    """
+    Sets `final` to the weighted sum of the result's scores (missing dimensions count as 0).
+    """
+    total = 0.0
+    for dim, w in weights.items():
+        score = result.score(dim) if result.has_score(dim) else 0.0
+        total += score * w
+    result.set_score(FINAL, round(total, 2))
@@ -0,0 +1,89 @@
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from evaluation.result import DIMENSIONS, EvalResult
+
+MATRIX_SUFFIX = ".scores.npz"
+
+
+def matrix_path(report_path: Path) -> Path:
+    """
+    eval_report.json → eval_report.scores.npz
+    """
+    report_path = Path(report_path)
+    return report_path.with_name(report_path.stem + MATRIX_SUFFIX)
+
+
+def build_score_matrix(results: Sequence[EvalResult]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Raw dimension scores as an (items × DIMENSIONS) float64 matrix, plus agent ids.
+    Missing scores are 0.0, as in the weighted `final`.
+    """
+    matrix = np.zeros((len(results), len(DIMENSIONS)), dtype=np.float64)
+    for i, r in enumerate(results):
+        if r.score_keys:
+            # Legacy spellings (coherence_&_accuracy) are read through EvalResult's aliases
+            matrix[i] = [r.score(dim) if r.has_score(dim) else 0.0 for dim in DIMENSIONS]
+    agent_ids = np.array([str(r.agent_id) for r in results])
+    return matrix, agent_ids
+
+
+def write_score_matrix(report_path: Path, results: Sequence[EvalResult]) -> Path:
+    return save_score_matrix(report_path, *build_score_matrix(results))
+
+
+def save_score_matrix(report_path: Path, matrix: np.ndarray, agent_ids: np.ndarray) -> Path:
+    path = matrix_path(report_path)
+    with path.open("wb") as f:
+        np.savez(f, matrix=matrix, agent_ids=agent_ids, dimensions=np.array(DIMENSIONS))
+    return path
+
+
+def load_score_matrix(report_path: Path) -> Optional[Tuple[np.ndarray, np.ndarray, list]]:
+    """
+    (matrix, agent_ids, dimensions) for a report, or None if it has no stored matrix.
+    """
+    path = matrix_path(report_path)
+    if not path.exists():
+        return None
+    with np.load(path) as npz:
+        return npz["matrix"], npz["agent_ids"], npz["dimensions"].tolist()
+
+
+def weight_vector(weights: Dict[str, float], dimensions: Sequence[str] = DIMENSIONS) -> np.ndarray:
+    return np.array([weights.get(dim, 0.0) for dim in dimensions], dtype=np.float64)
+
+
+def _round2(values: np.ndarray) -> np.ndarray:
+    # np.round scales by 100 first, so near-ties can round differently from
+    # Python's round(); those few are redone with round() itself
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    near_tie = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    rounded[near_tie] = [round(v, 2) for v in values[near_tie].tolist()]
+    return rounded
+
+
+def rerank(matrix: np.ndarray, weights: Dict[str, float], top_k: int = None,
+           dimensions: Sequence[str] = DIMENSIONS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Recomputes `final` for every row, one column at a time in the same
+    order as apply_weights so the rounded values match it exactly, and
+    returns (final, order): order lists row indices best first, limited to
+    the top `top_k` when given (argpartition, then sort only those).
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    columns = {dim: j for j, dim in enumerate(dimensions)}
+    final = np.zeros(len(matrix))
+    for dim, w in weights.items():
+        if dim in columns:
+            final += matrix[:, columns[dim]] * w
+    final = _round2(final)
+    if top_k is None or top_k >= len(final):
+        order = np.argsort(-final, kind="stable")
+    else:
+        top = np.argpartition(-final, top_k)[:top_k]
+        order = top[np.argsort(-final[top], kind="stable")]
+    return final, order
@@ -0,0 +1,57 @@
+import hashlib
+import importlib.util
+import json
+from functools import lru_cache
+from typing import Dict
+
+from evaluation.embeddings import load_config
+from evaluation.result import DIMENSIONS
+
+# Source modules whose code (cue lists, thresholds, formulas) determines each dimension
+SCORER_MODULES = {
+    "instruction_following": ("evaluation.instruction_following", "evaluation.embeddings"),
+    # Batch scorers take word counts and compiled cue patterns from columnar
+    "coherence_accuracy": ("evaluation.coherence_accuracy", "evaluation.columnar"),
+    "hallucination_detection": ("evaluation.hallucination_detection", "evaluation.columnar"),
+    "style_matching": ("evaluation.style_matching", "evaluation.columnar"),
+    "length_penalty": ("evaluation.length_penalty", "evaluation.columnar"),
+    "assumption_control": ("evaluation.assumption_control", "evaluation.columnar")
+}
+
+
+def _config(dim: str) -> str:
+    if dim == "instruction_following":
+        # The ONNX backend scores slightly differently from PyTorch
+        config = load_config()
+        return json.dumps({"backend": config["backend"], "onnx_path": config["onnx_path"]}, sort_keys=True)
+    return ""
+
+
+@lru_cache(maxsize=None)
+def scorer_fingerprint(dim: str) -> str:
+    """
+    Short hash of a scorer's source files and relevant config. Reads the
+    files without importing them, so no models are loaded.
+    """
+    h = hashlib.sha1()
+    for module in SCORER_MODULES[dim]:
+        with open(importlib.util.find_spec(module).origin, "rb") as f:
+            h.update(f.read())
+    h.update(_config(dim).encode("utf-8"))
+    return h.hexdigest()[:12]
+
+
+@lru_cache(maxsize=1)
+def scorer_versions() -> Dict[str, str]:
+    """
+    {dimension: fingerprint}; one shared dict per process, treat as read-only.
+    """
+    return {dim: scorer_fingerprint(dim) for dim in DIMENSIONS}
+
+
+def stale_dimensions(stored: Dict[str, str], current: Dict[str, str]) -> list:
+    """
+    Dimensions whose stored version is missing or differs from the current one.
+    """
+    stored = stored if isinstance(stored, dict) else {}
+    return [dim for dim in DIMENSIONS if stored.get(dim) != current.get(dim)]
@@ -0,0 +1,210 @@
+import argparse
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FuturesTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, List, Sequence
+
+from evaluation.result import EvalResult, apply_weights
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item requests into batches. A batch is
+    flushed once it holds `max_batch` items or `max_wait_ms` after its
+    first item arrived, whichever comes first.
+    """
+
+    def __init__(self, score_fn: Callable[[Sequence[dict]], List], max_batch: int = 32, max_wait_ms: float = 10.0):
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, item: dict) -> Future:
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            futures = [f for _, f in batch]
+            try:
+                results = list(self.score_fn([item for item, _ in batch]))
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+                if len(results) < len(futures):
+                    error = RuntimeError(f"score_fn returned {len(results)} results for {len(futures)} items")
+                    for future in futures[len(results):]:
+                        future.set_exception(error)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            self.batches += 1
+            self.items += len(batch)
+
+
+class ScoringService:
+    """
+    Keeps the scorers warm and serves them over HTTP:
+      POST /score   {"agent_id", "prompt", "response"}  → report-shaped record
+      POST /score   {"items": [...]}                   → {"results": [...]}
+      GET  /health                                     → batching and latency stats
+    """
+
+    def __init__(self, score_fn: Callable, weights: dict = None, max_batch: int = 32,
+                 max_wait_ms: float = 10.0, timeout: float = 30.0):
+        self.batcher = MicroBatcher(score_fn, max_batch, max_wait_ms)
+        self.weights = weights or {}
+        self.timeout = timeout
+        self.requests = 0  # all served requests; latencies keep only the most recent
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=10000)
+
+    def score(self, items: Sequence[dict]) -> List[dict]:
+        start = time.perf_counter()
+        futures = [self.batcher.submit(item) for item in items]
+        records = []
+        for future in futures:
+            try:
+                result: EvalResult = future.result(timeout=self.timeout)
+            except FuturesTimeout:
+                raise TimeoutError(f"no score within {self.timeout:g}s (batch still running or scorer stuck)") from None
+            if self.weights:
+                apply_weights(result, self.weights)
+            records.append(result.to_dict())
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(time.perf_counter() - start)
+        return records
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests, latencies = self.requests, sorted(self._latencies)
+
+        def pct(p):
+            return round(latencies[min(int(p * len(latencies)), len(latencies) - 1)] * 1000, 2) if latencies else None
+
+        batcher = self.batcher
+        return {
+            "status": "ok",
+            "requests": requests,
+            "items": batcher.items,
+            "batches": batcher.batches,
+            "mean_batch_size": round(batcher.items / batcher.batches, 2) if batcher.batches else 0.0,
+            "latency_ms": {"p50": pct(0.50), "p99": pct(0.99)}
+        }
+
+
+def make_handler(service: ScoringService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, service.stats())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/score":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except (ValueError, json.JSONDecodeError) as e:
+                self._send(400, {"error": f"invalid JSON: {e}"})
+                return
+
+            batched = isinstance(payload, dict) and "items" in payload
+            items = payload["items"] if batched else [payload]
+            if not isinstance(items, list) or not all(isinstance(i, dict) and "response" in i for i in items):
+                self._send(400, {"error": "each item needs at least a 'response' field"})
+                return
+
+            try:
+                records = service.score(items)
+            except Exception as e:
+                logging.error(f"❌ Scoring failed: {e}")
+                self._send(500, {"error": str(e)})
+                return
+            self._send(200, {"results": records} if batched else records[0])
+
+        def log_message(self, fmt, *args):
+            logging.debug(fmt % args)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the heuristic evaluator over HTTP with micro-batching.")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument("--weights", "-w", type=Path, default=None,
+                        help="Optional JSON file with weights per dimension (adds 'final').")
+    parser.add_argument("--max_batch", type=int, default=32,
+                        help="Largest micro-batch handed to the evaluator.")
+    parser.add_argument("--max_wait_ms", type=float, default=10.0,
+                        help="How long the first request in a batch may wait for company.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S")
+
+    weights = {}
+    if args.weights:
+        with args.weights.open("r", encoding="utf-8") as wf:
+            weights = json.load(wf)
+
+    from evaluation.evaluator import evaluate_batch
+
+    # Load the embedding model and LanguageTool before taking traffic
+    evaluate_batch([{"agent_id": "warmup", "prompt": "Say hello.", "response": "Hello there."}])
+    logging.info("Models warm")
+
+    service = ScoringService(evaluate_batch, weights, args.max_batch, args.max_wait_ms)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    logging.info(f"Scoring service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
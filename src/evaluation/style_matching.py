@@ -1,11 +1,16 @@
 import re
-from typing import Dict
+from typing import Dict, Sequence
+
+import numpy as np
+
+from evaluation.columnar import BatchScores, TextColumn, as_column, compile_cues
 
 # Informal cues to penalize
 INFORMAL_PHRASES = [
     r"\byou know\b", r"\blike\b", r"\bbasically\b", r"\bkinda\b",
     r"\bwhatever\b", r"\bjust saying\b", r"\buh\b", r"\bum\b"
 ]
+_CUES = compile_cues(INFORMAL_PHRASES)
 
 def score_style_matching(response: str) -> Dict:
     """
@@ -18,3 +23,11 @@ def score_style_matching(response: str) -> Dict:
     score = round(10.0 - deduction, 2)
     explanation = f"{hits} informal phrase{'s' if hits != 1 else ''} detected"
     return {"score": score, "explanation": explanation}
+
+def score_style_matching_batch(responses: Sequence[str], column: TextColumn = None) -> BatchScores:
+    """
+    score_style_matching over a whole column of responses.
+    """
+    hits = as_column(responses, column).cue_hits(_CUES)
+    scores = 10.0 - np.minimum(hits * 2, 10)
+    return BatchScores(scores, lambda i: f"{hits[i]} informal phrase{'s' if hits[i] != 1 else ''} detected")
@@ -0,0 +1,53 @@
+import io
+import json
+import threading
+import time
+
+import pytest
+
+from evaluation.utils import add_references
+from evaluation.utils.add_references import _iter_json_array, generate_references, iter_records
+
+
+def test_json_array_is_read_element_by_element(tmp_path):
+    records = [{"agent_id": f"a{i}", "prompt": "p" * 300, "n": 1.5e3 + i} for i in range(20)]
+    text = json.dumps(records, indent=2)
+    for chunk_size in (1, 7, 1 << 16):
+        assert list(_iter_json_array(io.StringIO(text), chunk_size)) == records
+
+    path = tmp_path / "data.json"
+    path.write_text(text, encoding="utf-8")
+    assert list(iter_records(path)) == records
+
+    for bad in ("", "{}", "[1, 2", "[1 2]"):
+        with pytest.raises(json.JSONDecodeError):
+            list(_iter_json_array(io.StringIO(bad), 2))
+
+
+def test_pending_requests_are_bounded(monkeypatch):
+    lock = threading.Lock()
+    submitted, finished, peak = [0], [0], [0]
+
+    def fake_reference(prompt, model, api_key, cache):
+        time.sleep(0.001)
+        with lock:
+            finished[0] += 1
+        if prompt == "p13":
+            raise RuntimeError("rate limited")
+        return prompt.upper()
+
+    real_submit = add_references.ThreadPoolExecutor.submit
+
+    def counting_submit(pool, *args):
+        with lock:
+            submitted[0] += 1
+            peak[0] = max(peak[0], submitted[0] - finished[0])
+        return real_submit(pool, *args)
+
+    monkeypatch.setattr(add_references, "generate_reference", fake_reference)
+    monkeypatch.setattr(add_references.ThreadPoolExecutor, "submit", counting_submit)
+    prompts = {f"a{i}": f"p{i % 50}" for i in range(200)}
+    references = generate_references(prompts, workers=2)
+
+    assert peak[0] <= 2 * add_references.PENDING_PER_WORKER
+    assert len(references) == 196 and references["a1"] == "P1" and "a13" not in references
@@ -0,0 +1,46 @@
+import random
+import statistics
+
+from evaluation.aggregation import LeaderboardAggregator, RunningStats, TDigest
+from evaluation.result import EvalResult
+
+
+def test_running_stats_merge_matches_batch():
+    rng = random.Random(1)
+    xs = [rng.uniform(0, 10) for _ in range(1000)]
+    left, right = RunningStats(), RunningStats()
+    for i, x in enumerate(xs):
+        (left if i < 300 else right).add(x)
+    left.merge(right)
+    assert left.count == 1000
+    assert abs(left.mean - statistics.fmean(xs)) < 1e-9
+    assert abs(left.std - statistics.pstdev(xs)) < 1e-9
+    assert (left.min, left.max) == (min(xs), max(xs))
+
+
+def test_tdigest_quantiles_after_merge():
+    rng = random.Random(2)
+    xs = [rng.gauss(5, 2) for _ in range(50000)]
+    a, b = TDigest(), TDigest()
+    for i, x in enumerate(xs):
+        (a if i % 2 else b).add(x)
+    a.merge(b)
+    ordered = sorted(xs)
+    for q in (0.5, 0.9):
+        assert abs(a.quantile(q) - ordered[int(q * len(ordered))]) < 0.05
+    assert len(a.means) <= 100
+
+
+def test_top_k_and_serialized_partials():
+    parts = [LeaderboardAggregator(), LeaderboardAggregator()]
+    for i in range(200):
+        agent = f"agent{i % 5}"
+        result = EvalResult.from_scores(agent, {"final": float(i % 5) + (i % 3) * 0.1}, {})
+        parts[i % 2].add(result)
+    merged = LeaderboardAggregator.from_dict(parts[0].to_dict())
+    merged.merge(parts[1])
+
+    assert merged.items == 200 and len(merged) == 5
+    top = merged.top_k(2)
+    assert [agent for agent, _ in top] == ["agent4", "agent3"]
+    assert top[0][1]["count"] == 40
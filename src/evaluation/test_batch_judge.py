@@ -0,0 +1,83 @@
+import json
+import re
+import threading
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from evaluation.batch_judge import BatchClient, run_batch_judge
+from evaluation.result import DIMENSIONS
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """
+    Just enough of the /files and /batches API: the batch completes on the
+    second status poll; item 1 gets an unparsable reply, item 2 an HTTP error,
+    item 3 a truncated output line.
+    """
+    files, batches = {}, {}
+
+    def _send(self, payload, raw=False):
+        body = payload if raw else json.dumps(payload).encode()
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/files":
+            msg = BytesParser().parsebytes(b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + body)
+            content = next(p.get_payload(decode=True) for p in msg.get_payload() if p.get_filename())
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = content
+            return self._send({"id": file_id})
+        request = json.loads(body)
+        batch_id = f"batch-{len(self.batches)}"
+        self.batches[batch_id] = {"id": batch_id, "status": "in_progress", "polls": 0,
+                                  "input": request["input_file_id"]}
+        self._send({"id": batch_id, "status": "validating"})
+
+    def do_GET(self):
+        match = re.fullmatch(r"/files/(.+)/content", self.path)
+        if match:
+            return self._send(self.files[match.group(1)], raw=True)
+        batch = self.batches[self.path.rsplit("/", 1)[1]]
+        batch["polls"] += 1
+        if batch["polls"] >= 2 and batch["status"] != "completed":
+            lines = []
+            for line in self.files[batch["input"]].decode().splitlines():
+                req = json.loads(line)
+                i = int(req["custom_id"])
+                reply = json.dumps({"scores": {d: i % 11 for d in DIMENSIONS},
+                                    "explanations": {d: "ok" for d in DIMENSIONS}})
+                if i == 1:
+                    reply = "not json"
+                status = 500 if i == 2 else 200
+                lines.append(json.dumps({"custom_id": req["custom_id"], "response": {
+                    "status_code": status, "body": {"choices": [{"message": {"content": reply}}]}}}))
+                if i == 3:
+                    lines[-1] = lines[-1][:-20]  # truncated line
+            lines.append("}{ not even a record")
+            self.files["file-out"] = "\n".join(reversed(lines)).encode()
+            batch.update(status="completed", output_file_id="file-out")
+        self._send({k: v for k, v in batch.items() if k not in ("polls", "input")})
+
+    def log_message(self, *args):
+        pass
+
+
+def test_submit_poll_and_join_by_custom_id(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = BatchClient(f"http://127.0.0.1:{server.server_address[1]}", api_key="test")
+
+    items = [{"agent_id": f"a{i}", "prompt": "p", "response": f"r{i}"} for i in range(6)]
+    results, failures = run_batch_judge(items, tmp_path / "report.json", client, "m",
+                                        weights={"style_matching": 1.0}, poll_s=0.01)
+    server.shutdown()
+
+    assert [r.agent_id for r in results] == ["a0", "a4", "a5"]
+    assert results[1].score("style_matching") == 4 and results[1].score("final") == 4
+    assert [f["agent_id"] for f in failures] == ["a1", "a2", "a3"]
+    assert "invalid judge output" in failures[0]["error"]
+    assert "malformed batch output line" in failures[2]["error"]
+    assert not (tmp_path / "report.batch.json").exists()
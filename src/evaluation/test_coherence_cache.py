@@ -0,0 +1,99 @@
+import sys
+import time
+from types import SimpleNamespace
+
+from evaluation import coherence_accuracy
+from evaluation.cache import DiskCache
+
+
+class FakeTool:
+    """
+    Flags every occurrence of "teh" and records what it was asked to check.
+    Like LanguageTool on joined text, it also flags every sentence after
+    the first with a context rule and each paragraph break itself.
+    """
+
+    def __init__(self):
+        self.checked = []
+        self.disabled_rules = set()
+
+    def check(self, text):
+        self.checked.append(text)
+        start = text.find("teh")
+        matches = []
+        while start != -1:
+            matches.append(SimpleNamespace(offset=start, errorLength=3, ruleId="MORFOLOGIK_RULE_EN_US"))
+            start = text.find("teh", start + 1)
+        start = text.find("\n\n")
+        while start != -1:
+            matches.append(SimpleNamespace(offset=start - 1, errorLength=3, ruleId="PARAGRAPH_BREAK"))
+            matches.append(SimpleNamespace(offset=start + 2, errorLength=4, ruleId="ENGLISH_WORD_REPEAT_BEGINNING_RULE"))
+            start = text.find("\n\n", start + 1)
+        return matches
+
+
+def test_sentences_are_checked_once_and_counts_reaggregated(tmp_path, monkeypatch):
+    fake = FakeTool()
+    monkeypatch.setattr(coherence_accuracy, "tool", fake)
+    monkeypatch.setattr(coherence_accuracy, "_cache", DiskCache(tmp_path / "grammar.sqlite"))
+    monkeypatch.setattr(coherence_accuracy, "CHUNK_CHARS", 40)
+
+    boilerplate = "Thank you for teh question."
+    responses = [
+        f"{boilerplate} Teh answer is teh number four.",
+        f"{boilerplate} It depends on context!",
+        "",
+    ]
+    batch = coherence_accuracy.score_coherence_accuracy_batch(responses)
+    assert [batch.explanation(i).split()[0] for i in range(3)] == ["2", "1", "0"]
+    assert list(batch) == [coherence_accuracy.score_coherence_accuracy(r) for r in responses]
+
+    checked = "\n\n".join(fake.checked)
+    assert checked.count(boilerplate) == 1  # shared sentence checked once, then cached
+    assert len(fake.checked) > 1  # misses were split into several chunks
+
+
+def test_cold_start_creates_one_language_tool(monkeypatch):
+    started = []
+
+    class SlowTool(FakeTool):
+        def __init__(self, language):
+            time.sleep(0.05)  # wide enough for every worker to see tool is None
+            started.append(self)
+            super().__init__()
+
+    monkeypatch.setitem(sys.modules, "language_tool_python", SimpleNamespace(LanguageTool=SlowTool))
+    monkeypatch.setattr(coherence_accuracy, "tool", None)
+    monkeypatch.setattr(coherence_accuracy, "_cache", None)
+    monkeypatch.setattr(coherence_accuracy, "CACHE_PATH", "")
+    monkeypatch.setattr(coherence_accuracy, "CHUNK_CHARS", 10)
+
+    counts = coherence_accuracy.sentence_error_counts([f"Sentence {i} has teh typo." for i in range(8)])
+    assert len(started) == 1 and coherence_accuracy.CONTEXT_RULES <= started[0].disabled_rules
+    assert set(counts.values()) == {1}
+
+
+def test_counts_do_not_depend_on_chunk_neighbours(monkeypatch):
+    monkeypatch.setattr(coherence_accuracy, "_cache", None)
+    monkeypatch.setattr(coherence_accuracy, "CACHE_PATH", "")
+    sentences = ["The cat sat.", "The dog ran teh race.", "The end came.", "Alone teh word."]
+
+    def counts(chunk_chars):
+        monkeypatch.setattr(coherence_accuracy, "tool", FakeTool())
+        monkeypatch.setattr(coherence_accuracy, "CHUNK_CHARS", chunk_chars)
+        return coherence_accuracy.sentence_error_counts(sentences)
+
+    assert counts(10) == counts(10000) == {s: s.count("teh") for s in sentences}
+
+
+def test_cached_counts_are_keyed_by_checker_version(tmp_path, monkeypatch):
+    fake = FakeTool()
+    monkeypatch.setattr(coherence_accuracy, "tool", fake)
+    monkeypatch.setattr(coherence_accuracy, "_cache", DiskCache(tmp_path / "grammar.sqlite"))
+
+    coherence_accuracy.sentence_error_counts(["One teh."])
+    coherence_accuracy.sentence_error_counts(["One teh."])
+    assert len(fake.checked) == 1
+    monkeypatch.setattr(coherence_accuracy, "checker_version", lambda: "upgraded")
+    coherence_accuracy.sentence_error_counts(["One teh."])
+    assert len(fake.checked) == 2
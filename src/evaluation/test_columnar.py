@@ -0,0 +1,57 @@
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+
+from evaluation.assumption_control import score_assumption_control, score_assumption_control_batch
+from evaluation.columnar import TextColumn
+from evaluation.hallucination_detection import score_hallucination, score_hallucination_batch
+from evaluation.length_penalty import score_length_penalty, score_length_penalty_batch
+from evaluation.style_matching import score_style_matching, score_style_matching_batch
+
+PAIRS = [
+    (score_hallucination, score_hallucination_batch),
+    (score_style_matching, score_style_matching_batch),
+    (score_length_penalty, score_length_penalty_batch),
+    (score_assumption_control, score_assumption_control_batch)
+]
+
+EDGE_CASES = [
+    "",
+    "   ",
+    "Clearly, OBVIOUSLY it might be, like, basically fine.",
+    "you know words　split\x1con odd spaces",
+    "nul\x00inside clearly",
+    "ΣΊΣΥΦΟΣ probably perhaps, whatever. İstanbul might be clearly",
+    "one two three four five six seven eight nine ten " * 6,
+    "probably"
+]
+
+
+def _responses():
+    data = Path(__file__).parent / "data" / "sample_responses.json"
+    with data.open("r", encoding="utf-8") as f:
+        return [item["response"] for item in json.load(f)] + EDGE_CASES
+
+
+def test_batch_scorers_match_single_item_scorers():
+    responses = _responses()
+    column = TextColumn(responses)
+    for single, batch in PAIRS:
+        scored = batch(responses, column)
+        assert isinstance(scored.scores, np.ndarray)
+        assert list(scored) == [single(r) for r in responses], single.__name__
+
+
+def test_word_counts_match_str_split():
+    responses = _responses()
+    assert TextColumn(responses).word_counts.tolist() == [len(r.split()) for r in responses]
+    assert TextColumn([]).word_counts.tolist() == []
+
+
+def test_cue_matches_do_not_cross_rows():
+    texts = ["xa", "by", "xy", "zy z", "a b", ""]
+    patterns = [re.compile(p) for p in (r"a.b", r"[^a-z]b", r"y.?z", r"\s", r"a\W*b")]
+    expected = [sum(p.search(t) is not None for p in patterns) for t in texts]
+    assert TextColumn(texts).cue_hits(patterns).tolist() == expected
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from evaluation.downsample import box_stats, downsample_series, histogram, lttb
+
+
+def test_lttb_bounds_points_and_keeps_extremes():
+    rng = np.random.default_rng(0)
+    y = rng.normal(5, 1, 100_000)
+    y[31_337], y[77_777] = 40.0, -30.0
+    idx = lttb(y, 500)
+    assert len(idx) == 500 and idx[0] == 0 and idx[-1] == len(y) - 1
+    assert np.all(np.diff(idx) > 0)
+    assert {31_337, 77_777} <= set(idx.tolist())
+    assert len(lttb(y[:100], 500)) == 100
+
+
+def test_downsample_series_drops_nan_and_is_bounded():
+    s = pd.Series(np.r_[np.arange(5000.0), np.nan])
+    out = downsample_series(s, 100)
+    assert len(out) == 100 and not out.isna().any()
+
+
+def test_histogram_and_box_stats():
+    frame = pd.DataFrame({"a": [0.0, 2.5, 5.0, 7.5, 10.0, np.nan], "b": [1.0] * 5 + [100.0]})
+    counts = histogram(frame, ["a"], bins=4)
+    assert counts["a"].tolist() == [1, 1, 1, 2]
+
+    stats = box_stats(frame, ["a", "b"])
+    assert stats["a"]["median"] == 5.0 and stats["a"]["count"] == 5
+    assert stats["b"]["upperfence"] == 1.0  # 100 is an outlier
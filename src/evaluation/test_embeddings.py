@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+pytest.importorskip("onnxruntime", reason="onnxruntime is not installed; the ONNX backend checks need it")
+pytest.importorskip("sentence_transformers", reason="sentence-transformers is not installed; it is the reference backend")
+from evaluation.embeddings import get_encoder, load_config
+
+ONNX_PATH = ROOT / load_config(ROOT / "config" / "embedding.json")["onnx_path"]
+if not ONNX_PATH.exists():
+    pytest.skip(f"int8 drift check needs the exported model at {ONNX_PATH}; "
+                "run `python src/evaluation/export_onnx.py` first", allow_module_level=True)
+
+# Instruction-following scores are cos_sim * 10; int8 drift must stay below this
+MAX_SCORE_DRIFT = 0.25
+
+data = json.loads((Path(__file__).parent / "data" / "real_responses.json").read_text(encoding="utf-8"))[:100]
+prompts = [d["prompt"] for d in data]
+responses = [d["response"] for d in data]
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    # The embedding config and its model path are relative to the repository root
+    monkeypatch.chdir(ROOT)
+
+
+def pair_scores(backend):
+    encoder = get_encoder(backend)
+    p, r = encoder.encode(prompts), encoder.encode(responses)
+    return (p * r).sum(axis=1) * 10
+
+
+def test_onnx_matches_torch_scores():
+    drift = np.abs(pair_scores("onnx") - pair_scores("torch"))
+    assert drift.max() < MAX_SCORE_DRIFT
+
+
+def test_empty_batch_keeps_embedding_width():
+    assert get_encoder("onnx").encode([]).shape == get_encoder("torch").encode([]).shape
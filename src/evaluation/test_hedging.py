@@ -0,0 +1,52 @@
+import time
+
+from evaluation.hedging import Hedger
+
+
+def slow(value, delay):
+    def call():
+        time.sleep(delay)
+        return value
+    return call
+
+
+def failing():
+    raise ValueError("invalid judge output")
+
+
+def test_backup_wins_when_primary_straggles():
+    hedger = Hedger(budget=1.0, initial_delay=0.05)
+    start = time.perf_counter()
+    assert hedger.call(slow("primary", 1.0), slow("backup", 0.01)) == "backup"
+    assert time.perf_counter() - start < 0.5
+    assert hedger.report()["backup_wins"] == 1
+
+
+def test_fast_primary_is_not_hedged():
+    hedger = Hedger(budget=1.0, initial_delay=0.5)
+    assert hedger.call(slow("primary", 0.01), slow("backup", 0.01)) == "primary"
+    assert hedger.report()["hedges"] == 0
+
+
+def test_invalid_primary_falls_back():
+    hedger = Hedger(budget=1.0, initial_delay=0.5)
+    assert hedger.call(failing, slow("backup", 0.01)) == "backup"
+
+
+def test_budget_caps_hedges():
+    hedger = Hedger(budget=0.25, initial_delay=0.01)
+    for _ in range(8):
+        hedger.call(slow("primary", 0.03), slow("backup", 0.0))
+    assert hedger.report()["hedges"] <= 2
+
+
+def test_backups_do_not_queue_behind_abandoned_primaries():
+    hedger = Hedger(budget=1.0, initial_delay=0.02, max_workers=2, backup_workers=2)
+    start = time.perf_counter()
+    for _ in range(4):
+        assert hedger.call(slow("primary", 1.0), slow("backup", 0.01)) == "backup"
+    report = hedger.report()
+    # Later primaries queue behind the two abandoned ones (and are cancelled), but backups answer at once
+    assert time.perf_counter() - start < 0.5
+    assert report["primary_unfinished"] == 2 and report["p99_primary"] > 0
+    hedger.shutdown()
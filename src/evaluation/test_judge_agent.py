@@ -1,4 +1,4 @@
-from judge_agent import evaluate_with_llm
+from evaluation.judge_agent import evaluate_with_llm
 
 prompt = "Explain the concept of recursion in programming."
 response = "Recursion is when a function calls itself to solve smaller instances of a problem."
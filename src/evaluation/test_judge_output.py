@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from evaluation.evaluate_with_llm import (
+    JudgeParseError,
+    judge_stats,
+    judge_with_repair,
+    parse_judge_output,
+)
+from evaluation.result import DIMENSIONS
+
+valid = json.dumps({
+    "scores": {dim: 7 for dim in DIMENSIONS},
+    "explanations": {dim: "Fine." for dim in DIMENSIONS}
+})
+
+
+def test_parses_valid_reply():
+    result = parse_judge_output(valid)
+    assert result["scores"]["style_matching"] == 7
+    assert set(result["explanations"]) == set(DIMENSIONS)
+
+
+@pytest.mark.parametrize("reply", [
+    "Scores: * **Instruction Following: 8**",
+    json.dumps({"scores": {"instruction_following": 8}, "explanations": {}}),
+    valid.replace("7", "11", 1),
+])
+def test_rejects_invalid_reply(reply):
+    with pytest.raises(JudgeParseError):
+        parse_judge_output(reply)
+
+
+def test_repair_is_asked_once_and_counted():
+    judge_stats(reset=True)
+    replies = iter(["not json", valid])
+    calls = []
+
+    def send(messages, repair=False):
+        calls.append(repair)
+        return next(replies)
+
+    result = judge_with_repair(send, "prompt", "response")
+    assert result["scores"]["length_penalty"] == 7
+    assert calls == [False, True]
+    stats = judge_stats()
+    assert stats["parse_failures"] == 1 and stats["repaired"] == 1
+
+
+def test_unrepairable_reply_raises():
+    with pytest.raises(JudgeParseError):
+        judge_with_repair(lambda messages, repair=False: "{}", "prompt", "response")
+    assert judge_stats()["dropped"] >= 1
+
+
+def test_only_parsed_results_are_cached(tmp_path, monkeypatch):
+    from evaluation import evaluate_with_llm as judge
+    from evaluation.cache import DiskCache
+    from evaluation.planner import build_workload
+
+    replies, sent = [], []
+
+    def fake_completion(messages, **kwargs):
+        sent.append(kwargs.get("max_tokens"))
+        return replies.pop(0)
+
+    monkeypatch.setattr(judge, "chat_completion", fake_completion)
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    cache = DiskCache(tmp_path / "judge.sqlite")
+    judge_stats(reset=True)
+
+    # Invalid twice: nothing is cached, so the next run asks again
+    replies[:] = ["nope", "still nope"]
+    with pytest.raises(JudgeParseError):
+        judge.evaluate_with_llm("p", "r", model="m", cache=cache)
+    # Invalid, then repaired: the repaired result is what gets cached
+    replies[:] = ["nope", valid]
+    first = judge.evaluate_with_llm("p", "r", model="m", cache=cache)
+    assert len(sent) == 4
+
+    assert judge.evaluate_with_llm("p", "r", model="m", cache=cache) == first
+    assert len(sent) == 4 and judge_stats()["cache_hits"] == 1
+    # The planner sees the same entry
+    assert build_workload([{"prompt": "p", "response": "r"}], "m", cache).cache_hits == 1
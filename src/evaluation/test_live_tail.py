@@ -0,0 +1,65 @@
+import json
+
+from evaluation.live_tail import LiveRun, live_path, open_live_file
+
+
+def line(agent_id, final, ts):
+    return json.dumps({"agent_id": agent_id, "scores": {"final": final}, "scored_at": ts}) + "\n"
+
+
+def test_poll_reads_only_complete_new_lines(tmp_path):
+    f = open_live_file(tmp_path / "run.json")
+    run = LiveRun(live_path(tmp_path / "run.json"), top_k=2)
+    f.write(line("a", 3.0, 1.0) + line("b", 9.0, 2.0) + line("c", 5.0, 3.0)[:10])
+    f.flush()
+    assert run.poll() == 2 and run.poll() == 0
+
+    f.write(line("c", 5.0, 3.0)[10:] + "not json\n")
+    f.close()
+    assert run.poll() == 1
+    assert run.count == 3 and run.bad_lines == 1
+    assert run.leaderboard() == [("b", 9.0), ("c", 5.0)]
+    assert run.means()["final"] == 17.0 / 3
+
+
+def test_restart_is_detected_even_after_the_file_grows_past_the_offset(tmp_path):
+    output = tmp_path / "run.json"
+    f = open_live_file(output)
+    f.write(line("old", 1.0, 1.0))
+    f.close()
+    run = LiveRun(live_path(output))
+    assert run.poll() == 1
+
+    f = open_live_file(output)
+    f.write("".join(line(f"new{i}", 7.0, i) for i in range(5)))
+    f.close()
+    assert run.poll() == 5
+    assert run.count == 5 and run.leaderboard()[0] == ("new4", 7.0)
+
+
+def test_files_without_a_header_are_still_tailed(tmp_path):
+    path = tmp_path / "legacy.live.jsonl"
+    path.write_text(line("a", 2.0, 1.0), encoding="utf-8")
+    run = LiveRun(path)
+    assert run.poll() == 1
+    with path.open("a", encoding="utf-8") as f:
+        f.write(line("b", 4.0, 2.0))
+    assert run.poll() == 1 and run.count == 2
+
+
+def test_runs_without_final_rank_by_the_first_dimension(tmp_path):
+    path = tmp_path / "unweighted.live.jsonl"
+    path.write_text("".join(json.dumps({"agent_id": a, "scores": {"instruction_following": s}}) + "\n"
+                            for a, s in (("a", 4.0), ("b", 7.0))), encoding="utf-8")
+    run = LiveRun(path)
+    run.poll()
+    assert run.rank_dim == "instruction_following" and run.leaderboard() == [("b", 7.0), ("a", 4.0)]
+
+
+def test_poll_reads_a_bounded_number_of_lines(tmp_path):
+    path = tmp_path / "big.live.jsonl"
+    path.write_text("".join(line(f"a{i}", float(i), i) for i in range(25)), encoding="utf-8")
+    run = LiveRun(path, max_lines=10)
+    assert [run.poll(), run.caught_up] == [10, False]
+    assert [run.poll(), run.poll(), run.caught_up] == [10, 5, True]
+    assert run.poll() == 0 and run.count == 25
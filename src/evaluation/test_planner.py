@@ -0,0 +1,45 @@
+import json
+from types import SimpleNamespace
+
+from evaluation import planner
+from evaluation.batch_runner import run_plan
+from evaluation.cache import DiskCache
+from evaluation.planner import build_workload, plan, simulate_key
+
+
+def test_rpm_and_tpm_limits_bound_the_schedule():
+    # 61 requests at 30 RPM: the 31st and 61st wait for the window to slide
+    assert 120 <= simulate_key([10] * 61, rpm=30, tpm=10**9, concurrency=4,
+                               base_latency=0.1, tokens_per_s=100, output_tokens=0) < 121
+    # 1000 tokens each at 2000 TPM: two per minute
+    assert 120 <= simulate_key([1000] * 5, rpm=30, tpm=2000, concurrency=1,
+                               base_latency=0.1, tokens_per_s=100, output_tokens=0) < 121
+
+
+def test_dedup_and_cache_hits(tmp_path):
+    items = [{"prompt": "p", "response": f"r{i % 3}"} for i in range(9)]
+    assert build_workload(items, "m").requests == 9
+
+    cache = DiskCache(tmp_path / "judge.sqlite")
+    workload = build_workload(items, "m", cache)
+    assert (workload.unique, workload.cache_hits, workload.requests) == (3, 0, 3)
+
+
+def test_more_keys_finish_sooner():
+    workload = build_workload([{"prompt": "p", "response": "word " * 50}] * 120, "llama-3.1-8b-instant")
+    one, four = plan(workload, "llama-3.1-8b-instant", [1, 4], [1], repair_rate=0)
+    assert four["wall_s"] < one["wall_s"] / 3
+    assert one["requests"] == four["requests"] == 120
+
+
+def test_plan_dedups_for_a_cache_file_not_created_yet(tmp_path, monkeypatch):
+    inputs = tmp_path / "items.json"
+    inputs.write_text(json.dumps([{"prompt": "p", "response": f"r{i % 3}"} for i in range(9)]), encoding="utf-8")
+    planned = []
+    monkeypatch.setattr(planner, "print_plan", lambda workload, rows, model: planned.append(workload))
+
+    args = SimpleNamespace(input=inputs, cache=tmp_path / "new.sqlite", model="m", plan_keys="1",
+                           plan_rpm=None, plan_tpm=None, plan_concurrency="1", plan_repair_rate=0.0)
+    run_plan(args)
+    assert (planned[0].unique, planned[0].requests) == (3, 3)
+    assert not args.cache.exists()
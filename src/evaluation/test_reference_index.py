@@ -0,0 +1,42 @@
+import numpy as np
+
+from evaluation.reference_alignment import score_reference_alignment_batch
+from evaluation.reference_index import ReferenceIndex, write_index
+
+
+def _unit(rows, dim, seed):
+    x = np.random.default_rng(seed).standard_normal((rows, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def test_blocked_search_matches_brute_force(tmp_path):
+    corpus = _unit(1000, 32, 0)
+    ids = [f"ref{i}" for i in range(len(corpus))]
+    write_index(tmp_path, ids, (corpus[i:i + 128] for i in range(0, len(corpus), 128)))
+    index = ReferenceIndex(tmp_path)
+    assert len(index) == 1000
+
+    queries = _unit(57, 32, 1)
+    sims, rows = index.search(queries, k=5, block_rows=100, query_block=16)
+
+    expected = np.argsort(-(queries @ corpus.T), axis=1)[:, :5]
+    assert np.array_equal(rows, expected)
+    assert np.allclose(sims, np.take_along_axis(queries @ corpus.T, expected, axis=1), atol=1e-6)
+
+
+def test_k_larger_than_block_and_corpus(tmp_path):
+    corpus = _unit(7, 8, 2)
+    write_index(tmp_path, [str(i) for i in range(7)], [corpus])
+    sims, rows = ReferenceIndex(tmp_path).search(corpus, k=10, block_rows=3)
+    assert rows.shape == (7, 7)
+    assert np.array_equal(rows[:, 0], np.arange(7))
+
+
+def test_empty_index_gives_no_match_scores(tmp_path):
+    assert write_index(tmp_path, [], []) == 0
+    index = ReferenceIndex(tmp_path)
+    sims, rows = index.search(_unit(3, 8, 3), k=2)
+    assert len(index) == 0 and sims.shape == rows.shape == (3, 0)
+
+    scored = score_reference_alignment_batch(["a", "b"], index)
+    assert [s["score"] for s in scored] == [10.0, 10.0] and scored[0]["matches"] == []
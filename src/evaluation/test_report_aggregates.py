@@ -0,0 +1,79 @@
+import json
+import math
+
+import numpy as np
+
+from evaluation import batch_runner
+from evaluation.batch_runner import run_batch_evaluation, save_outputs, write_report
+from evaluation.report_aggregates import agent_frame, build_aggregates, join_reports, load_or_build_sidecar, load_sidecar
+from evaluation.result import EvalResult
+from evaluation.score_matrix import build_score_matrix, load_score_matrix
+
+
+def result(agent_id, final, domain="chat"):
+    return EvalResult.from_scores(agent_id, {"instruction_following": final / 2, "final": final}, {},
+                                  extra={"domain": domain})
+
+
+def test_aggregates_index_first_occurrence_of_each_agent():
+    agg = build_aggregates([result("b", 4.0), result("a", 6.0, "code"), result("b", 9.0), result("c", 1.0)])
+    frame = agent_frame(agg)
+    assert frame.index.tolist() == ["a", "b", "c"]
+    assert frame.loc["b", "final"] == 4.0 and frame.loc["b", "row"] == 0
+    assert frame.loc["a", "domain"] == "code"
+    assert math.isnan(frame.loc["a", "style_matching"])
+    assert agg["summary"]["final"]["count"] == 4 and agg["domains"]["chat"]["count"] == 3
+
+
+def test_missing_null_and_non_string_domains_are_grouped_as_strings():
+    agg = build_aggregates([result("a", 1.0, None), result("b", 2.0, 3), result("c", 3.0),
+                            EvalResult.from_scores("d", {"final": 4.0}, {})])
+    assert list(agg["domains"]) == ["3", "Unknown", "chat"]
+    assert agg["domains"]["Unknown"]["count"] == 2 and agg["agents"]["domain"] == ["Unknown", "3", "chat", "Unknown"]
+
+
+def test_join_aligns_reordered_missing_and_duplicate_ids():
+    left = build_aggregates([result("a", 1.0), result("b", 2.0), result("c", 3.0), result("a", 8.0)])
+    right = build_aggregates([result("c", 0.3), result("d", 0.9), result("a", 0.1), result("a", 0.7)])
+    joined = join_reports(left, right, right_scale=10)
+
+    # Only ids on both sides, in the left report's order, first occurrence on each side
+    assert joined.index.tolist() == ["a", "c"]
+    assert joined["final_left"].tolist() == [1.0, 3.0]
+    assert joined["final_right"].tolist() == [1.0, 3.0]
+
+
+def test_sidecar_is_rebuilt_from_the_report(tmp_path):
+    path = tmp_path / "report.json"
+    write_report([result("x", 5.0), result("y", 7.0)], path)
+    agg = load_or_build_sidecar(path)
+    assert agg["agents"]["agent_id"] == ["x", "y"] and agg["summary"]["final"]["mean"] == 6.0
+    assert load_or_build_sidecar(path) == agg
+
+
+def test_streamed_outputs_match_the_in_memory_builders(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_runner, "SPILL_ROWS", 2)  # spill and read back in several blocks
+    path = tmp_path / "report.json"
+    results = [result("x", 5.0), result("y", 7.0, "code"), EvalResult.from_scores("z", {"coherence_&_accuracy": 3}, {}),
+               result("x", 2.0, "code"), result("w", 1.0)]
+    assert save_outputs(iter(results), [], path) == 5
+
+    assert path.read_text(encoding="utf-8") == json.dumps([r.to_dict() for r in results], indent=2)
+    sidecar = load_sidecar(path)
+    sidecar.pop("report")
+    assert json.dumps(sidecar) == json.dumps(build_aggregates(results))
+    matrix, agent_ids, _ = load_score_matrix(path)
+    expected, expected_ids = build_score_matrix(results)
+    assert np.array_equal(matrix, expected) and agent_ids.tolist() == expected_ids.tolist()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["report.agg.json", "report.json", "report.scores.npz"]
+
+
+def test_unreadable_input_keeps_the_previous_report(tmp_path):
+    inputs, path = tmp_path / "items.json", tmp_path / "report.json"
+    write_report([result("x", 5.0)], path)
+    before = path.read_text(encoding="utf-8")
+    inputs.write_text('[{"agent_id": "a", "response": "ok"}, {"agent_id": ', encoding="utf-8")
+
+    assert len(run_batch_evaluation(inputs, path, None, {}, live=False)) == 0
+    assert path.read_text(encoding="utf-8") == before
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["items.json", "report.json"]
@@ -0,0 +1,123 @@
+import json
+
+import pytest
+
+from evaluation import batch_runner, scorer_versions
+from evaluation.batch_runner import run_batch_evaluation, write_report
+from evaluation.report_reader import ReportReader, build_index, index_path
+from evaluation.result import EvalResult
+
+RECORDS = [
+    {"agent_id": "a1", "prompt": "Say \"hi\" {please}", "response": "hi, [there]\\n",
+     "scores": {"instruction_following": 7, "final": 6.5}, "explanations": {"instruction_following": "ok"},
+     "domain": "chat"},
+    {"agent_id": "a2", "scores": {"final": 3.0}, "explanations": {}},
+    {"agent_id": "a1", "prompt": "dup", "response": "later", "scores": {"final": 1.0}, "explanations": {}}
+]
+
+
+def test_reader_matches_json_load(tmp_path):
+    path = tmp_path / "report.json"
+    write_report([EvalResult.from_dict(r) for r in RECORDS], path)
+    with ReportReader(path) as reader:
+        assert len(reader) == 3
+        assert [r.to_result().to_dict() for r in reader] == json.loads(path.read_text(encoding="utf-8"))
+        assert [r.scores for r in reader.iter_scores("domain")] == [r["scores"] for r in RECORDS]
+        assert [r.get("domain", "Unknown") for r in reader.iter_scores("domain")] == ["chat", "Unknown", "Unknown"]
+
+        # First occurrence wins, as with the old {agent_id: record} maps
+        view = reader.view("a1")
+        assert view.get("prompt") == RECORDS[0]["prompt"] and view.score("final") == 6.5
+        assert view.explanation("instruction_following") == "ok" and view.get("domain") == "chat"
+        assert reader.get("a2").to_dict() == RECORDS[1]
+        assert reader.view("missing") is None and reader.get("missing") is None
+    assert index_path(path).exists()
+
+
+def test_index_is_reused_until_report_changes(tmp_path):
+    path = tmp_path / "report.json"
+    path.write_text(json.dumps(RECORDS[:1]), encoding="utf-8")
+    ReportReader(path).close()
+    stamp = index_path(path).stat().st_mtime_ns
+
+    with ReportReader(path) as reader:
+        assert len(reader) == 1 and index_path(path).stat().st_mtime_ns == stamp
+
+    path.write_text(json.dumps(RECORDS), encoding="utf-8")
+    with ReportReader(path) as reader:
+        assert len(reader) == 3 and reader.view("a2")["scores"] == {"final": 3.0}
+
+
+def test_truncated_index_is_rebuilt_and_replaced_atomically(tmp_path):
+    path = tmp_path / "report.json"
+    write_report([EvalResult.from_dict(r) for r in RECORDS], path)
+    ReportReader(path).close()
+    saved = index_path(path).read_bytes()
+    index_path(path).write_bytes(saved[:len(saved) // 2])  # as seen mid-write by a concurrent reader
+
+    with ReportReader(path) as reader:
+        assert len(reader) == 3
+    assert index_path(path).read_bytes() == saved
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["report.idx", "report.json"]
+
+
+def test_build_index_rejects_non_arrays():
+    assert len(build_index(b" [ ] ")["records"]) == 0
+    for bad in (b"", b"{}", b'[{"agent_id": "a"}'):
+        with pytest.raises(ValueError):
+            build_index(bad)
+
+
+@pytest.fixture
+def closed_readers(monkeypatch):
+    closed = []
+    close = ReportReader.close
+
+    def spy(self):
+        close(self)
+        closed.append(self._file.closed)
+
+    monkeypatch.setattr(ReportReader, "close", spy)
+    return closed
+
+
+def test_reader_closes_its_file_when_indexing_fails(tmp_path, closed_readers):
+    path = tmp_path / "report.json"
+    path.write_text('{"agent_id": "a1"}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        ReportReader(path)
+    assert closed_readers == [True]
+
+
+def _reuse_run(tmp_path, monkeypatch, score_item):
+    reuse, inputs = tmp_path / "previous.json", tmp_path / "items.json"
+    write_report([EvalResult.from_dict(r) for r in RECORDS], reuse)
+    inputs.write_text(json.dumps([{"agent_id": "a1", "response": "hi"}]), encoding="utf-8")
+    monkeypatch.setattr(batch_runner, "score_item", score_item)
+    run_batch_evaluation(inputs, tmp_path / "report.json", None, {}, live=False, heuristics=True, reuse_path=reuse)
+
+
+def test_reuse_reader_is_dropped_when_versions_fail(tmp_path, monkeypatch, closed_readers):
+    seen = []
+
+    def score_item(item, weights, previous=None, **kwargs):
+        seen.append(previous)
+        return EvalResult.from_scores(item["agent_id"], {"final": 1.0}, {})
+
+    def broken(*args):
+        raise ValueError("bad versions")
+
+    monkeypatch.setattr(scorer_versions, "stale_dimensions", broken)
+    _reuse_run(tmp_path, monkeypatch, score_item)
+    assert seen == [None] and closed_readers == [True]
+
+
+def test_reuse_reader_is_closed_when_the_run_is_interrupted(tmp_path, monkeypatch, closed_readers):
+    def score_item(item, weights, previous=None, **kwargs):
+        assert previous is not None
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        _reuse_run(tmp_path, monkeypatch, score_item)
+    assert closed_readers == [True]
+    assert not (tmp_path / "report.json.tmp").exists()
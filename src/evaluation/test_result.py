@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from evaluation.batch_runner import write_report
+from evaluation.result import EvalResult, apply_weights
+
+RECORDS = [
+    {"scores": {"instruction_following": 7, "coherence_&_accuracy": 8.5, "final": 7.25},
+     "explanations": {"instruction_following": "Ok — mostly.", "coherence_&_accuracy": "Fine"},
+     "agent_id": "a1", "domain": "chat"},
+    {"agent_id": 2, "prompt": "Say \"hi\"", "response": "héllo\n", "scores": {}, "explanations": {},
+     "versions": {"style_matching": "abc"}},
+    {"agent_id": "a3", "prompt": None, "response": "x", "scores": {"final": "n/a"}, "explanations": "none"},
+    {"agent_id": "a4", "scores": [1, 2], "explanations": {}, "reference": {"text": "ref", "k": [1, 2.0]}}
+]
+
+
+def test_report_round_trips_byte_for_byte(tmp_path):
+    path = tmp_path / "report.json"
+    expected = json.dumps(RECORDS, indent=2)
+    path.write_text(expected, encoding="utf-8")
+    results = [EvalResult.from_dict(r) for r in json.loads(path.read_text(encoding="utf-8"))]
+    assert [r.to_dict() for r in results] == RECORDS
+
+    write_report(results, path)
+    assert path.read_text(encoding="utf-8") == expected
+
+
+def test_scores_are_read_through_aliases_and_set_in_place():
+    result = EvalResult.from_dict(RECORDS[0])
+    assert result.score("coherence_accuracy") == 8.5
+    result.set_score("final", 9)
+    assert result.to_dict()["scores"]["final"] == 9 and isinstance(result.to_dict()["scores"]["final"], int)
+
+
+def test_malformed_scores_are_kept_or_rejected():
+    loose = EvalResult.from_dict(RECORDS[2])
+    apply_weights(loose, {"instruction_following": 1.0})
+    assert loose.to_dict()["scores"] == {"final": 0.0}
+
+    with pytest.raises(TypeError):
+        EvalResult.from_dict(RECORDS[3]).set_score("final", 1.0)
+    assert EvalResult.from_dict(RECORDS[3]).to_dict() == RECORDS[3]
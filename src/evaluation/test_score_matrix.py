@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from evaluation.result import DIMENSIONS, EvalResult, apply_weights
+from evaluation.score_matrix import build_score_matrix, load_score_matrix, rerank, write_score_matrix
+
+WEIGHTS = json.loads((Path(__file__).resolve().parents[2] / "config" / "weights.json").read_text(encoding="utf-8"))
+
+
+def random_results(n, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+    for i in range(n):
+        scores = {dim: round(float(v), 2) for dim, v in zip(DIMENSIONS, rng.uniform(0, 10, len(DIMENSIONS)))}
+        if i % 3 == 0:  # older reports spell this dimension differently
+            scores["coherence_&_accuracy"] = scores.pop("coherence_accuracy")
+        if i % 7 == 0:
+            del scores["style_matching"]
+        results.append(EvalResult.from_scores(f"a{i}", scores, {}))
+    return results
+
+
+def test_rerank_matches_apply_weights():
+    results = random_results(2000)
+    matrix, _ = build_score_matrix(results)
+    final, _ = rerank(matrix, WEIGHTS)
+    for r in results:
+        apply_weights(r, WEIGHTS)
+    assert final.tolist() == [r.score("final") for r in results]
+    assert matrix[0, DIMENSIONS.index("coherence_accuracy")] == results[0].score("coherence_&_accuracy")
+
+
+def test_top_k_order_matches_full_sort():
+    matrix, _ = build_score_matrix(random_results(500, seed=1))
+    final, order = rerank(matrix, WEIGHTS)
+    _, top = rerank(matrix, WEIGHTS, top_k=25)
+    assert np.all(np.diff(final[order]) <= 0)
+    assert final[top].tolist() == final[order[:25]].tolist()
+
+
+def test_score_matrix_round_trips(tmp_path):
+    results = random_results(50)
+    report = tmp_path / "report.json"
+    write_score_matrix(report, results)
+    matrix, agent_ids, dimensions = load_score_matrix(report)
+    assert np.array_equal(matrix, build_score_matrix(results)[0])
+    assert agent_ids.tolist() == [r.agent_id for r in results] and dimensions == list(DIMENSIONS)
+    assert load_score_matrix(tmp_path / "missing.json") is None
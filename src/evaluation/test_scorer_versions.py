@@ -0,0 +1,24 @@
+from evaluation.result import DIMENSIONS
+from evaluation.scorer_versions import SCORER_MODULES, scorer_fingerprint, scorer_versions, stale_dimensions
+
+
+def test_versions_cover_every_dimension():
+    versions = scorer_versions()
+    assert set(versions) == set(DIMENSIONS)
+    assert versions["style_matching"] == scorer_fingerprint("style_matching")
+
+
+def test_stale_dimensions():
+    current = scorer_versions()
+    assert stale_dimensions(current, current) == []
+    assert stale_dimensions(None, current) == list(DIMENSIONS)
+
+    stored = dict(current, length_penalty="outdated")
+    del stored["assumption_control"]
+    assert stale_dimensions(stored, current) == ["length_penalty", "assumption_control"]
+
+
+def test_batch_scorers_are_fingerprinted_with_columnar():
+    for dim in ("coherence_accuracy", "hallucination_detection", "style_matching",
+                "length_penalty", "assumption_control"):
+        assert "evaluation.columnar" in SCORER_MODULES[dim]
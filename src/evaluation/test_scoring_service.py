@@ -0,0 +1,75 @@
+import json
+import threading
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from evaluation.result import EvalResult
+from evaluation.scoring_service import MicroBatcher, ScoringService, make_handler
+
+batch_sizes = []
+
+
+def fake_evaluate_batch(items):
+    batch_sizes.append(len(items))
+    return [
+        EvalResult.from_scores(i["agent_id"], {"length_penalty": float(len(i["response"]))}, {"length_penalty": "ok"})
+        for i in items
+    ]
+
+
+def test_concurrent_submits_are_coalesced():
+    batch_sizes.clear()
+    batcher = MicroBatcher(fake_evaluate_batch, max_batch=16, max_wait_ms=50)
+    futures = [batcher.submit({"agent_id": f"a{i}", "response": "x" * i}) for i in range(40)]
+    results = [f.result(timeout=5) for f in futures]
+    assert [r.agent_id for r in results] == [f"a{i}" for i in range(40)]
+    assert max(batch_sizes) == 16 and len(batch_sizes) < 40
+
+
+def test_short_batches_fail_the_unmatched_items():
+    batcher = MicroBatcher(lambda items: fake_evaluate_batch(items)[:1], max_batch=3, max_wait_ms=200)
+    futures = [batcher.submit({"agent_id": f"a{i}", "response": "x"}) for i in range(3)]
+    assert futures[0].result(timeout=5).agent_id == "a0"
+    for future in futures[1:]:
+        with pytest.raises(RuntimeError, match="1 results for 3 items"):
+            future.result(timeout=5)
+
+
+def test_http_round_trip():
+    service = ScoringService(fake_evaluate_batch, weights={"length_penalty": 2.0}, max_wait_ms=20)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(service))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def post(i):
+        body = json.dumps({"agent_id": f"a{i}", "prompt": "p", "response": "abc"}).encode()
+        req = urllib.request.Request(url + "/score", data=body, headers={"Content-Type": "application/json"})
+        return json.loads(urllib.request.urlopen(req, timeout=5).read())
+
+    try:
+        with ThreadPoolExecutor(8) as pool:
+            records = list(pool.map(post, range(20)))
+        assert records[3]["agent_id"] == "a3"
+        assert records[3]["scores"] == {"length_penalty": 3.0, "final": 6.0}
+        health = json.loads(urllib.request.urlopen(url + "/health", timeout=5).read())
+        assert health["items"] == 20 and health["batches"] < 20
+    finally:
+        server.shutdown()
+
+
+def test_request_count_is_not_capped_and_timeouts_say_why():
+    service = ScoringService(fake_evaluate_batch, max_wait_ms=1)
+    service._latencies = deque(maxlen=3)
+    for i in range(5):
+        service.score([{"agent_id": f"a{i}", "response": "x"}])
+    assert service.stats()["requests"] == 5
+
+    stuck = threading.Event()
+    slow = ScoringService(lambda items: stuck.wait(5) and [], timeout=0.05)
+    with pytest.raises(TimeoutError, match="no score within 0.05s"):
+        slow.score([{"agent_id": "a", "response": "x"}])
+    stuck.set()
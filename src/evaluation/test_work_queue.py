@@ -0,0 +1,62 @@
+import json
+import sqlite3
+import threading
+import time
+
+from evaluation.work_queue import DONE, WorkQueue, merge, run_worker
+
+
+def _items(n):
+    return [{"agent_id": f"a{i}", "prompt": "Follow the steps.", "response": "I follow them " * (i + 1)} for i in range(n)]
+
+
+def test_workers_drain_queue_and_merge_in_order(tmp_path):
+    queue = WorkQueue(tmp_path / "q.sqlite")
+    assert queue.create(_items(23), chunk_size=5, options={"weights": {"instruction_following": 1.0}}) == 5
+
+    threads = [threading.Thread(target=run_worker, args=(queue, f"w{i}"), kwargs={"poll": 0.01}) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=30)
+    assert queue.progress()[DONE] == 5
+
+    output = tmp_path / "report.json"
+    count = merge(queue, output)
+    report = json.loads(output.read_text())
+    assert [r["agent_id"] for r in report] == [f"a{i}" for i in range(23)]
+    assert count == 23 and "final" in report[0]["scores"]
+
+
+def test_expired_lease_is_reassigned_and_first_finisher_wins(tmp_path):
+    queue = WorkQueue(tmp_path / "q.sqlite")
+    queue.create(_items(2), chunk_size=2, options={})
+
+    chunk_id, _ = queue.claim("crashed", lease=0.01)
+    time.sleep(0.05)
+    assert queue.claim("rescuer", lease=60)[0] == chunk_id
+    assert not queue.heartbeat(chunk_id, "crashed", lease=60)
+
+    assert queue.complete(chunk_id, "rescuer", [{"agent_id": "a0"}], [])
+    assert not queue.complete(chunk_id, "crashed", [], [])
+    assert queue.finished()
+
+
+def test_chunk_fails_after_max_attempts(tmp_path):
+    queue = WorkQueue(tmp_path / "q.sqlite", max_attempts=2)
+    queue.create(_items(1), chunk_size=1, options={})
+    for worker in ("w1", "w2"):
+        queue.claim(worker, lease=0.0)
+        time.sleep(0.01)
+    assert queue.claim("w3", lease=60) is None
+    assert queue.progress()["failed"] == 1 and queue.finished()
+
+
+def test_queue_uses_the_rollback_journal(tmp_path):
+    path = tmp_path / "q.sqlite"
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+    WorkQueue(path).create(_items(3), chunk_size=2, options={})
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert not (tmp_path / "q.sqlite-wal").exists() and not (tmp_path / "q.sqlite-shm").exists()
@@ -1,31 +1,235 @@
+import argparse
 import json
+import logging
 import random
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from evaluation.cache import DiskCache
+from evaluation.evaluate_with_llm import chat_completion
 
 SOURCE_PATH = "src/evaluation/data/real_responses.json"
 OUTPUT_PATH = "src/evaluation/data/real_responses_with_reference.json"
+CACHE_PATH = "src/evaluation/data/.reference_cache.sqlite"
+
+REFERENCE_MODEL = "llama-3.1-8b-instant"
+REFERENCE_SYSTEM_PROMPT = (
+    "You write reference answers for an evaluation dataset. "
+    "Answer the user's request clearly and factually in at most 120 words. "
+    "Do not add disclaimers or commentary."
+)
+
+
+# Characters read at a time from a JSON array file
+READ_CHUNK = 1 << 16
+# Reference requests queued per worker thread
+PENDING_PER_WORKER = 4
+
+
+def _iter_json_array(f, chunk_size: int = READ_CHUNK):
+    # Decodes one array element at a time; only the unread tail of the file stays buffered
+    decoder = json.JSONDecoder()
+    buf, pos = "", 0
+    expect = "["  # then "value or ]", "value", ", or ]"
+
+    def more() -> bool:
+        nonlocal buf, pos
+        chunk = f.read(chunk_size)
+        if chunk:
+            buf, pos = buf[pos:] + chunk, 0
+        return bool(chunk)
+
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n":
+            pos += 1
+        if pos == len(buf):
+            if not more():
+                raise json.JSONDecodeError("unterminated JSON array", buf, pos)
+            continue
+        c = buf[pos]
+        if expect == "[" or expect == ", or ]" and c != "]":
+            if c != expect[0]:
+                raise json.JSONDecodeError(f"expected '{expect[0]}'", buf, pos)
+            pos += 1
+            expect = "value or ]" if c == "[" else "value"
+            continue
+        if c == "]" and expect != "value":
+            return
+        try:
+            record, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if more():
+                continue
+            raise
+        nxt = end
+        while nxt < len(buf) and buf[nxt] in " \t\r\n":
+            nxt += 1
+        if (nxt == len(buf) or buf[nxt] not in ",]") and more():
+            continue  # the value may go on in the next chunk (e.g. a split number)
+        yield record
+        pos = end
+        expect = ", or ]"
+
+
+def iter_records(path: Path):
+    """
+    Yields records from a JSONL file line by line, or from a JSON array
+    file element by element, without loading the whole file.
+    """
+    with Path(path).open("r", encoding="utf-8") as f:
+        if Path(path).suffix == ".jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_array(f)
+
+
+def write_records(records, path: Path) -> int:
+    """
+    Streams records to JSONL, or to a JSON array when `path` ends in .json.
+    """
+    count = 0
+    jsonl = Path(path).suffix == ".jsonl"
+    with Path(path).open("w", encoding="utf-8") as f:
+        if not jsonl:
+            f.write("[")
+        for record in records:
+            if jsonl:
+                f.write(json.dumps(record) + "\n")
+            else:
+                f.write(("," if count else "") + "\n" + json.dumps(record, indent=2))
+            count += 1
+        if not jsonl:
+            f.write("\n]\n")
+    return count
+
+
+def select_prompts(path: Path, n: int = None, seed: int = None) -> dict:
+    """
+    Picks `n` entries uniformly at random in a single streaming pass
+    (reservoir sampling) and returns {agent_id: prompt}. n=None selects all.
+    """
+    rng = random.Random(seed)
+    reservoir = []
+    for i, entry in enumerate(iter_records(path)):
+        pair = (entry["agent_id"], entry.get("prompt", ""))
+        if n is None or len(reservoir) < n:
+            reservoir.append(pair)
+        else:
+            j = rng.randint(0, i)
+            if j < n:
+                reservoir[j] = pair
+    return dict(reservoir)
 
-def inject_references(n=50):
-    with open(SOURCE_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
 
+def generate_reference(prompt: str, model: str = REFERENCE_MODEL, api_key: str = None, cache=None) -> str:
+    messages = [
+        {"role": "system", "content": REFERENCE_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+    return chat_completion(messages, model=model, temperature=0.0, api_key=api_key, cache=cache)
+
+
+def _collect(finished, pending: dict, by_prompt: dict) -> int:
+    for future in finished:
+        prompt = pending.pop(future)
+        try:
+            by_prompt[prompt] = future.result()
+        except Exception as e:
+            logging.warning(f"⚠️ Reference generation failed: {e}")
+    return len(finished)
+
+
+def generate_references(prompts: dict, workers: int = 8, model: str = REFERENCE_MODEL,
+                        api_keys: list = None, cache=None) -> dict:
+    """
+    Generates one reference per distinct prompt concurrently and returns
+    {agent_id: reference}. Failed prompts are logged and left out.
+    """
+    api_keys = api_keys or [None]
+    unique_prompts = list(dict.fromkeys(prompts.values()))
+    by_prompt = {}
+    # At most this many requests are queued or running, so pending futures stay bounded
+    window = workers * PENDING_PER_WORKER
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending, done = {}, 0
+        for i, p in enumerate(unique_prompts):
+            if len(pending) >= window:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                done += _collect(finished, pending, by_prompt)
+                if done // 1000 > (done - len(finished)) // 1000:
+                    logging.info(f"Generated {done}/{len(unique_prompts)} references")
+            pending[pool.submit(generate_reference, p, model, api_keys[i % len(api_keys)], cache)] = p
+        _collect(list(pending), pending, by_prompt)
+
+    return {aid: by_prompt[p] for aid, p in prompts.items() if p in by_prompt}
+
+
+def inject_references(n=50, source=SOURCE_PATH, output=OUTPUT_PATH, workers=8,
+                      model=REFERENCE_MODEL, api_keys=None, cache_path=CACHE_PATH, seed=None) -> int:
     # Select n entries to annotate
-    annotated = random.sample(data, n)
+    prompts = select_prompts(source, n, seed)
+
+    cache = DiskCache(cache_path) if cache_path else None
+    try:
+        references = generate_references(prompts, workers, model, api_keys, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    # Merge back into full dataset through the agent_id index
+    def annotated():
+        for entry in iter_records(source):
+            ref = references.get(entry.get("agent_id"))
+            if ref is not None:
+                entry["reference"] = ref
+            yield entry
+
+    total = write_records(annotated(), output)
+    logging.info(f"Annotated {len(references)} of {total} entries → {output}")
+    return len(references)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate LLM reference answers and merge them into a dataset.")
+    parser.add_argument("--input", "-i", type=Path, default=Path(SOURCE_PATH),
+                        help="JSON or JSONL dataset with agent_id/prompt/response.")
+    parser.add_argument("--output", "-o", type=Path, default=Path(OUTPUT_PATH),
+                        help="Where to write the annotated dataset (.json or .jsonl).")
+    parser.add_argument("--n", type=int, default=50,
+                        help="Number of entries to annotate; 0 annotates all.")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="Concurrent reference requests.")
+    parser.add_argument("--model", "-m", type=str, default=REFERENCE_MODEL,
+                        help="Groq model used to write references.")
+    parser.add_argument("--key_map", type=Path, default=None,
+                        help="Optional JSON key map; requests rotate across all keys.")
+    parser.add_argument("--cache", type=str, default=CACHE_PATH,
+                        help="SQLite reference cache path; empty string disables caching.")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for the random selection.")
+    args = parser.parse_args()
 
-    for entry in annotated:
-        entry["reference"] = generate_reference(entry["prompt"])
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S")
 
-    # Merge back into full dataset
-    agent_ids_with_ref = {entry["agent_id"] for entry in annotated}
-    for entry in data:
-        if entry["agent_id"] in agent_ids_with_ref:
-            entry["reference"] = next(a["reference"] for a in annotated if a["agent_id"] == entry["agent_id"])
+    api_keys = None
+    if args.key_map:
+        with args.key_map.open("r", encoding="utf-8") as kf:
+            api_keys = list(json.load(kf).values())
 
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    inject_references(
+        n=args.n or None,
+        source=args.input,
+        output=args.output,
+        workers=args.workers,
+        model=args.model,
+        api_keys=api_keys,
+        cache_path=args.cache or None,
+        seed=args.seed
+    )
 
-def generate_reference(prompt: str) -> str:
-    # 🔧 Replace this with real references or use an LLM to generate them
-    return f"A clear, factual answer to: {prompt}"
 
 if __name__ == "__main__":
-    inject_references(n=50)
+    main()
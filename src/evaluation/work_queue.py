@@ -0,0 +1,395 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import sqlite3
+import statistics
+import threading
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from evaluation.aggregation import LeaderboardAggregator, print_agent_leaderboard
+from evaluation.batch_runner import save_outputs, score_item
+from evaluation.result import EvalResult
+
+# Chunk states
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    items TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    backup_worker TEXT,
+    lease_until REAL,
+    started_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    duration REAL,
+    results TEXT,
+    failures TEXT,
+    aggregate TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS chunks_status ON chunks (status, lease_until);
+"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class WorkQueue:
+    """
+    Chunks of items in a single SQLite file that any number of worker
+    processes (on any node that sees the file) claim under a lease.
+
+    A worker heartbeats to extend its lease; a chunk whose lease runs out
+    (crashed or hung worker) goes back to the pool. Once nothing is left
+    to claim, idle workers also take a backup copy of a chunk running
+    `straggler_factor` × the median chunk time. The first copy to finish
+    wins and later ones are discarded. A chunk that keeps losing its lease
+    is marked failed after `max_attempts`.
+
+    Needs a filesystem with working POSIX locks (local disk or a
+    lock-aware network filesystem). The queue uses SQLite's rollback
+    journal rather than WAL, whose shared-memory index only works for
+    processes on one host; every read-modify-write runs under
+    BEGIN IMMEDIATE, and reads hold their lock only briefly.
+    """
+
+    def __init__(self, path, max_attempts: int = 3, straggler_factor: float = 3.0):
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self.straggler_factor = straggler_factor
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=DELETE")  # also converts queues created in WAL mode
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per operation, so heartbeat threads can share the queue
+        conn = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        return conn
+
+    def create(self, items: List[dict], chunk_size: int, options: Dict) -> int:
+        """
+        Fills an empty queue with `items` split into chunks; `options` are
+        the scoring settings every worker uses.
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]:
+                conn.execute("ROLLBACK")
+                raise ValueError(f"Queue '{self.path}' already holds chunks")
+            conn.executemany(
+                "INSERT INTO chunks (items) VALUES (?)",
+                ((json.dumps(items[i:i + chunk_size]),) for i in range(0, len(items), chunk_size))
+            )
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('options', ?)", (json.dumps(options),))
+            conn.execute("COMMIT")
+        return (len(items) + chunk_size - 1) // chunk_size
+
+    def options(self) -> Dict:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'options'").fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _straggler_cutoff(self, conn: sqlite3.Connection, now: float) -> Optional[float]:
+        durations = [d for (d,) in conn.execute("SELECT duration FROM chunks WHERE status = 'done'")]
+        if not durations:
+            return None
+        return now - self.straggler_factor * statistics.median(durations)
+
+    def claim(self, worker: str, lease: float) -> Optional[Tuple[int, List[dict]]]:
+        """
+        Leases the next available chunk to `worker`. Returns (chunk_id, items),
+        or None when there is nothing to claim right now.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE chunks SET status = 'failed', error = 'lease expired too often' "
+                "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT id, items FROM chunks WHERE status = 'pending' "
+                "OR (status = 'leased' AND lease_until < ?) ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE chunks SET status = 'leased', worker = ?, backup_worker = NULL, "
+                    "lease_until = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    (worker, now + lease, now, row[0])
+                )
+            else:
+                cutoff = self._straggler_cutoff(conn, now)
+                row = cutoff is not None and conn.execute(
+                    "SELECT id, items FROM chunks WHERE status = 'leased' AND backup_worker IS NULL "
+                    "AND worker != ? AND started_at < ? ORDER BY started_at LIMIT 1",
+                    (worker, cutoff)
+                ).fetchone()
+                if row:
+                    conn.execute("UPDATE chunks SET backup_worker = ? WHERE id = ?", (worker, row[0]))
+                    logging.info(f"🐢 Chunk {row[0]} is straggling; running a backup copy")
+            conn.execute("COMMIT")
+        return (row[0], json.loads(row[1])) if row else None
+
+    def heartbeat(self, chunk_id: int, worker: str, lease: float) -> bool:
+        """
+        Extends the lease. False once the chunk is finished or reassigned,
+        in which case the worker may stop early.
+        """
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "UPDATE chunks SET lease_until = ? WHERE id = ? AND status = 'leased' "
+                "AND (worker = ? OR backup_worker = ?)",
+                (time.time() + lease, chunk_id, worker, worker)
+            )
+            return cur.rowcount > 0
+
+    def complete(self, chunk_id: int, worker: str, results: List[dict], failures: List[dict],
+                 aggregate: LeaderboardAggregator = None) -> bool:
+        """
+        Stores a chunk's results and its partial leaderboard. Only the first
+        copy to finish is kept; returns False for a copy that lost.
+        """
+        aggregate = aggregate or LeaderboardAggregator().add_all(EvalResult.from_dict(r) for r in results)
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "UPDATE chunks SET status = 'done', worker = ?, results = ?, failures = ?, aggregate = ?, "
+                "duration = ? - started_at WHERE id = ? AND status != 'done'",
+                (worker, json.dumps(results), json.dumps(failures), json.dumps(aggregate.to_dict()),
+                 time.time(), chunk_id)
+            )
+            return cur.rowcount > 0
+
+    def progress(self) -> Dict[str, int]:
+        with closing(self._connect()) as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM chunks GROUP BY status"))
+        return {status: counts.get(status, 0) for status in (PENDING, LEASED, DONE, FAILED)}
+
+    def finished(self) -> bool:
+        p = self.progress()
+        return p[PENDING] == 0 and p[LEASED] == 0
+
+    def chunk_results(self):
+        """
+        Yields (results, failures) of every finished chunk in input order.
+        """
+        with closing(self._connect()) as conn:
+            done = [chunk_id for (chunk_id,) in conn.execute("SELECT id FROM chunks WHERE status = 'done' ORDER BY id")]
+            # One query per chunk, so a slow consumer never holds the file's read lock against workers
+            for chunk_id in done:
+                results, failures = conn.execute(
+                    "SELECT results, failures FROM chunks WHERE id = ?", (chunk_id,)
+                ).fetchone()
+                yield json.loads(results), json.loads(failures)
+
+    def leaderboard(self) -> LeaderboardAggregator:
+        """
+        Per-agent statistics merged from the partials of finished chunks,
+        without loading their results.
+        """
+        agg = LeaderboardAggregator()
+        with closing(self._connect()) as conn:
+            for (partial,) in conn.execute("SELECT aggregate FROM chunks WHERE status = 'done'"):
+                agg.merge(LeaderboardAggregator.from_dict(json.loads(partial)))
+        return agg
+
+    def failed_chunks(self) -> List[Tuple[int, List[dict], str]]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT id, items, error FROM chunks WHERE status = 'failed' ORDER BY id").fetchall()
+        return [(chunk_id, json.loads(items), error) for chunk_id, items, error in rows]
+
+
+class _Heartbeat(threading.Thread):
+    def __init__(self, queue: WorkQueue, chunk_id: int, worker: str, lease: float):
+        super().__init__(daemon=True)
+        self.queue, self.chunk_id, self.worker, self.lease = queue, chunk_id, worker, lease
+        self.stopped = threading.Event()
+        self.lost = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.lease / 3):
+            try:
+                if not self.queue.heartbeat(self.chunk_id, self.worker, self.lease):
+                    self.lost.set()
+                    return
+            except sqlite3.Error as e:
+                logging.warning(f"⚠️ Heartbeat for chunk {self.chunk_id} failed: {e}")
+
+
+def run_worker(queue: WorkQueue, worker: str = None, lease: float = 120.0, poll: float = 5.0) -> int:
+    """
+    Claims and scores chunks until the queue is drained. Returns the
+    number of chunks this worker completed.
+    """
+    worker = worker or default_worker_id()
+    options = queue.options()
+    use_llm = options.get("use_llm", False)
+    completed = 0
+    logging.info(f"👷 Worker {worker} started on '{queue.path}'")
+
+    while True:
+        claimed = queue.claim(worker, lease)
+        if claimed is None:
+            if queue.finished():
+                break
+            time.sleep(poll)
+            continue
+
+        chunk_id, items = claimed
+        beat = _Heartbeat(queue, chunk_id, worker, lease)
+        beat.start()
+        results, failures = [], []
+        agg = LeaderboardAggregator()
+        try:
+            for item in items:
+                if beat.lost.is_set():
+                    break
+                try:
+                    result = score_item(item, options.get("weights") or {}, use_llm=use_llm,
+                                        model=options.get("model", "llama-3.3-70b-versatile"),
+                                        heuristics=options.get("heuristics", False))
+                    results.append(result.to_dict())
+                    agg.add(result)
+                except Exception as e:
+                    logging.warning(f"⚠️ Error evaluating '{item.get('agent_id', '<unknown>')}': {e}")
+                    failures.append({"agent_id": item.get("agent_id", "<unknown>"), "error": str(e)})
+                if use_llm:
+                    time.sleep(0.5)
+        finally:
+            beat.stopped.set()
+
+        if beat.lost.is_set():
+            logging.info(f"Chunk {chunk_id} was finished or reassigned elsewhere; dropping this copy")
+        elif queue.complete(chunk_id, worker, results, failures, agg):
+            completed += 1
+            logging.info(f"✅ Chunk {chunk_id}: {len(results)} scored, {len(failures)} failed")
+
+    logging.info(f"Worker {worker} done after {completed} chunks")
+    return completed
+
+
+def merge(queue: WorkQueue, output_path: Path, leaderboard_dim: str = None, partial: bool = False,
+          top_k: int = 20) -> int:
+    """
+    Streams one report (plus sidecar and score matrix) from every finished
+    chunk, in input order, and prints the agent leaderboard from the
+    chunks' stored aggregates. Returns the number of results written.
+    """
+    progress = queue.progress()
+    if not queue.finished() and not partial:
+        logging.error(f"Queue not finished yet ({progress}); wait for the workers or pass --partial.")
+        return 0
+
+    failures = []
+
+    def results():
+        for chunk, chunk_failures in queue.chunk_results():
+            yield from (EvalResult.from_dict(r) for r in chunk)
+            failures.extend(chunk_failures)
+        for chunk_id, items, error in queue.failed_chunks():
+            failures.extend({"agent_id": item.get("agent_id", "<unknown>"), "error": f"chunk {chunk_id}: {error}"}
+                            for item in items)
+
+    count = save_outputs(results(), failures, output_path)
+
+    if count:
+        print_agent_leaderboard(queue.leaderboard(), leaderboard_dim, top_k)
+    else:
+        logging.warning("No results to display on leaderboard.")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Score a batch through a shared SQLite work queue: init it once, start workers anywhere, then merge."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    init = sub.add_parser("init", help="Split an input file into chunks.")
+    init.add_argument("--queue", "-q", type=Path, required=True, help="Queue SQLite file (on shared storage).")
+    init.add_argument("--input", "-i", type=Path, required=True, help="Path to JSON file with agent responses.")
+    init.add_argument("--chunk_size", type=int, default=50, help="Items per chunk.")
+    init.add_argument("--weights", "-w", type=Path, default=None, help="Optional JSON file with weights per dimension.")
+    init.add_argument("--use_llm", action="store_true", help="Use Groq-based LLM scoring.")
+    init.add_argument("--heuristics", action="store_true", help="Use the full heuristic evaluator.")
+    init.add_argument("--model", "-m", type=str, default="llama-3.3-70b-versatile", help="Groq model to use.")
+
+    worker = sub.add_parser("worker", help="Claim and score chunks until none are left.")
+    worker.add_argument("--queue", "-q", type=Path, required=True)
+    worker.add_argument("--worker_id", type=str, default=None, help="Defaults to host-pid-random.")
+    worker.add_argument("--lease", type=float, default=120.0, help="Seconds a claim stays valid without a heartbeat.")
+    worker.add_argument("--poll", type=float, default=5.0, help="Seconds between claim attempts while others finish.")
+    worker.add_argument("--batch_id", type=int, default=None, help="Batch ID selecting this worker's Groq API key.")
+    worker.add_argument("--key_map", type=Path, default=Path("config/groq_keys.json"),
+                        help="Path to JSON file mapping batch_id to Groq API key.")
+
+    status = sub.add_parser("status", help="Show chunk counts per state and the agent leaderboard so far.")
+    status.add_argument("--queue", "-q", type=Path, required=True)
+    status.add_argument("--dim", "-d", type=str, default=None, help="Dimension to rank agents by.")
+    status.add_argument("--top", "-k", type=int, default=10, help="Agents to show (0 = none).")
+
+    merge_cmd = sub.add_parser("merge", help="Write the report and leaderboard from finished chunks.")
+    merge_cmd.add_argument("--queue", "-q", type=Path, required=True)
+    merge_cmd.add_argument("--output", "-o", type=Path, required=True, help="Path to write the evaluation report JSON.")
+    merge_cmd.add_argument("--dim", "-d", type=str, default=None, help="Dimension to sort leaderboard by.")
+    merge_cmd.add_argument("--partial", action="store_true", help="Merge even if chunks are still pending.")
+    merge_cmd.add_argument("--top", "-k", type=int, default=20,
+                           help="Agents shown on the per-agent leaderboard when agents have several items.")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S")
+    queue = WorkQueue(args.queue)
+
+    if args.command == "init":
+        try:
+            with args.input.open("r", encoding="utf-8") as f:
+                items = json.load(f)
+            weights = {}
+            if args.weights:
+                with args.weights.open("r", encoding="utf-8") as wf:
+                    weights = json.load(wf)
+            options = {"use_llm": args.use_llm, "heuristics": args.heuristics, "model": args.model, "weights": weights}
+            n = queue.create(items, args.chunk_size, options)
+        except (OSError, json.JSONDecodeError, ValueError) as e:
+            logging.error(f"Failed to initialise queue '{args.queue}': {e}")
+            return
+        logging.info(f"Queued {len(items)} items in {n} chunks at '{args.queue}'.")
+
+    elif args.command == "worker":
+        if args.batch_id:
+            try:
+                with args.key_map.open("r", encoding="utf-8") as kf:
+                    api_key = json.load(kf).get(str(args.batch_id))
+                if not api_key:
+                    raise ValueError(f"No API key found for batch {args.batch_id}")
+                os.environ["GROQ_API_KEY"] = api_key
+                logging.info(f"Set Groq API key for batch {args.batch_id}")
+            except Exception as e:
+                logging.error(f"Failed to set Groq API key: {e}")
+                return
+        run_worker(queue, worker=args.worker_id, lease=args.lease, poll=args.poll)
+
+    elif args.command == "status":
+        print(json.dumps(queue.progress()))
+        agg = queue.leaderboard()
+        if args.top and len(agg):
+            print_agent_leaderboard(agg, args.dim, args.top)
+
+    else:
+        merge(queue, args.output, args.dim, partial=args.partial, top_k=args.top)
+
+
+if __name__ == "__main__":
+    main()